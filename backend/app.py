@@ -1,87 +1,255 @@
+import functools
 import json
 import os
+from datetime import datetime, timezone
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
 from pydantic import ValidationError
 import logging
 
-from cloud_providers.aws import aws_cost
-from cloud_providers.azure import azure_cost
-from cloud_providers.gcp import gcp_cost
-from cloud_providers.kubernetes import k8s_cost
-from utils.onprem_tco import calculate_onprem_tco
-from schemas import CalcPayload
+import handlers
+from cloud_providers.fleet import price_batch
+from cloud_providers.regions import unknown_regions
+from cloud_providers.spot_risk import FleetTooLarge
+from cloud_providers.sweep import CUBE_MIMETYPE, cube_json, encode_cube, sweep_grid
+from handlers import CATALOG_MAX_AGE, error_details, validation_details
+from schemas import SweepPayload, validate_batch
+from utils import metrics, profiling
+from utils.result_cache import get_result_cache
 
 app = Flask(__name__)
 CORS(app)
 
 logger = logging.getLogger(__name__)
 
+MAX_BATCH_SIZE = 10000
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/jsonl", "application/json-seq")
+MAX_SWEEP_POINTS = 250000
+
+if os.environ.get("PROFILE_CONTINUOUS") == "1":
+    profiling.start_continuous()
+
+
+@app.before_request
+def _start_timing():
+    g.timings, g.timings_token = metrics.start_request()
+
+
+@app.after_request
+def _record_timing(response):
+    timings = g.pop("timings", None)
+    if timings is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.HTTP_REQUEST_SECONDS.observe(timings.elapsed(), route, request.method, str(response.status_code))
+        response.headers["Server-Timing"] = timings.header()
+    return response
+
+
+@app.teardown_request
+def _end_timing(exception=None):
+    token = g.pop("timings_token", None)
+    if token is not None:
+        metrics.end_request(token)
+
+
+def profiled(view):
+    """Run `view` under a profiler when an operator asks for it with `X-Profile` (see utils.profiling)."""
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        mode = profiling.requested_mode(request.headers)
+        if mode is None:
+            return view(*args, **kwargs)
+        response, profile = profiling.profile_call(mode, lambda: app.make_response(view(*args, **kwargs)))
+        try:
+            response.headers["X-Profile-Id"] = profiling.save(profile, f"{request.method} {request.path}")
+        except OSError:
+            logger.exception("Failed to store profile")
+        return response
+
+    return wrapper
+
+
+def _profiles_forbidden():
+    if not profiling.enabled():
+        return jsonify({"error": "not found"}), 404
+    if not profiling.authorized(request.headers.get("X-Profile-Token")):
+        return jsonify({"error": "forbidden"}), 403
+    return None
+
 
 # ✅ Health route (root)
 @app.route("/", methods=["GET"])
 def health():
-    return {"status": "Backend is running"}, 200
+    return handlers.health()
 
 
 # ✅ Production health route
 @app.route("/api/health", methods=["GET"])
 def api_health():
-    return {"service": "InfraCostIQ API", "status": "ok"}, 200
+    return handlers.api_health()
 
 
 # ✅ Calculate route
 @app.route("/api/calculate", methods=["POST"])
+@profiled
 def calculate():
+    result, status_code = handlers.calculate(request.get_json(silent=True))
+    with metrics.stage("serialize"):
+        response = jsonify(result)
+    return response, status_code
+
+
+def _batch_rows():
+    """Read the batch body: a JSON array, {"workloads": [...]}, or NDJSON."""
+    if request.mimetype in NDJSON_MIMETYPES:
+        rows = []
+        for line_no, line in enumerate(request.get_data(as_text=True).splitlines(), start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                raise ValueError(f"line {line_no} is not valid JSON")
+        return rows
+
+    body = request.get_json(silent=True)
+    if isinstance(body, dict):
+        body = body.get("workloads")
+    if not isinstance(body, list):
+        raise ValueError("expected a JSON array of payloads or an object with a 'workloads' array")
+    return body
+
+
+# ✅ Result cache counters
+@app.route("/api/cache/stats", methods=["GET"])
+def cache_stats():
+    return jsonify(get_result_cache().stats())
+
+
+# ✅ Prometheus metrics
+@app.route("/api/metrics", methods=["GET"])
+def get_metrics():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
+# ✅ Price history
+@app.route("/api/prices/history", methods=["GET"])
+def price_history():
+    result, status_code = handlers.price_history(request.args)
+    return jsonify(result), status_code
+
+
+# ✅ Stored profiles (operators only)
+@app.route("/api/admin/profiles", methods=["GET"])
+def list_profiles():
+    return _profiles_forbidden() or jsonify(profiling.list_profiles())
+
+
+@app.route("/api/admin/profiles/<profile_id>", methods=["GET"])
+def get_profile(profile_id):
+    forbidden = _profiles_forbidden()
+    if forbidden:
+        return forbidden
+    fmt = request.args.get("format", "json")
+    body = profiling.load(profile_id, fmt)
+    if body is None:
+        return jsonify({"error": "profile not found"}), 404
+    return Response(body, mimetype="text/plain" if fmt == "collapsed" else "application/json")
+
+
+# ✅ Batch calculate route
+@app.route("/api/calculate/batch", methods=["POST"])
+@profiled
+def calculate_batch():
     try:
-        payload = CalcPayload(**(request.json or {}))
+        rows = _batch_rows()
+    except ValueError as e:
+        return jsonify({"error": "invalid input", "details": str(e)}), 400
+
+    if len(rows) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"batch too large; at most {MAX_BATCH_SIZE} workloads per request"}), 413
+
+    batch = validate_batch(rows)
+    errors = [{"index": e["index"], "errors": error_details(e["errors"])} for e in batch.errors]
+    for index, region in batch.regions().items():
+        unknown = unknown_regions(region)
+        if unknown:
+            errors.append({"index": index, "errors": [{"msg": f"no catalog for regions {unknown}"}]})
+    if errors:
+        errors.sort(key=lambda e: e["index"])
+        logger.debug("Batch validation failed for %d of %d rows", len(errors), len(rows))
+        return jsonify({"error": "invalid input", "details": errors}), 400
+
+    include_results = request.args.get("results", "true").lower() not in ("0", "false", "no")
+    try:
+        return jsonify(price_batch(batch, include_results=include_results))
+    except FleetTooLarge as e:
+        return jsonify({"error": "invalid input", "details": str(e)}), 400
+    except Exception:
+        logger.exception("Unexpected error in /calculate/batch")
+        return jsonify({"error": "internal server error"}), 500
+
+
+# ✅ Scenario sweep route
+@app.route("/api/sweep", methods=["POST"])
+def sweep():
+    try:
+        payload = SweepPayload(**(request.get_json(silent=True) or {}))
     except ValidationError as e:
         logger.debug("Validation error: %s", e)
-        return jsonify({"error": "invalid input", "details": e.errors()}), 400
+        return jsonify({"error": "invalid input", "details": validation_details(e)}), 400
+    except TypeError:
+        return jsonify({"error": "invalid input", "details": "expected a JSON object"}), 400
 
-    d = payload.dict()
+    unknown = unknown_regions(payload.region)
+    if unknown:
+        return jsonify({"error": "invalid input", "details": f"no catalog for regions {unknown}"}), 400
 
+    if payload.points() > MAX_SWEEP_POINTS:
+        return jsonify({"error": f"grid too large; at most {MAX_SWEEP_POINTS} points per request"}), 413
+
+    d = payload.model_dump()
+    clouds = ("aws", "azure", "gcp")
     try:
-        return jsonify({
-            "aws": aws_cost(**d),
-            "azure": azure_cost(**d),
-            "gcp": gcp_cost(**d),
-            "kubernetes": k8s_cost(**d),
-            "onprem": calculate_onprem_tco(
-                cpu=d["cpu"],
-                ram=d["ram"],
-                storage=d["storage"],
-                network=d["network"],
-                backup=d["backup"],
-                instance_count=d["instance_count"],
-            )
-        })
-    except Exception as e:
-        logger.exception("Unexpected error in /calculate")
+        result = sweep_grid(
+            payload.axes,
+            fixed={name: d[name] for name in ("cpu", "ram", "storage", "network", "backup", "instance_count")},
+            pricing_models=payload.pricing_models,
+            providers=payload.providers,
+            skus={p: d[f"{p}_sku"] for p in clouds},
+            storage_types={p: d[f"{p}_storage_type"] for p in clouds},
+            region=d["region"],
+        )
+    except Exception:
+        logger.exception("Unexpected error in /sweep")
         return jsonify({"error": "internal server error"}), 500
 
+    binary = request.args.get("format") == "binary" or request.accept_mimetypes.best == CUBE_MIMETYPE
+    if binary:
+        return Response(encode_cube(result), mimetype=CUBE_MIMETYPE)
+    return jsonify(cube_json(result))
+
 
 # ✅ Catalog route
 @app.route("/api/catalog", methods=["GET"])
 def get_catalog():
-    data_dir = os.path.join(os.path.dirname(__file__), "data")
-
-    with open(os.path.join(data_dir, "aws_catalog.json"), "r") as f:
-        aws = json.load(f)
-    with open(os.path.join(data_dir, "azure_catalog.json"), "r") as f:
-        azure = json.load(f)
-    with open(os.path.join(data_dir, "gcp_catalog.json"), "r") as f:
-        gcp = json.load(f)
-    with open(os.path.join(data_dir, "storage_rates.json"), "r") as f:
-        storage_rates = json.load(f)
-
-    return jsonify({
-        "aws": aws,
-        "azure": azure,
-        "gcp": gcp,
-        "storage_rates": storage_rates,
-    })
+    body, status_code = handlers.catalog(request.args)
+    if status_code != 200:
+        return jsonify(body), status_code
+
+    encoding = body.negotiate(request.accept_encodings)
+    response = Response(body.encoded[encoding], mimetype="application/json")
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.set_etag(body.etag(encoding))
+    response.last_modified = datetime.fromtimestamp(body.last_modified, tz=timezone.utc)
+    response.cache_control.public = True
+    response.cache_control.max_age = CATALOG_MAX_AGE
+    return response.make_conditional(request)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,334 @@
+"""ASGI serving mode for the calculation API.
+
+Serves `/`, `/api/health`, `/api/calculate`, `/api/catalog` and `/api/metrics` with the same
+handlers (and the same process-wide catalog registry and result cache) as the
+Flask app in `app.py`. The event loop only parses requests and writes
+responses; pricing runs on a bounded thread pool, so slow clients and
+connections waiting on a computation do not tie up a worker each.
+
+    uvicorn asgi:app --port 5000 --workers 4
+
+Every other path (batch, sweep, contact, price history, admin) is handed to
+the Flask app over WSGI on the same pool, so both modes serve the same routes.
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate, parsedate_to_datetime
+from io import BytesIO
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+import handlers
+from app import app as flask_app
+from utils import metrics, profiling
+
+logger = logging.getLogger(__name__)
+
+ASGI_PRICING_WORKERS = int(os.environ.get("ASGI_PRICING_WORKERS", "8"))
+MAX_BODY_BYTES = 1024 * 1024
+
+Headers = List[Tuple[bytes, bytes]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+
+_pool = ThreadPoolExecutor(max_workers=ASGI_PRICING_WORKERS, thread_name_prefix="asgi-pricing")
+
+# Same as flask-cors' defaults in app.py: any origin.
+CORS_HEADERS: Headers = [(b"access-control-allow-origin", b"*")]
+
+
+class Request:
+    __slots__ = ("method", "path", "args", "headers", "body")
+
+    def __init__(self, scope: Dict[str, Any], body: bytes):
+        self.method: str = scope["method"]
+        self.path: str = scope["path"]
+        self.args = dict(parse_qsl(scope.get("query_string", b"").decode("latin-1")))
+        self.headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope["headers"]}
+        self.body = body
+
+    def json(self) -> Any:
+        if not self.body:
+            return None
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            return None
+
+    def accept_encodings(self) -> List[Tuple[str, float]]:
+        pairs = []
+        for item in self.headers.get("accept-encoding", "").split(","):
+            name, _, params = item.strip().partition(";")
+            if not name:
+                continue
+            quality = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            pairs.append((name.strip(), quality))
+        return pairs
+
+
+async def _send(send: Send, status: int, body: bytes, headers: Headers) -> None:
+    headers = headers + CORS_HEADERS + [(b"content-length", str(len(body)).encode())]
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+def _without_body(send: Send) -> Send:
+    """`send` for a HEAD request: the GET response's headers (Content-Length included), no body."""
+    async def send_head(message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.body":
+            message = {**message, "body": b""}
+        await send(message)
+
+    return send_head
+
+
+async def _send_json(send: Send, payload: Dict, status: int) -> None:
+    body = json.dumps(payload, separators=(",", ":")).encode()
+    await _send(send, status, body, [(b"content-type", b"application/json")])
+
+
+async def _run(fn: Callable, *args):
+    # Carry the request's context (stage timings) into the pool thread.
+    call = functools.partial(contextvars.copy_context().run, fn, *args)
+    return await asyncio.get_running_loop().run_in_executor(_pool, call)
+
+
+def _not_modified_since(header: Optional[str], last_modified: float) -> bool:
+    if not header:
+        return False
+    try:
+        return int(last_modified) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+async def _catalog(request: Request, send: Send) -> None:
+    body, status = await _run(handlers.catalog, request.args)
+    if status != 200:
+        await _send_json(send, body, status)
+        return
+
+    encoding = body.negotiate(request.accept_encodings())
+    etag = body.etag(encoding)
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"vary", b"Accept-Encoding"),
+        (b"etag", f'"{etag}"'.encode()),
+        (b"last-modified", formatdate(body.last_modified, usegmt=True).encode()),
+        (b"cache-control", f"public, max-age={handlers.CATALOG_MAX_AGE}".encode()),
+    ]
+    if_none_match = request.headers.get("if-none-match")
+    if handlers.if_none_match(if_none_match, etag) or (
+        if_none_match is None and _not_modified_since(request.headers.get("if-modified-since"), body.last_modified)
+    ):
+        await _send(send, 304, b"", headers)
+        return
+    if encoding != "identity":
+        headers.append((b"content-encoding", encoding.encode()))
+    await _send(send, 200, body.encoded[encoding], headers)
+
+
+async def _calculate(request: Request, send: Send) -> None:
+    headers = [(b"content-type", b"application/json")]
+    mode = profiling.requested_mode(request.headers)
+    if mode is None:
+        payload, status = await _run(handlers.calculate, request.json())
+    else:
+        (payload, status), profile = await _run(profiling.profile_call, mode, handlers.calculate, request.json())
+        try:
+            profile_id = await _run(profiling.save, profile, f"{request.method} {request.path}")
+            headers.append((b"x-profile-id", profile_id.encode()))
+        except OSError:
+            logger.exception("Failed to store profile")
+    with metrics.stage("serialize"):
+        body = json.dumps(payload, separators=(",", ":")).encode()
+    await _send(send, status, body, headers)
+
+
+async def _metrics(request: Request, send: Send) -> None:
+    await _send(send, 200, metrics.render().encode(), [(b"content-type", metrics.CONTENT_TYPE.encode())])
+
+
+async def _static(handler: Callable[[], Tuple[Dict, int]], request: Request, send: Send) -> None:
+    payload, status = handler()
+    await _send_json(send, payload, status)
+
+
+ROUTES: Dict[Tuple[str, str], Callable[[Request, Send], Awaitable[None]]] = {
+    ("GET", "/"): lambda request, send: _static(handlers.health, request, send),
+    ("GET", "/api/health"): lambda request, send: _static(handlers.api_health, request, send),
+    ("POST", "/api/calculate"): _calculate,
+    ("GET", "/api/catalog"): _catalog,
+    ("GET", "/api/metrics"): _metrics,
+}
+
+
+_PATHS = {path for _, path in ROUTES}
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+async def _read_body(receive: Receive, limit: Optional[int] = MAX_BODY_BYTES) -> Optional[bytes]:
+    """The full request body, or None if the client disconnected first."""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if limit is not None and size > limit:
+            raise BodyTooLarge()
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+def _wsgi_environ(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": "HTTP/" + scope.get("http_version", "1.1"),
+        "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope["headers"]:
+        key = name.decode("latin-1").upper().replace("-", "_")
+        if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            key = "HTTP_" + key
+        value = value.decode("latin-1")
+        environ[key] = f"{environ[key]},{value}" if key in environ and key.startswith("HTTP_") else value
+    return environ
+
+
+def _call_wsgi(environ: Dict[str, Any]) -> Tuple[int, Headers, bytes]:
+    """Run the Flask app for one request and collect its response."""
+    started = []
+
+    def start_response(status: str, headers: List[Tuple[str, str]], exc_info=None):
+        started[:] = [int(status.split(" ", 1)[0]), [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]]
+        return lambda data: None
+
+    result = flask_app.wsgi_app(environ, start_response)
+    try:
+        body = b"".join(result)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    return started[0], started[1], body
+
+
+async def _wsgi(scope: Dict[str, Any], receive: Receive, send: Send) -> None:
+    """Serve a path ROUTES does not cover with the Flask app; it records its own metrics."""
+    try:
+        body = await _read_body(receive, flask_app.config.get("MAX_CONTENT_LENGTH"))
+    except BodyTooLarge:
+        await _send_json(send, {"error": "request body too large"}, 413)
+        return
+    if body is None:
+        return
+    status, headers, body = await _run(_call_wsgi, _wsgi_environ(scope, body))
+    if scope["method"] == "HEAD":
+        body = b""
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _lifespan(receive: Receive, send: Send) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            if os.environ.get("PROFILE_CONTINUOUS") == "1":
+                profiling.start_continuous()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            profiling.stop_continuous()
+            _pool.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def _dispatch(scope: Dict[str, Any], receive: Receive, send: Send) -> str:
+    """Route and serve one request; returns the matched route for metrics."""
+    method, path = scope["method"], scope["path"].rstrip("/") or "/"
+    if method == "OPTIONS":
+        await _send(send, 204, b"", [
+            (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+            (b"access-control-allow-headers", b"Content-Type"),
+        ])
+        return path
+    if method == "HEAD":
+        method, send = "GET", _without_body(send)
+
+    route = ROUTES.get((method, path))
+    if route is None:
+        await _send_json(send, {"error": "method not allowed"}, 405)
+        return "unmatched"
+
+    try:
+        body = await _read_body(receive)
+    except BodyTooLarge:
+        await _send_json(send, {"error": "request body too large"}, 413)
+        return path
+    if body is None:
+        return path
+    try:
+        await route(Request(scope, body), send)
+    except Exception:
+        logger.exception("Unhandled error in %s %s", method, path)
+        await _send_json(send, {"error": "internal server error"}, 500)
+    return path
+
+
+async def app(scope: Dict[str, Any], receive: Receive, send: Send) -> None:
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+    if (scope["path"].rstrip("/") or "/") not in _PATHS:
+        await _wsgi(scope, receive, send)
+        return
+
+    timings, token = metrics.start_request()
+    status = []
+
+    async def timed_send(message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+            message = {**message, "headers": message["headers"] + [(b"server-timing", timings.header().encode())]}
+        await send(message)
+
+    route = "unmatched"
+    try:
+        route = await _dispatch(scope, receive, timed_send)
+    finally:
+        metrics.end_request(token)
+        metrics.HTTP_REQUEST_SECONDS.observe(timings.elapsed(), route, scope["method"], str(status[0] if status else 0))
@@ -0,0 +1 @@
+"""Reproducible benchmarks for the pricing engine and API (`python -m benchmarks.run`)."""
@@ -0,0 +1,404 @@
+"""Benchmark cases for the pricing hot paths and the HTTP API.
+
+Each case takes a `scale` factor (1.0 for a full run, smaller for `--quick`)
+and returns a result dict from `harness.bench` or `load_test`.
+"""
+import http.client
+import json
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from cloud_providers.catalog_index import CatalogIndex
+from cloud_providers.catalog_pricing import (
+    calculate_provider_cost,
+    catalog_index,
+    compose_fleet,
+    hourly_on_demand,
+    load_catalog,
+    smart_match,
+)
+from cloud_providers.catalog_registry import DATA_DIR, CatalogRegistry
+from cloud_providers.catalog_snapshot import load_catalog_file
+from cloud_providers.kubernetes import k8s_cost
+from cloud_providers.spot_risk import DEFAULT_TRAJECTORIES, simulate, workload_lines
+from schemas import validate_batch
+from utils import metrics
+from utils.onprem_tco import calculate_onprem_tco
+
+from .harness import bench, histogram, summarize
+
+SEED = 1234
+
+LOCATIONS = [
+    "US East (N. Virginia)", "US East (Ohio)", "US West (Oregon)", "US West (N. California)",
+    "EU (Ireland)", "EU (Frankfurt)", "EU (London)", "EU (Paris)", "EU (Stockholm)",
+    "Asia Pacific (Tokyo)", "Asia Pacific (Seoul)", "Asia Pacific (Singapore)", "Asia Pacific (Sydney)",
+    "Asia Pacific (Mumbai)", "Canada (Central)", "South America (Sao Paulo)",
+]
+OPERATING_SYSTEMS = ["Linux", "Windows", "RHEL", "SUSE"]
+TENANCIES = ["Shared", "Dedicated", "Host"]
+PRE_INSTALLED = ["NA", "SQL Web", "SQL Std"]
+
+
+def _iterations(base: int, scale: float) -> int:
+    return max(20, int(base * scale))
+
+
+def _workloads(n: int) -> List[Dict]:
+    rng = random.Random(SEED)
+    return [
+        {
+            "cpu": rng.choice([1, 2, 4, 8, 16, 32, 64]),
+            "ram": rng.choice([1, 2, 4, 8, 16, 32, 64, 128, 256]),
+            "storage": rng.randint(0, 2000),
+            "network": rng.randint(0, 500),
+            "backup": rng.randint(0, 1000),
+            "instance_count": rng.randint(1, 20),
+        }
+        for _ in range(n)
+    ]
+
+
+def _cycle(items: List) -> Callable[[], object]:
+    state = {"i": 0}
+
+    def take():
+        state["i"] = (state["i"] + 1) % len(items)
+        return items[state["i"]]
+
+    return take
+
+
+def case_smart_match(scale: float) -> Dict:
+    """Reference linear-scan matcher over the AWS catalog."""
+    catalog = list(load_catalog("aws"))
+    take = _cycle(_workloads(256))
+    return bench(lambda: (lambda w: smart_match(catalog, w["cpu"], w["ram"]))(take()), _iterations(5000, scale))
+
+
+def case_index_match(scale: float) -> Dict:
+    """Indexed matcher used by calculate_provider_cost."""
+    index = catalog_index("aws")
+    take = _cycle(_workloads(256))
+    return bench(lambda: (lambda w: index.match(w["cpu"], w["ram"]))(take()), _iterations(20000, scale))
+
+
+def case_calculate_provider_cost(scale: float) -> Dict:
+    take = _cycle(_workloads(256))
+
+    def run():
+        w = take()
+        return calculate_provider_cost("aws", w["cpu"], w["ram"], w["storage"], w["network"], w["backup"],
+                                       None, "on_demand", w["instance_count"], None)
+
+    return bench(run, _iterations(10000, scale))
+
+
+def case_fleet_composition(scale: float) -> Dict:
+    """Cheapest SKU mix (`compose_fleet`) for aggregate workloads, cycling through AWS, Azure and GCP."""
+    indexes = [catalog_index(provider) for provider in ("aws", "azure", "gcp")]
+    take = _cycle([(index, w) for w in _workloads(64) for index in indexes])
+
+    def run():
+        index, w = take()
+        return compose_fleet(index, "on_demand", w["cpu"] * w["instance_count"], w["ram"] * w["instance_count"])
+
+    return bench(run, _iterations(192, scale), warmup=5, alloc_iterations=20)
+
+
+def case_spot_risk(scale: float) -> Dict:
+    """Monte Carlo spot month (`DEFAULT_TRAJECTORIES` trajectories) for one workload's AWS selection."""
+    rng = np.random.default_rng(SEED)
+    lines = []
+    for w in _workloads(32):
+        result = calculate_provider_cost("aws", w["cpu"], w["ram"], 0, 0, 0, None, "spot", w["instance_count"], None)
+        lines.append(workload_lines("aws", result)[0])
+    take = _cycle(lines)
+    return bench(lambda: simulate(take(), DEFAULT_TRAJECTORIES, rng), _iterations(100, scale), warmup=3,
+                 alloc_iterations=10)
+
+
+def case_batch_validation(scale: float) -> Dict:
+    """Bulk validation (`validate_batch`) of a 10000-row batch into pricing columns."""
+    rows = _workloads(10000)
+    return bench(lambda: validate_batch(rows), _iterations(100, scale), warmup=3, alloc_iterations=10)
+
+
+def case_onprem_tco(scale: float) -> Dict:
+    take = _cycle(_workloads(256))
+    return bench(lambda: calculate_onprem_tco(**take()), _iterations(20000, scale))
+
+
+def case_k8s_cost(scale: float) -> Dict:
+    take = _cycle(_workloads(256))
+    return bench(lambda: k8s_cost(**take()), _iterations(20000, scale))
+
+
+def case_catalog_load(scale: float) -> Dict:
+    """Cold load of the three provider catalogs and storage rates through a fresh registry."""
+    files = ["aws_catalog.json", "azure_catalog.json", "gcp_catalog.json", "storage_rates.json"]
+
+    def run():
+        registry = CatalogRegistry(DATA_DIR, loader=load_catalog_file)
+        for name in files:
+            registry.get(name)
+
+    return bench(run, _iterations(500, scale), warmup=5)
+
+
+def case_catalog_index_build(scale: float) -> Dict:
+    catalog = list(load_catalog("aws"))
+    return bench(lambda: CatalogIndex(catalog, hourly_on_demand), _iterations(500, scale), warmup=5)
+
+
+def synthetic_offer(products: int, instance_types: List[str]) -> Dict:
+    """An offer-file-shaped dict: products across locations/OS/tenancy, each with OnDemand and Reserved terms."""
+    rng = random.Random(SEED)
+    offer = {"formatVersion": "v1.0", "products": {}, "terms": {"OnDemand": {}, "Reserved": {}}}
+    for i in range(products):
+        key = f"SKU{i:08d}"
+        offer["products"][key] = {
+            "sku": key,
+            "productFamily": "Compute Instance",
+            "attributes": {
+                "instanceType": rng.choice(instance_types),
+                "location": rng.choice(LOCATIONS),
+                "operatingSystem": rng.choice(OPERATING_SYSTEMS),
+                "tenancy": rng.choice(TENANCIES),
+                "preInstalledSw": rng.choice(PRE_INSTALLED),
+                "capacitystatus": "Used",
+            },
+        }
+        price = f"{rng.uniform(0.005, 30):.4f}"
+        offer["terms"]["OnDemand"][key] = {
+            f"{key}.JRTCKXETXF": {
+                "offerTermCode": "JRTCKXETXF",
+                "priceDimensions": {f"{key}.JRTCKXETXF.6YS6EN2CT7": {"unit": "Hrs", "pricePerUnit": {"USD": price}}},
+                "termAttributes": {},
+            }
+        }
+        offer["terms"]["Reserved"][key] = {
+            f"{key}.{code}": {
+                "offerTermCode": code,
+                "priceDimensions": {f"{key}.{code}.6YS6EN2CT7": {"unit": "Hrs", "pricePerUnit": {"USD": price}}},
+                "termAttributes": {"LeaseContractLength": length, "OfferingClass": "standard",
+                                   "PurchaseOption": "No Upfront"},
+            }
+            for code, length in (("4NA7Y494T4", "1yr"), ("BPH4J8HBKS", "3yr"))
+        }
+    return offer
+
+
+def _offer_products(scale: float) -> int:
+    return max(2000, int(int(os.environ.get("BENCH_OFFER_PRODUCTS", "50000")) * scale))
+
+
+def case_public_sku_lookup(scale: float) -> Dict:
+    """`_get_pricing_for_sku_public` (per-SKU scan) on a synthetic offer file."""
+    from utils.aws_price_sync import _get_pricing_for_sku_public
+
+    skus = [entry["sku"] for entry in load_catalog("aws")]
+    offer = synthetic_offer(_offer_products(scale), skus)
+    take = _cycle(skus)
+    return bench(lambda: _get_pricing_for_sku_public(offer, take()), _iterations(200, scale), warmup=5)
+
+
+def case_public_price_join(scale: float) -> Dict:
+    """Single-pass join of every catalog SKU (`_extract_public_prices`) on the same synthetic offer."""
+    from utils.aws_price_sync import _extract_public_prices
+
+    skus = [entry["sku"] for entry in load_catalog("aws")]
+    offer = synthetic_offer(_offer_products(scale), skus)
+    return bench(lambda: _extract_public_prices(offer, skus), _iterations(20, scale), warmup=2, alloc_iterations=3)
+
+
+def case_offer_stream(scale: float) -> Dict:
+    """Streaming parse + filter of a synthetic offer file on disk (`stream_offerings`)."""
+    from utils.aws_offer_stream import ijson, stream_offerings
+
+    if ijson is None:
+        return {"skipped": "ijson is not installed"}
+    skus = [entry["sku"] for entry in load_catalog("aws")]
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(synthetic_offer(_offer_products(scale) // 5, skus), f)
+        path = f.name
+    try:
+        result = bench(lambda: stream_offerings(path, instance_types=skus), _iterations(10, scale), warmup=1,
+                       alloc_iterations=2)
+        result["file_bytes"] = os.path.getsize(path)
+        return result
+    finally:
+        os.unlink(path)
+
+
+def case_price_history_query(scale: float) -> Dict:
+    """Downsampled one-SKU range query on a price history of `BENCH_HISTORY_ROWS` rows (default 1M)."""
+    from utils.price_history import PriceHistory
+
+    rows = max(10000, int(int(os.environ.get("BENCH_HISTORY_ROWS", "1000000")) * scale))
+    skus = [f"sku{i:04d}.large" for i in range(250)]
+    models = ("on_demand", "reserved_1yr", "reserved_3yr", "spot")
+    syncs = max(1, rows // (len(skus) * len(models)))
+    rng = random.Random(SEED)
+    with tempfile.TemporaryDirectory() as directory:
+        history = PriceHistory(os.path.join(directory, "history.db"))
+        for sync in range(syncs):
+            history.record("aws", "us-east-1", {sku: {m: rng.uniform(0.01, 5) for m in models} for sku in skus},
+                           ts=1700000000 + sync * 3600)
+        end = 1700000000 + syncs * 3600
+        take = _cycle(skus)
+        result = bench(lambda: history.series("aws", "us-east-1", take(), start=1700000000, end=end, points=200),
+                       _iterations(500, scale), warmup=10)
+        result["rows"] = history.count()
+        history.close()
+        return result
+
+
+def case_metrics_overhead(scale: float) -> Dict:
+    """Per-request instrumentation cost: stage timings, a histogram sample and the Server-Timing header."""
+
+    def run():
+        timings, token = metrics.start_request()
+        with metrics.stage("validate"):
+            pass
+        metrics.record_stage("aws", 0.001)
+        metrics.record_stage("cache", 0.002, "miss")
+        metrics.HTTP_REQUEST_SECONDS.observe(timings.elapsed(), "/bench", "POST", "200")
+        timings.header()
+        metrics.end_request(token)
+
+    return bench(run, _iterations(50000, scale))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def load_test(port: int, requests: int, concurrency: int, distinct_payloads: int = 200) -> Dict:
+    """POST `requests` calculations with `concurrency` keep-alive clients; latency per request."""
+    payloads = [json.dumps({**w, "pricing_model": "on_demand"}).encode() for w in _workloads(distinct_payloads)]
+    per_client = max(1, requests // concurrency)
+    errors = []
+
+    def client(worker: int) -> List[float]:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        samples = []
+        for i in range(per_client):
+            body = payloads[(worker * per_client + i) % len(payloads)]
+            started = time.perf_counter_ns()
+            try:
+                conn.request("POST", "/api/calculate", body, {"Content-Type": "application/json"})
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors.append(response.status)
+                if response.getheader("connection", "").lower() == "close" or response.version == 10:
+                    conn.close()
+                    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            except (OSError, http.client.HTTPException) as e:
+                errors.append(type(e).__name__)
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            samples.append((time.perf_counter_ns() - started) / 1000.0)
+        conn.close()
+        return samples
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = [s for chunk in pool.map(client, range(concurrency)) for s in chunk]
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(samples)
+    result = summarize(ordered)
+    result["histogram"] = histogram(ordered)
+    result["ops_per_s"] = round(len(ordered) / elapsed, 1)
+    result["concurrency"] = concurrency
+    result["errors"] = len(errors)
+    return result
+
+
+def _http_settings(scale: float):
+    return max(200, int(4000 * scale)), int(os.environ.get("BENCH_CONCURRENCY", "16"))
+
+
+def case_http_flask(scale: float) -> Dict:
+    """End-to-end /api/calculate throughput against the Flask app (threaded werkzeug server)."""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    from app import app
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        requests, concurrency = _http_settings(scale)
+        return load_test(server.server_port, requests, concurrency)
+    finally:
+        server.shutdown()
+
+
+def case_http_asgi(scale: float) -> Dict:
+    """End-to-end /api/calculate throughput against the ASGI app under uvicorn."""
+    try:
+        import uvicorn
+    except ImportError:
+        return {"skipped": "uvicorn is not installed"}
+    from asgi import app
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    try:
+        _wait_for_port(port)
+        requests, concurrency = _http_settings(scale)
+        return load_test(port, requests, concurrency)
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+
+CASES: Dict[str, Callable[[float], Dict]] = {
+    "smart_match": case_smart_match,
+    "index_match": case_index_match,
+    "calculate_provider_cost": case_calculate_provider_cost,
+    "fleet_composition": case_fleet_composition,
+    "spot_risk": case_spot_risk,
+    "batch_validation": case_batch_validation,
+    "calculate_onprem_tco": case_onprem_tco,
+    "k8s_cost": case_k8s_cost,
+    "catalog_load": case_catalog_load,
+    "catalog_index_build": case_catalog_index_build,
+    "public_sku_lookup": case_public_sku_lookup,
+    "public_price_join": case_public_price_join,
+    "offer_stream": case_offer_stream,
+    "price_history_query": case_price_history_query,
+    "metrics_overhead": case_metrics_overhead,
+    "http_calculate_flask": case_http_flask,
+    "http_calculate_asgi": case_http_asgi,
+}
@@ -0,0 +1,146 @@
+"""Timing, allocation and baseline-comparison helpers for the benchmark suite."""
+import gc
+import math
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+PERCENTILES = {"p50_us": 50.0, "p99_us": 99.0, "p999_us": 99.9}
+
+# Metrics compared against the baseline by default. Tail percentiles of short
+# runs are noisy, so p999 is reported but not gated unless asked for.
+DEFAULT_GATED_METRICS = ("p50_us", "p99_us", "alloc_bytes_per_op")
+
+
+def percentile(sorted_samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted samples."""
+    if not sorted_samples:
+        return math.nan
+    # Round first so 99.9% of 1000 samples is rank 999, not 1000 from float error.
+    rank = max(1, math.ceil(round(pct * len(sorted_samples) / 100.0, 9)))
+    return sorted_samples[min(rank, len(sorted_samples)) - 1]
+
+
+def histogram(sorted_samples: Sequence[float], buckets: int = 12) -> List[Dict[str, float]]:
+    """Log-spaced latency histogram (microseconds) of sorted samples."""
+    if not sorted_samples:
+        return []
+    low, high = max(sorted_samples[0], 1e-3), max(sorted_samples[-1], 1e-3)
+    if high <= low:
+        return [{"le_us": high, "count": len(sorted_samples)}]
+    ratio = (high / low) ** (1.0 / buckets)
+    edges = [low * ratio ** (i + 1) for i in range(buckets)]
+    edges[-1] = high
+    counts = [0] * buckets
+    bucket = 0
+    for value in sorted_samples:
+        while bucket < buckets - 1 and value > edges[bucket]:
+            bucket += 1
+        counts[bucket] += 1
+    return [{"le_us": round(edge, 3), "count": count} for edge, count in zip(edges, counts)]
+
+
+def summarize(samples_us: Iterable[float], ops_per_sample: int = 1) -> Dict[str, float]:
+    ordered = sorted(samples_us)
+    total_s = sum(ordered) / 1e6
+    summary = {name: round(percentile(ordered, pct), 3) for name, pct in PERCENTILES.items()}
+    summary.update({
+        "mean_us": round(statistics.fmean(ordered), 3) if ordered else math.nan,
+        "min_us": round(ordered[0], 3) if ordered else math.nan,
+        "samples": len(ordered),
+        "ops_per_s": round(len(ordered) * ops_per_sample / total_s, 1) if total_s > 0 else math.nan,
+    })
+    return summary
+
+
+def measure_allocations(fn: Callable[[], object], iterations: int) -> Dict[str, float]:
+    """Per-call memory high-water mark and retained growth, in a separate tracemalloc pass.
+
+    `alloc_bytes_per_op` is the mean peak of traced memory above the level at
+    the start of each call: the working memory one call needs.
+    `retained_bytes_per_op` is memory still held after the loop, per call.
+    """
+    iterations = max(1, iterations)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        peaks = 0
+        for _ in range(iterations):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks += max(0, peak - before)
+        end, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "alloc_bytes_per_op": round(peaks / iterations, 1),
+        "retained_bytes_per_op": round(max(0, end - start) / iterations, 1),
+    }
+
+
+def bench(
+    fn: Callable[[], object],
+    iterations: int = 1000,
+    warmup: int = 50,
+    alloc_iterations: Optional[int] = None,
+    timer: Callable[[], int] = time.perf_counter_ns,
+) -> Dict:
+    """Time `fn` per call, then measure its allocations in a separate pass."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(iterations):
+            started = timer()
+            fn()
+            samples.append((timer() - started) / 1000.0)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    ordered = sorted(samples)
+    result = summarize(ordered)
+    result["histogram"] = histogram(ordered)
+    result.update(measure_allocations(fn, alloc_iterations if alloc_iterations is not None else min(iterations, 200)))
+    return result
+
+
+def environment() -> Dict[str, str]:
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "processor": platform.processor() or "unknown",
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float,
+            metrics: Sequence[str] = DEFAULT_GATED_METRICS, min_delta_us: float = 1.0) -> List[Dict]:
+    """Regressions of `results` against `baseline` beyond `threshold` (0.25 = 25% worse).
+
+    Latency metrics must also be worse by at least `min_delta_us`, so
+    sub-microsecond jitter on very fast cases does not fail the run.
+    """
+    regressions = []
+    for case, current in results.items():
+        reference = baseline.get(case)
+        if not reference:
+            continue
+        for metric in metrics:
+            new, old = current.get(metric), reference.get(metric)
+            if new is None or old is None or not old or math.isnan(new) or math.isnan(old):
+                continue
+            if metric.endswith("_us") and new - old < min_delta_us:
+                continue
+            if new > old * (1 + threshold):
+                regressions.append({"case": case, "metric": metric, "baseline": old, "current": new,
+                                    "change": round(new / old - 1, 3)})
+    return regressions
@@ -0,0 +1,123 @@
+"""Run the benchmark suite, compare against a stored baseline and gate on regressions.
+
+    python -m benchmarks.run                      # all cases, compare to baseline.json
+    python -m benchmarks.run --quick --cases smart_match,k8s_cost   # compare to baseline.quick.json
+    python -m benchmarks.run --save-baseline      # record a new baseline
+
+Exits with status 1 when any gated metric is worse than the baseline by more
+than `--threshold` (or BENCH_REGRESSION_THRESHOLD). Full and `--quick` runs
+keep separate baselines, and a run is only gated against a baseline recorded
+in the same mode. Baselines are specific to one machine and are not checked in.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+from .cases import CASES
+from .harness import DEFAULT_GATED_METRICS, compare, environment
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_QUICK_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.quick.json")
+QUICK_SCALE = 0.1
+
+
+def _load_baseline(path: str) -> Dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_json(path: str, data: Dict) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def _format(name: str, result: Dict) -> str:
+    if "skipped" in result:
+        return f"{name:<26} skipped: {result['skipped']}"
+    alloc = result.get("alloc_bytes_per_op")
+    alloc_text = f"  alloc {alloc / 1024:9.1f} KiB/op" if alloc is not None else ""
+    return (f"{name:<26} p50 {result['p50_us']:>11.1f}us  p99 {result['p99_us']:>11.1f}us  "
+            f"p999 {result['p999_us']:>11.1f}us  {result['ops_per_s']:>11.1f} op/s{alloc_text}")
+
+
+def run(names: List[str], scale: float) -> Dict[str, Dict]:
+    results = {}
+    for name in names:
+        started = time.perf_counter()
+        results[name] = CASES[name](scale)
+        print(f"{_format(name, results[name])}  ({time.perf_counter() - started:.1f}s)", flush=True)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the pricing engine and API")
+    parser.add_argument("--cases", help=f"comma-separated subset of: {', '.join(CASES)}")
+    parser.add_argument("--quick", action="store_true", help="run about a tenth of the iterations")
+    parser.add_argument("--baseline",
+                        help="baseline JSON to compare against (default: baseline.json, or baseline.quick.json with --quick)")
+    parser.add_argument("--save-baseline", action="store_true", help="write this run as the new baseline")
+    parser.add_argument("--threshold", type=float,
+                        default=float(os.environ.get("BENCH_REGRESSION_THRESHOLD", "0.25")),
+                        help="allowed relative slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--metrics", default=",".join(DEFAULT_GATED_METRICS),
+                        help="comma-separated metrics to gate on")
+    parser.add_argument("--output", help="also write the full results to this JSON file")
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.cases.split(",") if n.strip()] if args.cases else list(CASES)
+    unknown = [n for n in names if n not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+
+    if args.baseline is None:
+        args.baseline = DEFAULT_QUICK_BASELINE if args.quick else DEFAULT_BASELINE
+    mode = "quick" if args.quick else "full"
+
+    results = run(names, QUICK_SCALE if args.quick else 1.0)
+    report = {"environment": environment(), "quick": args.quick, "results": results}
+    if args.output:
+        _write_json(args.output, report)
+
+    if args.save_baseline:
+        baseline = _load_baseline(args.baseline)
+        if baseline.get("quick", False) != args.quick:
+            baseline = {}  # results from the other mode are not comparable
+        baseline.setdefault("results", {}).update(results)
+        baseline["environment"] = report["environment"]
+        baseline["quick"] = args.quick
+        _write_json(args.baseline, baseline)
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    baseline = _load_baseline(args.baseline)
+    if not baseline:
+        print(f"no baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+    if baseline.get("quick", False) != args.quick:
+        print(f"baseline {args.baseline} was not recorded in {mode} mode; not comparing")
+        return 0
+    if baseline.get("environment") != report["environment"]:
+        print("warning: baseline was recorded on a different interpreter/machine", file=sys.stderr)
+
+    metrics = [m.strip() for m in args.metrics.split(",") if m.strip()]
+    regressions = compare(results, baseline.get("results", {}), args.threshold, metrics)
+    for r in regressions:
+        print(f"REGRESSION {r['case']} {r['metric']}: {r['baseline']} -> {r['current']} "
+              f"(+{r['change'] * 100:.1f}%)")
+    if regressions:
+        return 1
+    print(f"no regressions beyond {args.threshold * 100:.0f}% against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
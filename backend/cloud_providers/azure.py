@@ -11,6 +11,10 @@ def azure_cost(
     pricing_model="on_demand",
     instance_count=1,
     azure_storage_type="standard_ssd",
+    context=None,
+    region=None,
+    composition="single",
+    fleet_constraints=None,
     **_,
 ):
     return calculate_provider_cost(
@@ -24,4 +28,8 @@ def azure_cost(
         pricing_model=pricing_model,
         instance_count=instance_count,
         storage_type=azure_storage_type,
+        context=context,
+        region=region,
+        composition=composition,
+        fleet_constraints=fleet_constraints,
     )
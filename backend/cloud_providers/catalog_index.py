@@ -0,0 +1,131 @@
+"""Precomputed lookup structures for a provider catalog.
+
+`CatalogIndex` is built once per catalog version (see `catalog_pricing.catalog_index`)
+and answers the same questions as `lookup_sku` and `smart_match` without scanning
+or sorting the catalog on every request.
+
+Matching works on a grid of the distinct vcpu and ram_gb values in the catalog.
+The entries covering a target (cpu, ram) are exactly those at or above the grid
+cell found by bisecting both axes, so the cheapest covering entry for every cell
+is precomputed as a 2D suffix minimum. A query is then two bisects and a table
+read per category group.
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence
+
+
+GROUPS = ("all", "memory", "compute")
+
+_NONE = -1
+
+
+def preferred_category(target_cpu: float, target_ram: float) -> Optional[str]:
+    """Category `smart_match` prefers for a RAM:CPU ratio, if any."""
+    ratio = (target_ram / target_cpu) if target_cpu > 0 else 0
+    if ratio > 6:
+        return "memory"
+    if ratio < 3 and target_cpu > 0:
+        return "compute"
+    return None
+
+
+class CatalogIndex:
+    """SKU dictionary plus per-category cheapest-cover tables for one catalog."""
+
+    def __init__(self, catalog: Sequence[Dict], price: Callable[[Dict], float]):
+        # Sequences (lists, memory-mapped snapshots) are kept as-is rather than
+        # copied; `rows` is only held while the tables are built.
+        self.entries: Sequence[Dict] = catalog if isinstance(catalog, Sequence) else list(catalog)
+        rows = self.entries if isinstance(self.entries, list) else list(self.entries)
+
+        self.by_sku: Dict[str, int] = {}
+        for i, entry in enumerate(rows):
+            self.by_sku.setdefault(entry.get("sku"), i)
+
+        # Rank reproduces smart_match's stable sort on (on-demand price, vcpu, ram_gb).
+        order = sorted(
+            range(len(rows)),
+            key=lambda i: (price(rows[i]), rows[i].get("vcpu", 0), rows[i].get("ram_gb", 0), i),
+        )
+        self.rank = [0] * len(order)
+        for position, i in enumerate(order):
+            self.rank[i] = position
+
+        self.vcpus = sorted({float(e.get("vcpu", 0)) for e in rows})
+        self.rams = sorted({float(e.get("ram_gb", 0)) for e in rows})
+        self._vcpu_pos = {v: k for k, v in enumerate(self.vcpus)}
+        self._ram_pos = {v: k for k, v in enumerate(self.rams)}
+
+        self.tables: Dict[str, List[int]] = {}
+        self.group_min: Dict[str, int] = {}
+        for group in GROUPS:
+            members = [
+                i for i, e in enumerate(rows)
+                if group == "all" or e.get("category") == group
+            ]
+            self.tables[group] = self._build_table(rows, members)
+            self.group_min[group] = min(members, key=self.rank.__getitem__) if members else _NONE
+
+    def _better(self, a: int, b: int) -> int:
+        if a == _NONE:
+            return b
+        if b == _NONE:
+            return a
+        return a if self.rank[a] < self.rank[b] else b
+
+    def _build_table(self, rows: Sequence[Dict], members: List[int]) -> List[int]:
+        n_cpu, n_ram = len(self.vcpus), len(self.rams)
+        table = [_NONE] * (n_cpu * n_ram)
+        for i in members:
+            e = rows[i]
+            cell = self._vcpu_pos[float(e.get("vcpu", 0))] * n_ram + self._ram_pos[float(e.get("ram_gb", 0))]
+            table[cell] = self._better(table[cell], i)
+
+        for a in range(n_cpu - 1, -1, -1):
+            for b in range(n_ram - 1, -1, -1):
+                cell = a * n_ram + b
+                best = table[cell]
+                if a + 1 < n_cpu:
+                    best = self._better(best, table[cell + n_ram])
+                if b + 1 < n_ram:
+                    best = self._better(best, table[cell + 1])
+                table[cell] = best
+        return table
+
+    def cover(self, group: str, target_cpu: float, target_ram: float) -> int:
+        """Index of the cheapest entry in `group` with vcpu >= cpu and ram_gb >= ram, or -1."""
+        a = bisect_left(self.vcpus, target_cpu)
+        b = bisect_left(self.rams, target_ram)
+        if a == len(self.vcpus) or b == len(self.rams):
+            return _NONE
+        return self.tables[group][a * len(self.rams) + b]
+
+    def lookup(self, sku: Optional[str]) -> Optional[Dict]:
+        if not sku:
+            return None
+        i = self.by_sku.get(sku)
+        return None if i is None else self.entries[i]
+
+    def match_index(self, cpu: float, ram: float) -> int:
+        if not self.entries:
+            raise IndexError("cannot match against an empty catalog")
+        target_cpu = max(float(cpu), 0.0)
+        target_ram = max(float(ram), 0.0)
+        category = preferred_category(target_cpu, target_ram)
+
+        covering = self.cover("all", target_cpu, target_ram)
+        if covering == _NONE:
+            # smart_match falls back to the whole catalog when nothing covers the target.
+            if category is not None and self.group_min[category] != _NONE:
+                return self.group_min[category]
+            return self.group_min["all"]
+
+        if category is not None:
+            preferred = self.cover(category, target_cpu, target_ram)
+            if preferred != _NONE:
+                return preferred
+        return covering
+
+    def match(self, cpu: float, ram: float) -> Dict:
+        """Same result as `smart_match(catalog, cpu, ram)`."""
+        return self.entries[self.match_index(cpu, ram)]
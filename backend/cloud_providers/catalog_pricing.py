@@ -1,6 +1,10 @@
-import json
-import os
-from typing import Dict, List, Optional
+import weakref
+from typing import Dict, List, Mapping, Optional
+
+from .catalog_index import CatalogIndex
+from .composition import Fleet, FleetOptions, NodeConstraints, solve
+from .catalog_registry import get_registry
+from .regions import RegionSpec, catalog_file, pick_region, provider_regions
 
 
 HOURS_PER_MONTH = 730
@@ -24,18 +28,48 @@ DEFAULT_STORAGE_TYPE = {
 }
 
 
-def _data_path(file_name: str) -> str:
-    return os.path.join(os.path.dirname(__file__), "..", "data", file_name)
+def load_catalog(provider: str, region: Optional[str] = None) -> List[Dict]:
+    return get_registry().get(catalog_file(provider, region))
+
 
+def load_storage_rates() -> Dict[str, Dict[str, float]]:
+    return get_registry().get("storage_rates.json")
 
-def load_catalog(provider: str) -> List[Dict]:
-    with open(_data_path(f"{provider}_catalog.json"), "r") as f:
-        return json.load(f)
 
+def catalog_version(providers=tuple(DEFAULT_STORAGE_TYPE), region: RegionSpec = None):
+    """Stamps of the catalog and storage-rate files prices are computed from.
+
+    Includes the catalogs of every requested `region` the providers have.
+    """
+    registry = get_registry()
+    files = []
+    for provider in providers:
+        files.append(catalog_file(provider))
+        files.extend(catalog_file(provider, r) for r in provider_regions(provider, region))
+    files.append("storage_rates.json")
+    return tuple((name, registry.version(name)) for name in dict.fromkeys(files))
+
+
+def catalog_index(provider: str, region: Optional[str] = None) -> CatalogIndex:
+    """Index for the currently loaded version of a provider catalog."""
+    return get_registry().derive(
+        catalog_file(provider, region), "index", lambda catalog: CatalogIndex(catalog, hourly_on_demand)
+    )
 
-def load_storage_rates() -> Dict[str, Dict[str, float]]:
-    with open(_data_path("storage_rates.json"), "r") as f:
-        return json.load(f)
+
+class PricingContext:
+    """Catalog indexes and storage rates resolved once and shared by many calculations.
+
+    A context pins one catalog version, so every workload priced through it sees
+    the same prices even if a price sync lands mid-batch. `region` selects the
+    catalog of each provider (see `regions.pick_region`).
+    """
+
+    def __init__(self, providers=tuple(DEFAULT_STORAGE_TYPE), region: RegionSpec = None):
+        rates = load_storage_rates()
+        self.regions = {provider: pick_region(provider, region) for provider in providers}
+        self.indexes = {provider: catalog_index(provider, self.regions[provider]) for provider in providers}
+        self.storage_rates = {provider: rates.get(provider, {}) for provider in providers}
 
 
 def hourly_on_demand(entry: Dict) -> float:
@@ -83,6 +117,46 @@ def smart_match(catalog: List[Dict], cpu: float, ram: float) -> Dict:
     return candidates[0]
 
 
+_fleet_options: "weakref.WeakKeyDictionary[CatalogIndex, Dict[str, FleetOptions]]" = weakref.WeakKeyDictionary()
+
+
+def fleet_options(index: CatalogIndex, pricing_model: str, constraints: Optional[NodeConstraints] = None) -> FleetOptions:
+    """Solver options for a catalog index priced at `pricing_model`; unconstrained ones are cached per index."""
+    def price(entry: Dict) -> float:
+        return hourly_by_model(entry, pricing_model)
+
+    if constraints is not None:
+        return FleetOptions(index.entries, price, constraints)
+    per_model = _fleet_options.setdefault(index, {})
+    options = per_model.get(pricing_model)
+    if options is None:
+        options = per_model[pricing_model] = FleetOptions(index.entries, price)
+    return options
+
+
+def compose_fleet(index: CatalogIndex, pricing_model: str, cpu: float, ram: float,
+                  constraints: Optional[Mapping] = None) -> Optional[Fleet]:
+    """Cheapest SKU mix covering `cpu` vCPUs and `ram` GB (see `composition.solve`), or None if none fits."""
+    limits = {key: value for key, value in (constraints or {}).items() if value is not None}
+    max_nodes = limits.pop("max_nodes", None)
+    node = NodeConstraints(**limits) if limits else None
+    return solve(fleet_options(index, pricing_model, node), cpu, ram, max_nodes)
+
+
+def _instance(entry: Dict, hourly: float, count: int) -> Dict:
+    return {
+        "sku": entry.get("sku"),
+        "type": entry.get("sku"),
+        "vcpu": entry.get("vcpu"),
+        "memory_gb": entry.get("ram_gb"),
+        "category": entry.get("category"),
+        "description": entry.get("description"),
+        "price_per_hour": round(hourly, 5),
+        "price_per_month": round(hourly * HOURS_PER_MONTH, 2),
+        "count": int(count),
+    }
+
+
 def calculate_provider_cost(
     provider: str,
     cpu: float,
@@ -94,18 +168,46 @@ def calculate_provider_cost(
     pricing_model: str,
     instance_count: int,
     storage_type: Optional[str],
+    context: Optional[PricingContext] = None,
+    region: RegionSpec = None,
+    composition: str = "single",
+    fleet_constraints: Optional[Mapping] = None,
 ) -> Dict:
-    catalog = load_catalog(provider)
-    storage_rates = load_storage_rates().get(provider, {})
-
-    selected = lookup_sku(catalog, sku) or smart_match(catalog, cpu, ram)
+    """Monthly cost of `instance_count` instances of `sku` (or the best match for `cpu`/`ram`).
+
+    With `composition="optimal"` and no `sku`, the instances are instead priced
+    as the cheapest mix of SKUs covering `cpu * instance_count` vCPUs and
+    `ram * instance_count` GB within `fleet_constraints`, reported under
+    `composition`; if no mix satisfies the constraints the usual match is used.
+    """
+    selected_region = pick_region(provider, region)
+    if context is None or context.regions.get(provider) != selected_region:
+        index = catalog_index(provider, selected_region)
+        storage_rates = load_storage_rates().get(provider, {})
+    else:
+        index = context.indexes[provider]
+        storage_rates = context.storage_rates[provider]
+
+    selected = index.lookup(sku)
+    composed = selected is None and composition == "optimal"
+    fleet = None
+    if composed:
+        fleet = compose_fleet(index, pricing_model, float(cpu) * instance_count, float(ram) * instance_count,
+                              fleet_constraints)
 
     selected_storage_type = storage_type if storage_type in storage_rates else DEFAULT_STORAGE_TYPE[provider]
     storage_rate = float(storage_rates.get(selected_storage_type, 0.10))
 
-    hourly = hourly_by_model(selected, pricing_model)
-    per_instance_monthly = hourly * HOURS_PER_MONTH
-    compute_cost = per_instance_monthly * instance_count
+    if fleet is None:
+        selected = selected or index.match(cpu, ram)
+        hourly = hourly_by_model(selected, pricing_model)
+        compute_cost = hourly * HOURS_PER_MONTH * instance_count
+        selected_instance = _instance(selected, hourly, instance_count)
+    else:
+        instance_count = fleet.nodes
+        compute_cost = fleet.hourly * HOURS_PER_MONTH
+        entry, count, hourly = fleet.items[0]
+        selected_instance = _instance(entry, hourly, count)
 
     storage_cost = max(float(storage), 0.0) * storage_rate
 
@@ -116,28 +218,37 @@ def calculate_provider_cost(
 
     total = compute_cost + storage_cost + network_cost + backup_cost
 
-    return {
+    result = {
         "provider": provider,
+        "region": selected_region,
         "total": round(total, 2),
         "currency": "USD",
         "pricing_model": pricing_model,
         "instance_count": int(instance_count),
         "storage_type": selected_storage_type,
-        "selected_instance": {
-            "sku": selected.get("sku"),
-            "type": selected.get("sku"),
-            "vcpu": selected.get("vcpu"),
-            "memory_gb": selected.get("ram_gb"),
-            "category": selected.get("category"),
-            "description": selected.get("description"),
-            "price_per_hour": round(hourly, 5),
-            "price_per_month": round(per_instance_monthly, 2),
-            "count": int(instance_count),
-        },
+        "selected_instance": selected_instance,
         "breakdown": {
             "instance": round(compute_cost, 2),
             "storage": round(storage_cost, 2),
             "network": round(network_cost, 2),
             "backup": round(backup_cost, 2),
         },
-    }
\ No newline at end of file
+    }
+    if composed:
+        result["composition"] = _composition(fleet)
+    return result
+
+
+def _composition(fleet: Optional[Fleet]) -> Dict:
+    if fleet is None:
+        return {"mode": "optimal", "feasible": False}
+    return {
+        "mode": "optimal",
+        "feasible": True,
+        "optimal": fleet.optimal,
+        "nodes": fleet.nodes,
+        "vcpu": fleet.vcpu,
+        "memory_gb": fleet.ram_gb,
+        "price_per_hour": round(fleet.hourly, 5),
+        "items": [_instance(entry, hourly, count) for entry, count, hourly in fleet.items],
+    }
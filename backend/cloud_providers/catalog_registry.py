@@ -0,0 +1,126 @@
+"""Process-wide registry of parsed catalog files.
+
+Each JSON file under `backend/data/` is parsed once and kept in memory. Every
+lookup does a cheap `os.stat` and only re-parses the file when its mtime or size
+changed, so a price sync (`aws_price_sync --write-catalog`) is picked up by
+running workers without a restart.
+
+Provider catalogs with a current binary snapshot next to them (see
+`catalog_snapshot`) are memory-mapped from the snapshot instead of parsed.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from utils import metrics
+
+from .catalog_snapshot import load_catalog_file
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+Stamp = Tuple[int, int]
+
+
+def _stat_stamp(path: str) -> Stamp:
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+class _Entry:
+    __slots__ = ("stamp", "data", "derived")
+
+    def __init__(self, stamp: Stamp, data: Any):
+        self.stamp = stamp
+        self.data = data
+        self.derived: Dict[str, Any] = {}
+
+
+class CatalogRegistry:
+    """Caches parsed data files keyed by name, reloading on mtime/size change."""
+
+    def __init__(self, data_dir: str = DATA_DIR, loader: Callable[[str], Any] = load_catalog_file):
+        self.data_dir = data_dir
+        self._loader = loader
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def path(self, file_name: str) -> str:
+        return os.path.join(self.data_dir, file_name)
+
+    def _entry(self, file_name: str) -> _Entry:
+        path = self.path(file_name)
+        stamp = _stat_stamp(path)
+        entry = self._entries.get(file_name)
+        if entry is not None and entry.stamp == stamp:
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(file_name)
+            if entry is not None and entry.stamp == stamp:
+                return entry
+            started = time.perf_counter()
+            try:
+                data = self._loader(path)
+            except ValueError:
+                # A writer may still be replacing the file; keep serving the
+                # previous version and retry on the next lookup.
+                if entry is None:
+                    raise
+                logger.warning("Failed to parse %s; keeping previously loaded version", path)
+                return entry
+            # The stamp is taken before parsing, so a file replaced mid-read is
+            # simply loaded again on the next lookup.
+            entry = _Entry(stamp, data)
+            self._entries[file_name] = entry
+            self.loads += 1
+            elapsed = time.perf_counter() - started
+            metrics.CATALOG_LOADS.inc(file_name)
+            metrics.CATALOG_LOAD_SECONDS.observe(elapsed, file_name)
+            metrics.record_stage("catalog-load", elapsed, file_name)
+            return entry
+
+    def get(self, file_name: str) -> Any:
+        """Return the parsed contents of `file_name`. Callers must not mutate it."""
+        return self._entry(file_name).data
+
+    def version(self, file_name: str) -> Stamp:
+        """Return the (mtime_ns, size) stamp of the currently loaded version."""
+        return self._entry(file_name).stamp
+
+    def derive(self, file_name: str, key: str, builder: Callable[[Any], Any]) -> Any:
+        """Return `builder(data)` cached alongside the current version of `file_name`.
+
+        Derived values are dropped together with the parsed data on reload.
+        """
+        entry = self._entry(file_name)
+        try:
+            return entry.derived[key]
+        except KeyError:
+            pass
+        value = builder(entry.data)
+        entry.derived.setdefault(key, value)
+        return entry.derived[key]
+
+    def fingerprint(self) -> Tuple[Tuple[str, Stamp], ...]:
+        """Versions of every file loaded so far, for keying downstream caches."""
+        return tuple(sorted((name, self._entry(name).stamp) for name in list(self._entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_registry: Optional[CatalogRegistry] = None
+
+
+def get_registry() -> CatalogRegistry:
+    """Get or create the process-wide catalog registry."""
+    global _registry
+    if _registry is None:
+        _registry = CatalogRegistry()
+    return _registry
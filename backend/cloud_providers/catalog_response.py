@@ -0,0 +1,162 @@
+"""Prepared `/api/catalog` response bodies.
+
+The catalog only changes when a price sync rewrites a data file, so the JSON
+body is serialized and compressed once per catalog version instead of on
+every request. Each prepared body carries a strong ETag (a digest of the
+uncompressed JSON) and a Last-Modified time taken from the data files.
+
+Full payloads and `provider`/`fields`/`region` projections are cached
+separately, keyed on the registry stamps of the files they were built from, so
+a projection is built from the parsed catalog without building the full
+payload first. Projections are keyed on their canonical form (known field
+names only, sorted; the catalog files a region resolves to), so spelling a
+request differently does not build another body, and they are compressed at
+cheaper levels than the full catalog.
+"""
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import brotli
+except Exception:  # pragma: no cover - brotli is optional; gzip is always available
+    brotli = None
+
+from .catalog_pricing import load_catalog, load_storage_rates
+from .catalog_registry import get_registry
+from .regions import catalog_file, pick_region
+
+CATALOG_PROVIDERS = ("aws", "azure", "gcp")
+STORAGE_RATES_FILE = "storage_rates.json"
+
+# Distinct provider/fields combinations kept in memory at once.
+MAX_PREPARED_BODIES = 64
+
+ENCODING_IDENTITY = "identity"
+ENCODING_GZIP = "gzip"
+ENCODING_BROTLI = "br"
+
+# (gzip level, brotli quality): the full catalog is compressed once per
+# version and served to most clients; projections get cheaper settings.
+FULL_LEVELS = (9, 11)
+PROJECTION_LEVELS = (6, 5)
+
+
+class PreparedBody:
+    """One serialized catalog payload with its compressed variants and validators."""
+
+    __slots__ = ("raw", "encoded", "digest", "last_modified")
+
+    def __init__(self, payload: Dict, last_modified: float, levels: Tuple[int, int] = FULL_LEVELS):
+        gzip_level, brotli_quality = levels
+        self.raw = json.dumps(payload, separators=(",", ":")).encode()
+        self.digest = hashlib.sha256(self.raw).hexdigest()[:32]
+        self.last_modified = last_modified
+        # mtime=0 keeps the gzip bytes identical across workers and restarts.
+        self.encoded = {
+            ENCODING_IDENTITY: self.raw,
+            ENCODING_GZIP: gzip.compress(self.raw, compresslevel=gzip_level, mtime=0),
+        }
+        if brotli is not None:
+            self.encoded[ENCODING_BROTLI] = brotli.compress(self.raw, quality=brotli_quality)
+
+    def etag(self, encoding: str = ENCODING_IDENTITY) -> str:
+        """Strong entity tag for one representation (unquoted)."""
+        return self.digest if encoding == ENCODING_IDENTITY else f"{self.digest}-{encoding}"
+
+    def negotiate(self, accept_encoding: Iterable[Tuple[str, float]]) -> str:
+        """Pick the smallest representation allowed by parsed Accept-Encoding pairs."""
+        accepted = {name.lower(): quality for name, quality in accept_encoding}
+        for encoding in (ENCODING_BROTLI, ENCODING_GZIP):
+            if encoding in self.encoded and accepted.get(encoding, accepted.get("*", 0)) > 0:
+                return encoding
+        return ENCODING_IDENTITY
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Parse a comma separated `fields` parameter into a sorted, de-duplicated tuple."""
+    if not fields:
+        return None
+    names = tuple(sorted({name.strip() for name in fields.split(",") if name.strip()}))
+    return names or None
+
+
+def _project(catalog: Sequence[Dict], fields: Optional[Tuple[str, ...]]) -> List[Dict]:
+    if fields is None:
+        return list(catalog)
+    return [{name: entry[name] for name in fields if name in entry} for entry in catalog]
+
+
+def _providers(provider: Optional[str]) -> Tuple[str, ...]:
+    return CATALOG_PROVIDERS if provider is None else (provider,)
+
+
+def _files(provider: Optional[str], region: Optional[str]) -> Tuple[str, ...]:
+    files = tuple(catalog_file(name, pick_region(name, region)) for name in _providers(provider))
+    return files if provider is not None else files + (STORAGE_RATES_FILE,)
+
+
+def _build(provider: Optional[str], fields: Optional[Tuple[str, ...]], region: Optional[str],
+           last_modified: float) -> PreparedBody:
+    payload = {name: _project(load_catalog(name, pick_region(name, region)), fields) for name in _providers(provider)}
+    if provider is None:
+        payload["storage_rates"] = load_storage_rates()
+    return PreparedBody(payload, last_modified, FULL_LEVELS if fields is None else PROJECTION_LEVELS)
+
+
+def _entry_fields(catalog: Sequence[Dict]) -> frozenset:
+    return frozenset(name for entry in catalog for name in entry)
+
+
+def _known_fields(provider: Optional[str], fields: Tuple[str, ...], region: Optional[str]) -> Tuple[str, ...]:
+    """`fields` without the names no catalog entry has (they project to nothing)."""
+    registry = get_registry()
+    known = frozenset().union(*(
+        registry.derive(catalog_file(name, pick_region(name, region)), "fields", _entry_fields)
+        for name in _providers(provider)
+    ))
+    return tuple(name for name in fields if name in known)
+
+
+_prepared: "OrderedDict[Tuple, Tuple[Tuple, PreparedBody]]" = OrderedDict()
+_prepared_lock = threading.Lock()
+
+
+def prepared_catalog(provider: Optional[str] = None, fields: Optional[Tuple[str, ...]] = None,
+                     region: Optional[str] = None) -> PreparedBody:
+    """Return the prepared body for the whole catalog or a provider/fields projection.
+
+    `region` selects each provider's regional catalog where one exists (see
+    `regions.pick_region`). Raises KeyError for an unknown provider.
+    """
+    if provider is not None and provider not in CATALOG_PROVIDERS:
+        raise KeyError(provider)
+    registry = get_registry()
+    files = _files(provider, region)
+    versions = tuple(registry.version(name) for name in files)
+    if fields is not None:
+        fields = _known_fields(provider, fields, region)
+    key = (provider, fields, files)
+
+    with _prepared_lock:
+        cached = _prepared.get(key)
+        if cached is not None and cached[0] == versions:
+            _prepared.move_to_end(key)
+            return cached[1]
+
+    last_modified = max(mtime_ns for mtime_ns, _ in versions) / 1e9
+    body = _build(provider, fields, region, last_modified)
+    with _prepared_lock:
+        _prepared[key] = (versions, body)
+        _prepared.move_to_end(key)
+        while len(_prepared) > MAX_PREPARED_BODIES:
+            _prepared.popitem(last=False)
+    return body
+
+
+def clear_prepared() -> None:
+    with _prepared_lock:
+        _prepared.clear()
@@ -0,0 +1,363 @@
+"""Compact columnar snapshots of provider catalogs.
+
+A snapshot stores a catalog (a list of flat-ish JSON objects) as a struct of
+arrays: one fixed-width NumPy column per field, with strings interned into a
+single table and referenced by id. Workers open snapshots with `mmap`
+read-only, so every process on a host shares the same pages through the page
+cache instead of holding its own parsed copy of the JSON.
+
+Layout (little endian):
+
+    8 bytes   magic b"ICQSNAP1"
+    4 bytes   header length H (uint32)
+    H bytes   JSON header: rows, source stamp, string table, column directory
+    ...       column blobs, each 8-byte aligned
+
+Nested objects one level deep (`price_per_hour: {"on_demand": ...}`) are
+flattened to dotted column names. Snapshots are written next to the JSON
+catalog (`aws_catalog.json` -> `aws_catalog.snap`) and record the JSON file's
+mtime/size, so a hand-edited JSON file is never shadowed by a stale snapshot.
+
+    python -m cloud_providers.catalog_snapshot            # snapshot every catalog in data/ and data/regions/
+
+Catalogs without a current snapshot are parsed from JSON by every worker. With
+`SHARED_SNAPSHOT_DIR` set (ideally on tmpfs, e.g. `/dev/shm/infracostiq`), the
+first worker to parse one writes its snapshot there under the JSON file's
+version stamp, and every sibling maps that shared copy instead of parsing.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from collections.abc import Sequence
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+MAGIC = b"ICQSNAP1"
+SUFFIX = ".snap"
+
+STR_MISSING = np.uint32(0xFFFFFFFF)
+INT_MISSING = np.iinfo(np.int64).min
+
+_DTYPES = {"str": np.dtype("<u4"), "int": np.dtype("<i8"), "float": np.dtype("<f8"), "flags": np.dtype("u1")}
+
+_FLAG_MISSING, _FLAG_INT, _FLAG_FLOAT = 0, 1, 2
+
+_MISSING = object()
+
+
+class SnapshotError(ValueError):
+    """Raised when a catalog cannot be represented as, or read from, a snapshot."""
+
+
+def snapshot_path(json_path: str) -> str:
+    return os.path.splitext(json_path)[0] + SUFFIX
+
+
+def _source_stamp(path: str) -> Dict[str, int]:
+    st = os.stat(path)
+    return {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+
+def _flatten(entry: Dict) -> Dict[str, Any]:
+    flat = {}
+    for key, value in entry.items():
+        if isinstance(value, dict):
+            for sub_key, sub_value in value.items():
+                flat[f"{key}.{sub_key}"] = sub_value
+        else:
+            flat[key] = value
+    return flat
+
+
+def _column_kind(name: str, values: List[Any]) -> str:
+    present = [v for v in values if v is not _MISSING]
+    if any(isinstance(v, bool) or not isinstance(v, (str, int, float)) for v in present):
+        raise SnapshotError(f"column {name!r} holds values that cannot be snapshotted")
+    if all(isinstance(v, str) for v in present):
+        return "str"
+    if any(isinstance(v, str) for v in present):
+        raise SnapshotError(f"column {name!r} mixes strings and numbers")
+    if all(isinstance(v, int) for v in present):
+        return "int"
+    if all(isinstance(v, float) for v in present):
+        return "float"
+    return "num"
+
+
+def _encode(catalog: List[Dict]) -> Tuple[Dict, List[Tuple[str, np.ndarray]]]:
+    if not isinstance(catalog, list) or not all(isinstance(e, dict) for e in catalog):
+        raise SnapshotError("catalog must be a list of objects")
+    rows = [_flatten(entry) for entry in catalog]
+    names: List[str] = []
+    for row in rows:
+        for name in row:
+            if name not in names:
+                names.append(name)
+
+    strings: List[str] = []
+    string_ids: Dict[str, int] = {}
+    columns = []
+    blobs: List[Tuple[str, np.ndarray]] = []
+    for name in names:
+        values = [row.get(name, _MISSING) for row in rows]
+        kind = _column_kind(name, values)
+        if kind == "str":
+            ids = []
+            for v in values:
+                if v is _MISSING:
+                    ids.append(STR_MISSING)
+                else:
+                    if v not in string_ids:
+                        string_ids[v] = len(strings)
+                        strings.append(v)
+                    ids.append(string_ids[v])
+            blobs.append((name, np.asarray(ids, dtype=_DTYPES["str"])))
+        elif kind == "int":
+            blobs.append((name, np.asarray([INT_MISSING if v is _MISSING else v for v in values], dtype=_DTYPES["int"])))
+        elif kind == "float":
+            blobs.append((name, np.asarray([np.nan if v is _MISSING else v for v in values], dtype=_DTYPES["float"])))
+        else:
+            blobs.append((name, np.asarray([np.nan if v is _MISSING else float(v) for v in values], dtype=_DTYPES["float"])))
+            flags = [_FLAG_MISSING if v is _MISSING else (_FLAG_INT if isinstance(v, int) else _FLAG_FLOAT) for v in values]
+            blobs.append((f"{name}#flags", np.asarray(flags, dtype=_DTYPES["flags"])))
+        columns.append({"name": name, "kind": kind})
+
+    header = {"rows": len(rows), "strings": strings, "columns": columns}
+    return header, blobs
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def write_snapshot(catalog: List[Dict], path: str, source_path: Optional[str] = None) -> str:
+    """Write `catalog` as a snapshot at `path` (atomically) and return the path.
+
+    `source_path` is the JSON file the snapshot mirrors; its current mtime/size
+    are recorded so readers can tell whether the snapshot is still current.
+    """
+    header, blobs = _encode(catalog)
+    header["source"] = _source_stamp(source_path) if source_path else None
+
+    # Column offsets depend on the header length, which depends on the offsets;
+    # lay out relative offsets first, then shift by the final header size.
+    relative = []
+    cursor = 0
+    for _, array in blobs:
+        relative.append(cursor)
+        cursor = _align(cursor + array.nbytes)
+    header["blobs"] = [{"name": name, "offset": offset, "length": len(array)} for (name, array), offset in zip(blobs, relative)]
+    encoded = json.dumps(header, separators=(",", ":")).encode()
+    # Leave room for the offsets to grow by a few digits each once shifted.
+    base = _align(len(MAGIC) + 4 + len(encoded) + 16 * len(blobs) + 64)
+    for blob in header["blobs"]:
+        blob["offset"] += base
+    encoded = json.dumps(header, separators=(",", ":")).encode()
+    if len(MAGIC) + 4 + len(encoded) > base:
+        raise SnapshotError("snapshot header grew past its reserved size")
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".snapshot-", suffix=SUFFIX, dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(encoded)))
+            f.write(encoded)
+            for (_, array), blob in zip(blobs, header["blobs"]):
+                f.write(b"\0" * (blob["offset"] - f.tell()))
+                f.write(array.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return path
+
+
+class CatalogSnapshot(Sequence):
+    """Read-only, memory-mapped view of a snapshot that behaves like a list of entries.
+
+    Indexing materializes a fresh dict for that row; column arrays are
+    available through `column()` for code that works on whole columns.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = self._mmap
+        if buf[: len(MAGIC)] != MAGIC:
+            raise SnapshotError(f"{path} is not a catalog snapshot")
+        (header_len,) = struct.unpack_from("<I", buf, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(bytes(buf[start: start + header_len]))
+
+        self.rows: int = header["rows"]
+        self.source: Optional[Dict[str, int]] = header.get("source")
+        self.strings: List[str] = header["strings"]
+        self._columns = [(c["name"], c["kind"]) for c in header["columns"]]
+        self._arrays: Dict[str, np.ndarray] = {}
+        kinds = dict(self._columns)
+        for blob in header["blobs"]:
+            name = blob["name"]
+            if name.endswith("#flags"):
+                dtype = _DTYPES["flags"]
+            else:
+                kind = kinds[name]
+                dtype = _DTYPES["float"] if kind == "num" else _DTYPES[kind]
+            self._arrays[name] = np.frombuffer(buf, dtype=dtype, count=blob["length"], offset=blob["offset"])
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def _value(self, name: str, kind: str, i: int) -> Any:
+        raw = self._arrays[name][i]
+        if kind == "str":
+            return _MISSING if raw == STR_MISSING else self.strings[raw]
+        if kind == "int":
+            return _MISSING if raw == INT_MISSING else int(raw)
+        if kind == "float":
+            return _MISSING if np.isnan(raw) else float(raw)
+        flag = self._arrays[f"{name}#flags"][i]
+        if flag == _FLAG_MISSING:
+            return _MISSING
+        return int(raw) if flag == _FLAG_INT else float(raw)
+
+    def _row(self, i: int) -> Dict:
+        entry: Dict[str, Any] = {}
+        for name, kind in self._columns:
+            value = self._value(name, kind, i)
+            if value is _MISSING:
+                continue
+            key, _, sub_key = name.partition(".")
+            if sub_key:
+                entry.setdefault(key, {})[sub_key] = value
+            else:
+                entry[key] = value
+        return entry
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._row(k) for k in range(*i.indices(self.rows))]
+        if i < 0:
+            i += self.rows
+        if not 0 <= i < self.rows:
+            raise IndexError("snapshot row out of range")
+        return self._row(i)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(self.rows):
+            yield self._row(i)
+
+    def column(self, name: str) -> np.ndarray:
+        """Raw column array (string ids for string columns; NaN/sentinel for missing)."""
+        return self._arrays[name]
+
+    def to_list(self) -> List[Dict]:
+        return list(self)
+
+
+def is_current(snapshot: CatalogSnapshot, json_path: str) -> bool:
+    try:
+        return snapshot.source == _source_stamp(json_path)
+    except OSError:
+        return False
+
+
+def _open_current(snap: str, json_path: str) -> Optional[CatalogSnapshot]:
+    try:
+        snapshot = CatalogSnapshot(snap)
+    except (OSError, ValueError):
+        return None
+    return snapshot if is_current(snapshot, json_path) else None
+
+
+def shared_snapshot_path(json_path: str, directory: str) -> str:
+    """Snapshot of the current version of `json_path` in the shared `directory`."""
+    stamp = _source_stamp(json_path)
+    return os.path.join(directory, f"{_shared_prefix(json_path)}{stamp['mtime_ns']}-{stamp['size']}{SUFFIX}")
+
+
+def _shared_prefix(json_path: str) -> str:
+    digest = hashlib.sha1(os.path.abspath(json_path).encode()).hexdigest()[:12]
+    return f"{os.path.splitext(os.path.basename(json_path))[0]}-{digest}-"
+
+
+def _load_shared(path: str, directory: str) -> Any:
+    shared = shared_snapshot_path(path, directory)
+    snapshot = _open_current(shared, path)
+    if snapshot is not None:
+        return snapshot
+    with open(path, "r") as f:
+        catalog = json.load(f)
+    if not isinstance(catalog, list) or not all(isinstance(entry, dict) for entry in catalog):
+        return catalog
+    try:
+        os.makedirs(directory, exist_ok=True)
+        write_snapshot(catalog, shared, source_path=path)
+        snapshot = CatalogSnapshot(shared)
+    except (OSError, ValueError):
+        return catalog
+    # The name carries the stamp taken before parsing; if the JSON file was
+    # replaced meanwhile, the snapshot may mix versions and must not be shared.
+    if shared != shared_snapshot_path(path, directory) or not is_current(snapshot, path):
+        _unlink(shared)
+        return catalog
+    prefix = _shared_prefix(path)
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name.endswith(SUFFIX) and name != os.path.basename(shared):
+            _unlink(os.path.join(directory, name))
+    return snapshot
+
+
+def _unlink(path: str) -> None:
+    # Workers still mapping an old version keep their pages until they reload.
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def load_catalog_file(path: str) -> Any:
+    """Registry loader: prefer a current snapshot next to a JSON catalog, else a shared one, else parse the JSON."""
+    snapshot = _open_current(snapshot_path(path), path) if os.path.exists(snapshot_path(path)) else None
+    if snapshot is not None:
+        return snapshot
+    shared_dir = os.environ.get("SHARED_SNAPSHOT_DIR")
+    if shared_dir:
+        return _load_shared(path, shared_dir)
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def write_catalog_snapshot(json_path: str, catalog: Optional[List[Dict]] = None) -> str:
+    """Snapshot the catalog at `json_path` (or the given parsed `catalog`) next to it."""
+    if catalog is None:
+        with open(json_path, "r") as f:
+            catalog = json.load(f)
+    return write_snapshot(catalog, snapshot_path(json_path), source_path=json_path)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    data_dir = argv[0] if argv else os.path.join(os.path.dirname(__file__), "..", "data")
+    for name in sorted(os.listdir(data_dir)):
+        if name.endswith("_catalog.json"):
+            print(write_catalog_snapshot(os.path.join(data_dir, name)))
+    # Region catalogs: data/regions/<provider>/<region>.json
+    for root, _, files in sorted(os.walk(os.path.join(data_dir, "regions"))):
+        for name in sorted(files):
+            if name.endswith(".json") and not name.startswith("."):
+                print(write_catalog_snapshot(os.path.join(root, name)))
+
+
+if __name__ == "__main__":
+    main()
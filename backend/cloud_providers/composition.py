@@ -0,0 +1,415 @@
+"""Cheapest mix of SKUs covering an aggregate CPU and RAM requirement.
+
+`smart_match` prices a workload as `instance_count` copies of one SKU and falls
+back to the whole catalog when no SKU is big enough. `solve` instead finds the
+cheapest multiset of SKUs whose summed vcpu and ram_gb cover the requirement,
+optionally limited to nodes within `NodeConstraints` and to `max_nodes` nodes.
+
+The search is a depth-first branch and bound over per-SKU counts:
+
+- Options are Pareto-reduced first: a SKU with no more vcpu and no more RAM than
+  another that costs no less is never needed.
+- The bound at each node is the LP relaxation of the remaining cover problem.
+  Its dual feasible region does not depend on the requirement, so the region's
+  vertices are computed once per option set (`FleetOptions`) and the bound is a
+  max over them, tightened by per-suffix cost-per-vCPU and cost-per-GB floors.
+- SKUs outside the LP optimum are branched on first. The bound is convex in
+  the number of copies of a SKU, so each level bisects for the count with the
+  lowest bound and walks outwards only while the bound beats the best fleet
+  found so far; the first dive therefore rounds the LP solution.
+
+A search that takes more than `max_steps` nodes stops with the best fleet found
+so far, flagged `optimal=False`.
+
+Small requirements, where the LP bound is loosest relative to the answer, are
+solved exactly by dynamic programming instead (`grid_solve`): vcpu and ram_gb
+are multiples of a common unit in every catalog, so "cheapest cover of (c, r)
+units" fits a table of at most `GRID_MAX_CELLS` cells, filled one vCPU row at a
+time with NumPy.
+"""
+import math
+import os
+from functools import reduce
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EPS = 1e-9
+MAX_STEPS = int(os.environ.get("FLEET_SOLVER_MAX_STEPS", "10000"))
+GRID_MAX_CELLS = int(os.environ.get("FLEET_SOLVER_GRID_CELLS", "250000"))
+
+INF = float("inf")
+
+
+class NodeConstraints:
+    """Bounds each node of a composed fleet must satisfy; None means unbounded."""
+
+    __slots__ = ("min_vcpu", "max_vcpu", "min_ram_gb", "max_ram_gb", "categories")
+
+    def __init__(self, min_vcpu: float = 0, max_vcpu: Optional[float] = None, min_ram_gb: float = 0,
+                 max_ram_gb: Optional[float] = None, categories: Optional[Iterable[str]] = None):
+        self.min_vcpu = float(min_vcpu or 0)
+        self.max_vcpu = None if max_vcpu is None else float(max_vcpu)
+        self.min_ram_gb = float(min_ram_gb or 0)
+        self.max_ram_gb = None if max_ram_gb is None else float(max_ram_gb)
+        self.categories = frozenset(categories) if categories else None
+
+    def allows(self, entry: Dict) -> bool:
+        vcpu = float(entry.get("vcpu", 0))
+        ram = float(entry.get("ram_gb", 0))
+        return (
+            vcpu >= self.min_vcpu
+            and ram >= self.min_ram_gb
+            and (self.max_vcpu is None or vcpu <= self.max_vcpu)
+            and (self.max_ram_gb is None or ram <= self.max_ram_gb)
+            and (self.categories is None or entry.get("category") in self.categories)
+        )
+
+
+def pareto_reduce(rows: Sequence[Tuple[float, float, float, Dict]]) -> List[Tuple[float, float, float, Dict]]:
+    """Drop `(vcpu, ram, price, entry)` rows dominated by a row with at least as much of both for no more."""
+    kept: List[Tuple[float, float, float, Dict]] = []
+    # Cheapest first (bigger first on ties), so a row can only be dominated by one already kept.
+    for row in sorted(rows, key=lambda row: (row[2], -row[0], -row[1])):
+        if not any(k[0] >= row[0] and k[1] >= row[1] for k in kept):
+            kept.append(row)
+    return kept
+
+
+# Side of the box that stands in for the unbounded dual region before clipping.
+# Vertices on it only matter when a resource is needed that no option provides,
+# which `_Search.bound` rules out first.
+_BOX = 1e6
+
+Polygon = List[Tuple[float, float]]
+
+
+def clip(polygon: Polygon, vcpu: float, ram: float, price: float) -> Polygon:
+    """Convex `polygon` intersected with the half-plane `vcpu * y1 + ram * y2 <= price`."""
+    out: Polygon = []
+    for i, (x1, x2) in enumerate(polygon):
+        y1, y2 = polygon[i - 1]
+        a = vcpu * y1 + ram * y2 - price
+        b = vcpu * x1 + ram * x2 - price
+        if (a <= 0) != (b <= 0):
+            t = a / (a - b)
+            out.append((y1 + t * (x1 - y1), y2 + t * (x2 - y2)))
+        if b <= 0:
+            out.append((x1, x2))
+    return out
+
+
+def dual_polygons(vcpu: Sequence[float], ram: Sequence[float], price: Sequence[float]) -> List[Polygon]:
+    """Vertices of `{y >= 0 : vcpu_i * y1 + ram_i * y2 <= price_i for i >= k}` for every suffix k.
+
+    The LP lower bound on covering `(cpu, ram)` with options k.. is
+    `max(cpu * y1 + ram * y2)` over the vertices of polygon k. Each polygon is
+    the next one clipped by one more constraint, so all of them cost O(n * V).
+    """
+    polygon: Polygon = [(0.0, 0.0), (_BOX, 0.0), (_BOX, _BOX), (0.0, _BOX)]
+    polygons = [polygon]
+    for k in range(len(price) - 1, -1, -1):
+        polygon = clip(polygon, vcpu[k], ram[k], price[k])
+        polygons.append(polygon)
+    polygons.reverse()
+    return polygons
+
+
+def lp_bound(polygon: Polygon, cpu: float, ram: float) -> float:
+    return max(cpu * y1 + ram * y2 for y1, y2 in polygon)
+
+
+class FleetOptions:
+    """Pareto-reduced SKUs of one catalog, priced with `price`, plus their LP dual vertices."""
+
+    def __init__(self, entries: Iterable[Dict], price: Callable[[Dict], float],
+                 constraints: Optional[NodeConstraints] = None):
+        rows = []
+        for entry in entries:
+            if constraints is not None and not constraints.allows(entry):
+                continue
+            vcpu, ram, hourly = float(entry.get("vcpu", 0)), float(entry.get("ram_gb", 0)), float(price(entry))
+            # Free or empty SKUs would make any requirement free or add nothing.
+            if hourly > 0 and (vcpu > 0 or ram > 0):
+                rows.append((vcpu, ram, hourly, entry))
+        rows = pareto_reduce(rows)
+        self.vcpu = [row[0] for row in rows]
+        self.ram = [row[1] for row in rows]
+        self.price = [row[2] for row in rows]
+        self.entries = [row[3] for row in rows]
+        self.vertices = dual_polygons(self.vcpu, self.ram, self.price)[0]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class Fleet:
+    """A priced SKU mix: `items` are `(entry, count, hourly_price)` in descending cost share."""
+
+    __slots__ = ("items", "hourly", "nodes", "vcpu", "ram_gb", "optimal", "steps")
+
+    def __init__(self, items: List[Tuple[Dict, int, float]], optimal: bool, steps: int):
+        self.items = sorted(items, key=lambda item: -item[1] * item[2])
+        self.hourly = math.fsum(count * hourly for _, count, hourly in items)
+        self.nodes = sum(count for _, count, _ in items)
+        self.vcpu = math.fsum(float(entry.get("vcpu", 0)) * count for entry, count, _ in items)
+        self.ram_gb = math.fsum(float(entry.get("ram_gb", 0)) * count for entry, count, _ in items)
+        self.optimal = optimal
+        self.steps = steps
+
+
+def _unit(values: Iterable[float]) -> Optional[float]:
+    """Largest unit (a multiple of 0.001) that every positive value is a whole multiple of."""
+    scaled = []
+    for value in values:
+        if value > 0:
+            milli = round(value * 1000)
+            if abs(value * 1000 - milli) > 1e-6:
+                return None
+            scaled.append(milli)
+    return reduce(math.gcd, scaled) / 1000 if scaled else None
+
+
+def grid_solve(options: FleetOptions, cpu: float, ram: float,
+               max_cells: int = GRID_MAX_CELLS) -> Optional[List[int]]:
+    """Exact per-option counts of the cheapest cover of `(cpu, ram)` by dynamic programming.
+
+    `cost[c, r]` is the cheapest fleet with at least `c` vCPU units and `r` RAM
+    units; each row depends on lower rows (every option has vCPUs) and is filled
+    with one NumPy pass per option, except row 0, which depends on itself. Returns
+    None when the table would exceed `max_cells` or the catalog has no common
+    units.
+    """
+    cpu_unit, ram_unit = _unit(options.vcpu), _unit(options.ram)
+    if cpu_unit is None or ram_unit is None or min(options.vcpu) <= 0:
+        return None
+    rows, cols = _copies(cpu, cpu_unit) + 1, _copies(ram, ram_unit) + 1
+    if rows * cols > max_cells:
+        return None
+    vcpu = [round(v / cpu_unit) for v in options.vcpu]
+    mem = [round(r / ram_unit) for r in options.ram]
+
+    cost = np.full((rows, cols), INF)
+    choice = np.full((rows, cols), -1, dtype=np.int32)
+    cost[0, 0] = 0.0
+
+    positions = np.arange(cols)
+    shifted = [np.maximum(positions - m, 0) for m in mem]
+
+    # Row 0 (vCPUs already covered) is a one-dimensional cover problem: only
+    # options with more RAM than every cheaper one matter, and a plain loop
+    # beats NumPy on blocks as narrow as the smallest node.
+    by_ram = []
+    for i in sorted(range(len(options)), key=lambda i: (options.price[i], -mem[i])):
+        if mem[i] > 0 and all(mem[i] > mem[j] for j in by_ram):
+            by_ram.append(i)
+    if cols * len(by_ram) > max_cells:
+        return None
+    row, picked = cost[0].tolist(), choice[0].tolist()
+    for r in range(1, cols):
+        best = INF
+        for i in by_ram:
+            value = row[max(r - mem[i], 0)] + options.price[i]
+            if value < best:
+                best, picked[r] = value, i
+        row[r] = best
+    cost[0], choice[0] = row, picked
+    for c in range(1, rows):
+        target, picked = cost[c], choice[c]
+        for i in range(len(options)):
+            candidate = cost[max(c - vcpu[i], 0)][shifted[i]]
+            candidate += options.price[i]
+            better = candidate < target
+            target[better] = candidate[better]
+            picked[better] = i
+
+    if not math.isfinite(cost[rows - 1, cols - 1]):
+        return None
+    counts = [0] * len(options)
+    c, r = rows - 1, cols - 1
+    while c or r:
+        i = int(choice[c, r])
+        counts[i] += 1
+        c, r = max(c - vcpu[i], 0), max(r - mem[i], 0)
+    return counts
+
+
+def _copies(need: float, size: float) -> int:
+    if need <= EPS:
+        return 0
+    if size <= 0:
+        return -1
+    return max(1, math.ceil(need / size - EPS))
+
+
+class _Search:
+    def __init__(self, options: FleetOptions, order: List[int], max_steps: int):
+        self.order = order
+        self.vcpu = [options.vcpu[i] for i in order]
+        self.ram = [options.ram[i] for i in order]
+        self.price = [options.price[i] for i in order]
+        self.polygons = dual_polygons(self.vcpu, self.ram, self.price)
+        self.max_steps = max_steps
+        self.steps = 0
+        self.truncated = False
+        self.best_cost = INF
+        self.best: Optional[List[int]] = None
+        self.counts = [0] * len(order)
+        # (k, cpu, ram) -> (cost, nodes_left) it was first searched with. Reaching
+        # it again at no lower cost and with no more nodes to spare cannot do better.
+        self.seen: Dict[Tuple[int, float, float], Tuple[float, float]] = {}
+
+        # Largest node among order[k:], for the node-count bound.
+        n = len(order)
+        self.max_vcpu = [0.0] * (n + 1)
+        self.max_ram = [0.0] * (n + 1)
+        for k in range(n - 1, -1, -1):
+            self.max_vcpu[k] = max(self.max_vcpu[k + 1], self.vcpu[k])
+            self.max_ram[k] = max(self.max_ram[k + 1], self.ram[k])
+
+    def bound(self, k: int, cpu: float, ram: float) -> float:
+        """Lower bound on the cost of covering `(cpu, ram)` with order[k:], or INF if they cannot."""
+        cpu = cpu if cpu > EPS else 0.0
+        ram = ram if ram > EPS else 0.0
+        if (cpu and not self.max_vcpu[k]) or (ram and not self.max_ram[k]):
+            return INF
+        return lp_bound(self.polygons[k], cpu, ram)
+
+    def fits(self, k: int, cpu: float, ram: float, nodes_left: float) -> bool:
+        """Whether `nodes_left` of the largest nodes in order[k:] could still cover `(cpu, ram)`."""
+        cpu_nodes, ram_nodes = _copies(cpu, self.max_vcpu[k]), _copies(ram, self.max_ram[k])
+        return 0 <= cpu_nodes <= nodes_left and 0 <= ram_nodes <= nodes_left
+
+    def run(self, k: int, cpu: float, ram: float, nodes_left: float, cost: float) -> None:
+        self.steps += 1
+        if self.steps > self.max_steps:
+            self.truncated = True
+            return
+        if cpu <= EPS and ram <= EPS:
+            if cost < self.best_cost - EPS:
+                self.best_cost = cost
+                self.best = list(self.counts)
+            return
+        if k == len(self.order) or not self.fits(k, cpu, ram, nodes_left):
+            return
+        state = (k, round(cpu, 6), round(ram, 6))
+        seen = self.seen.get(state)
+        if seen is not None and seen[0] <= cost + EPS and seen[1] >= nodes_left:
+            return
+        self.seen[state] = (cost, nodes_left)
+
+        v, r, p = self.vcpu[k], self.ram[k], self.price[k]
+        # Enough copies of this SKU alone to cover whatever it can cover.
+        full = int(min(max(_copies(cpu, v) if v > 0 else 0, _copies(ram, r) if r > 0 else 0), nodes_left))
+        if k == len(self.order) - 1:
+            # The last SKU has to cover everything left; fewer copies cannot lead anywhere.
+            counts: Iterable[int] = (full,)
+        else:
+            counts = self._promising(lambda count: cost + count * p + self.bound(
+                k + 1, max(cpu - count * v, 0.0), max(ram - count * r, 0.0)), full)
+        for count in counts:
+            self.counts[k] = count
+            self.run(k + 1, max(cpu - count * v, 0.0), max(ram - count * r, 0.0), nodes_left - count, cost + count * p)
+            if self.truncated:
+                break
+        self.counts[k] = 0
+
+    def _promising(self, bound: Callable[[int], float], full: int) -> Iterator[int]:
+        """Counts in `[0, full]` whose `bound` is below the incumbent, best bound first.
+
+        `bound` is convex in the count (an LP value of a right-hand side that is
+        piecewise linear in it, plus a linear cost) and infinite only below some
+        count, so its minimum is found by bisection and the promising counts
+        form an interval around it, walked outwards.
+        """
+        values: Dict[int, float] = {}
+
+        def f(count: int) -> float:
+            value = values.get(count)
+            if value is None:
+                self.steps += 1
+                value = values[count] = bound(count)
+            return value
+
+        low, high = 0, full
+        if f(high) == INF:
+            return
+        while low < high:
+            mid = (low + high) // 2
+            if f(mid) == INF:
+                low = mid + 1
+            else:
+                high = mid
+        first = low
+        # Usually the bound grows from the first feasible count on (a SKU the
+        # LP does not use), which needs no bisection.
+        if first < full and f(first + 1) < f(first) - EPS:
+            low, high = first + 1, full
+            while low < high:
+                mid = (low + high) // 2
+                if f(mid + 1) < f(mid) - EPS:
+                    low = mid + 1
+                else:
+                    high = mid
+        left, right = low - 1, low + 1
+        left_bound = f(left) if left >= first else INF
+        right_bound = f(right) if right <= full else INF
+        if f(low) < self.best_cost - EPS:
+            yield low
+        while True:
+            if self.steps > self.max_steps:
+                self.truncated = True
+                return
+            if left_bound <= right_bound:
+                if left_bound >= self.best_cost - EPS:
+                    return
+                yield left
+                left -= 1
+                left_bound = f(left) if left >= first else INF
+            else:
+                if right_bound >= self.best_cost - EPS:
+                    return
+                yield right
+                right += 1
+                right_bound = f(right) if right <= full else INF
+
+
+def solve(options: FleetOptions, cpu: float, ram: float, max_nodes: Optional[int] = None,
+          max_steps: int = MAX_STEPS, grid_cells: int = GRID_MAX_CELLS) -> Optional[Fleet]:
+    """Cheapest fleet from `options` with at least `cpu` vCPUs and `ram` GB in at most `max_nodes` nodes.
+
+    Returns None when no fleet satisfies the requirement.
+    """
+    cpu, ram = max(float(cpu), 0.0), max(float(ram), 0.0)
+    if not len(options):
+        return None
+    nodes_left = INF if max_nodes is None else int(max_nodes)
+
+    # SKUs the LP optimum is built from (zero reduced cost) go last, the rest
+    # in decreasing reduced cost: each copy of those costs at least its reduced
+    # cost over the bound, so only a few counts of them survive pruning and the
+    # remainder is left to the LP's own SKUs.
+    y1, y2 = max(options.vertices, key=lambda y: cpu * y[0] + ram * y[1])
+    order = sorted(
+        range(len(options)),
+        key=lambda i: (-(options.price[i] - options.vcpu[i] * y1 - options.ram[i] * y2), options.price[i]),
+    )
+    if cpu <= EPS and ram <= EPS:
+        # A workload with no requirement still runs on one node.
+        cheapest = min(range(len(options)), key=options.price.__getitem__)
+        return Fleet([(options.entries[cheapest], 1, options.price[cheapest])], optimal=True, steps=0)
+
+    counts = grid_solve(options, cpu, ram, grid_cells)
+    if counts is not None and sum(counts) <= nodes_left:
+        items = [(options.entries[i], count, options.price[i]) for i, count in enumerate(counts) if count]
+        return Fleet(items, optimal=True, steps=0)
+
+    search = _Search(options, order, max_steps)
+    search.run(0, cpu, ram, nodes_left, 0.0)
+    if search.best is None:
+        return None
+    items = [
+        (options.entries[i], count, options.price[i])
+        for i, count in zip(order, search.best) if count
+    ]
+    return Fleet(items, optimal=not search.truncated, steps=search.steps)
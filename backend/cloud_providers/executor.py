@@ -0,0 +1,148 @@
+"""Concurrent provider execution for a single workload.
+
+Providers run on a bounded, process-wide thread pool, so a slow or failing
+provider does not hold back the others. Each provider gets
+`PROVIDER_TIMEOUT_SECONDS` from the moment it starts running; time spent
+queued behind a busy pool does not count against it. A provider that has not
+started within `PROVIDER_QUEUE_TIMEOUT_SECONDS` of submission is cancelled.
+Each provider gets a status of "ok", "timeout" (ran too long), "queued" (never
+started) or "error"; failed providers are returned as error stubs.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+from utils import metrics, profiling
+
+from .catalog_pricing import PricingContext
+from .fleet import PROVIDERS
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_TIMEOUT_SECONDS = float(os.environ.get("PROVIDER_TIMEOUT_SECONDS", "5"))
+PROVIDER_MAX_WORKERS = int(os.environ.get("PROVIDER_MAX_WORKERS", "16"))
+PROVIDER_QUEUE_TIMEOUT_SECONDS = float(os.environ.get("PROVIDER_QUEUE_TIMEOUT_SECONDS", str(PROVIDER_TIMEOUT_SECONDS)))
+
+STATUS_OK = "ok"
+STATUS_TIMEOUT = "timeout"
+STATUS_QUEUED = "queued"
+STATUS_ERROR = "error"
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get or create the shared provider thread pool."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=PROVIDER_MAX_WORKERS, thread_name_prefix="provider")
+    return _executor
+
+
+def _failure(name: str, status: str, message: str) -> Dict:
+    # Keeps the keys the frontend reads from every provider result.
+    return {"provider": name, "status": status, "error": message, "total": None, "breakdown": {}}
+
+
+class _Started(threading.Event):
+    """Set, with the monotonic start time in `at`, when a provider task begins running."""
+
+    def __init__(self):
+        super().__init__()
+        self.at = 0.0
+
+    def mark(self) -> None:
+        self.at = time.monotonic()
+        self.set()
+
+
+def _timed(name: str, fn: Callable[..., Dict], context: Optional[PricingContext], d: Dict,
+           started_event: Optional[_Started] = None) -> Tuple[Dict, float]:
+    """Run one provider on a worker thread, returning its result and compute time."""
+    if started_event is not None:
+        started_event.mark()
+    started = time.perf_counter()
+    try:
+        result = fn(context=context, **d)
+    except Exception:
+        metrics.PROVIDER_COMPUTE_SECONDS.observe(time.perf_counter() - started, name, STATUS_ERROR)
+        raise
+    return result, time.perf_counter() - started
+
+
+def _run_inline(d: Dict, providers: Mapping[str, Callable[..., Dict]],
+                context: Optional[PricingContext]) -> Tuple[Dict[str, Dict], Dict[str, str]]:
+    """Price on the calling thread, one provider after another, so a profiler sees the work."""
+    results: Dict[str, Dict] = {}
+    status: Dict[str, str] = {}
+    for name, fn in providers.items():
+        try:
+            results[name], elapsed = _timed(name, fn, context, d)
+            status[name] = STATUS_OK
+            metrics.PROVIDER_COMPUTE_SECONDS.observe(elapsed, name, STATUS_OK)
+            metrics.record_stage(name, elapsed)
+        except Exception:
+            logger.exception("Provider %s failed", name)
+            results[name] = _failure(name, STATUS_ERROR, "provider failed")
+            status[name] = STATUS_ERROR
+    return results, status
+
+
+def run_providers(
+    d: Dict,
+    providers: Optional[Mapping[str, Callable[..., Dict]]] = None,
+    timeout: Optional[float] = None,
+    context: Optional[PricingContext] = None,
+    queue_timeout: Optional[float] = None,
+) -> Tuple[Dict[str, Dict], Dict[str, str]]:
+    """Price `d` with every provider concurrently.
+
+    Returns `(results, status)`, both keyed by provider name in the order of
+    `providers`. A request waits at most `queue_timeout + timeout`.
+    """
+    providers = PROVIDERS if providers is None else providers
+    timeout = PROVIDER_TIMEOUT_SECONDS if timeout is None else timeout
+    queue_timeout = PROVIDER_QUEUE_TIMEOUT_SECONDS if queue_timeout is None else queue_timeout
+    if profiling.active():
+        return _run_inline(d, providers, context)
+    pool = get_executor()
+
+    starts = {name: _Started() for name in providers}
+    futures = {name: pool.submit(_timed, name, fn, context, d, starts[name]) for name, fn in providers.items()}
+    queue_deadline = time.monotonic() + queue_timeout
+
+    results: Dict[str, Dict] = {}
+    status: Dict[str, str] = {}
+    for name, future in futures.items():
+        started = starts[name]
+        # cancel() fails once the task is running; it is then about to mark its start.
+        if not started.wait(max(queue_deadline - time.monotonic(), 0)) and future.cancel():
+            logger.warning("Provider %s did not start within %.2fs; pool busy", name, queue_timeout)
+            results[name] = _failure(name, STATUS_QUEUED, f"not started within {queue_timeout:g}s")
+            status[name] = STATUS_QUEUED
+            metrics.record_stage(name, queue_timeout, STATUS_QUEUED)
+            continue
+        started.wait()
+        try:
+            results[name], elapsed = future.result(timeout=max(started.at + timeout - time.monotonic(), 0))
+            status[name] = STATUS_OK
+            metrics.PROVIDER_COMPUTE_SECONDS.observe(elapsed, name, STATUS_OK)
+            metrics.record_stage(name, elapsed)
+        except FutureTimeout:
+            future.cancel()
+            logger.warning("Provider %s did not finish within %.2fs", name, timeout)
+            results[name] = _failure(name, STATUS_TIMEOUT, f"timed out after {timeout:g}s")
+            status[name] = STATUS_TIMEOUT
+            metrics.PROVIDER_COMPUTE_SECONDS.observe(timeout, name, STATUS_TIMEOUT)
+            metrics.record_stage(name, timeout, STATUS_TIMEOUT)
+        except Exception:
+            logger.exception("Provider %s failed", name)
+            results[name] = _failure(name, STATUS_ERROR, "provider failed")
+            status[name] = STATUS_ERROR
+    return results, status
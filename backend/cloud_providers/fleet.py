@@ -0,0 +1,156 @@
+"""Pricing of one workload, or a whole fleet of workloads, across every provider."""
+import math
+from typing import Callable, Dict, List, Optional
+
+from utils.onprem_tco import calculate_onprem_tco
+
+from .aws import aws_cost
+from .azure import azure_cost
+from .catalog_pricing import DEFAULT_STORAGE_TYPE, PricingContext
+from .gcp import gcp_cost
+from .kubernetes import k8s_cost
+from .regions import provider_regions
+from .spot_risk import fleet_risk
+from .vectorized import payload_columns, price_columns
+
+
+def _onprem_cost(cpu=0, ram=0, storage=0, network=0, backup=0, instance_count=1, **_):
+    return calculate_onprem_tco(
+        cpu=cpu,
+        ram=ram,
+        storage=storage,
+        network=network,
+        backup=backup,
+        instance_count=instance_count,
+    )
+
+
+PROVIDERS: Dict[str, Callable[..., Dict]] = {
+    "aws": aws_cost,
+    "azure": azure_cost,
+    "gcp": gcp_cost,
+    "kubernetes": k8s_cost,
+    "onprem": _onprem_cost,
+}
+
+
+BREAKDOWN_KEYS = {
+    "aws": ("instance", "storage", "network", "backup"),
+    "azure": ("instance", "storage", "network", "backup"),
+    "gcp": ("instance", "storage", "network", "backup"),
+    "kubernetes": (
+        "capex", "power", "facilities", "operations", "maintenance",
+        "software_licensing", "k8s_overhead", "network", "backup",
+    ),
+    "onprem": (
+        "capex", "power", "facilities", "operations", "maintenance",
+        "software_licensing", "network", "backup",
+    ),
+}
+
+
+def price_workload(d: Dict, context: Optional[PricingContext] = None) -> Dict[str, Dict]:
+    """Price a single validated payload dict for every provider."""
+    return {name: fn(context=context, **d) for name, fn in PROVIDERS.items()}
+
+
+def _totals(total: List[float], breakdown: Dict[str, List[float]]) -> Dict:
+    # fsum keeps fleet totals independent of summation order, so the scalar and
+    # vectorized paths agree exactly.
+    return {
+        "total": round(math.fsum(total), 2),
+        "currency": "USD",
+        "breakdown": {key: round(math.fsum(values), 2) for key, values in breakdown.items()},
+    }
+
+
+def _fleet_totals(name: str, results: List[Dict]) -> Dict:
+    return _totals(
+        [result["total"] for result in results],
+        {key: [result["breakdown"][key] for result in results] for key in BREAKDOWN_KEYS[name]},
+    )
+
+
+def _vectorized_totals(count: int, columns: Dict, context: PricingContext) -> Dict:
+    if not count:
+        return {name: _fleet_totals(name, []) for name in PROVIDERS}
+    arrays = price_columns(context=context, **columns)
+    return {
+        name: _totals(
+            arrays[name]["total"].tolist(),
+            {key: arrays[name][key].tolist() for key in BREAKDOWN_KEYS[name]},
+        )
+        for name in PROVIDERS
+    }
+
+
+def _needs_row_path(d: Dict) -> bool:
+    return bool(d.get("region") or d.get("composition") == "optimal" or d.get("spot_risk"))
+
+
+def price_fleet(
+    workloads: List[Dict],
+    context: Optional[PricingContext] = None,
+    include_results: bool = True,
+) -> Dict:
+    """Price many validated payload dicts against a single catalog version.
+
+    When per-workload results are not requested, totals come straight from the
+    vectorized engine without building any per-row dicts. Otherwise providers are
+    evaluated column-wise (every workload for one provider, then the next).
+    """
+    if context is None:
+        context = PricingContext()
+
+    # The vectorized engine prices against the context's catalogs only and one
+    # SKU per workload, and reports no SKUs, so workloads that pick their own
+    # regions, ask for an optimal SKU mix or for spot risk take the per-row path.
+    if not include_results and not any(_needs_row_path(d) for d in workloads):
+        totals = _vectorized_totals(len(workloads), payload_columns(workloads), context)
+        return {"count": len(workloads), "totals": totals}
+
+    by_provider = {
+        name: [fn(context=context, **d) for d in workloads]
+        for name, fn in PROVIDERS.items()
+    }
+
+    risk = fleet_risk(workloads, by_provider)
+    priced = {
+        "count": len(workloads),
+        "totals": {name: _fleet_totals(name, results) for name, results in by_provider.items()},
+    }
+    for name, bands in risk.items():
+        priced["totals"][name]["spot_risk"] = bands
+    if include_results:
+        priced["results"] = [
+            {name: by_provider[name][i] for name in PROVIDERS}
+            for i in range(len(workloads))
+        ]
+    return priced
+
+
+def price_batch(batch, context: Optional[PricingContext] = None, include_results: bool = True) -> Dict:
+    """`price_fleet` for a `schemas.PayloadBatch`.
+
+    Totals-only batches price the batch's validated columns directly, so rows
+    that passed the column checks never become dicts.
+    """
+    if context is None:
+        context = PricingContext()
+    if include_results or any(_needs_row_path(d) for d in batch.validated.values()):
+        return price_fleet(batch.workloads(), context, include_results)
+    return {"count": batch.count, "totals": _vectorized_totals(batch.count, batch.columns, context)}
+
+
+def price_regions(d: Dict, context: Optional[PricingContext] = None) -> Dict[str, Dict[str, Dict]]:
+    """Price `d` in every requested region, per cloud provider.
+
+    Returns `{provider: {region: result}}` for the providers that have at least
+    one of the regions in `d["region"]`. Only those regions' catalogs are loaded.
+    """
+    regions = {}
+    for name in DEFAULT_STORAGE_TYPE:
+        names = provider_regions(name, d.get("region"))
+        if names:
+            regions[name] = {r: PROVIDERS[name](context=context, **{**d, "region": r}) for r in names}
+    return regions
@@ -11,6 +11,10 @@ def gcp_cost(
     pricing_model="on_demand",
     instance_count=1,
     gcp_storage_type="balanced_pd",
+    context=None,
+    region=None,
+    composition="single",
+    fleet_constraints=None,
     **_,
 ):
     return calculate_provider_cost(
@@ -24,4 +28,8 @@ def gcp_cost(
         pricing_model=pricing_model,
         instance_count=instance_count,
         storage_type=gcp_storage_type,
+        context=context,
+        region=region,
+        composition=composition,
+        fleet_constraints=fleet_constraints,
     )
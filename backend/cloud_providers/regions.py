@@ -0,0 +1,110 @@
+"""Per-region provider catalogs.
+
+Each provider has a default region whose catalog is the existing
+`data/<provider>_catalog.json`. Catalogs for other regions live in
+`data/regions/<provider>/<region>.json` with the same entry format, and are
+only read (through the catalog registry) the first time a request names that
+region. Every loaded region gets its own `CatalogIndex`, so comparing a
+workload across a few regions touches only those regions' files.
+
+Region codes are the providers' own (`us-east-1`, `eastus`, `us-central1`) and
+do not overlap, so a request can name regions of several providers at once.
+"""
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .catalog_registry import get_registry
+
+REGIONS_DIR = "regions"
+
+DEFAULT_REGIONS = {
+    "aws": "us-east-1",
+    "azure": "eastus",
+    "gcp": "us-central1",
+}
+
+# AWS Pricing API / offer file `location` attribute for each region code.
+AWS_LOCATIONS = {
+    "us-east-1": "US East (N. Virginia)",
+    "us-east-2": "US East (Ohio)",
+    "us-west-1": "US West (N. California)",
+    "us-west-2": "US West (Oregon)",
+    "ca-central-1": "Canada (Central)",
+    "eu-west-1": "EU (Ireland)",
+    "eu-west-2": "EU (London)",
+    "eu-west-3": "EU (Paris)",
+    "eu-central-1": "EU (Frankfurt)",
+    "eu-north-1": "EU (Stockholm)",
+    "ap-south-1": "Asia Pacific (Mumbai)",
+    "ap-northeast-1": "Asia Pacific (Tokyo)",
+    "ap-northeast-2": "Asia Pacific (Seoul)",
+    "ap-southeast-1": "Asia Pacific (Singapore)",
+    "ap-southeast-2": "Asia Pacific (Sydney)",
+    "sa-east-1": "South America (Sao Paulo)",
+}
+
+RegionSpec = Union[None, str, Sequence[str]]
+
+
+def catalog_file(provider: str, region: Optional[str] = None) -> str:
+    """Registry file name of a provider's catalog for `region` (default region if None)."""
+    if region is None or region == DEFAULT_REGIONS[provider]:
+        return f"{provider}_catalog.json"
+    return os.path.join(REGIONS_DIR, provider, f"{region}.json")
+
+
+_available: Dict[str, Tuple[Optional[int], Tuple[str, ...]]] = {}
+_available_lock = threading.Lock()
+
+
+def available_regions(provider: str) -> Tuple[str, ...]:
+    """Regions with a catalog for `provider`, default region first. Catalogs are not read."""
+    directory = get_registry().path(os.path.join(REGIONS_DIR, provider))
+    try:
+        stamp = os.stat(directory).st_mtime_ns
+    except OSError:
+        stamp = None
+    cached = _available.get(directory)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    found = []
+    if stamp is not None:
+        found = sorted(
+            name[: -len(".json")] for name in os.listdir(directory)
+            if name.endswith(".json") and not name.startswith(".")
+        )
+    default = DEFAULT_REGIONS[provider]
+    regions = (default,) + tuple(region for region in found if region != default)
+    with _available_lock:
+        _available[directory] = (stamp, regions)
+    return regions
+
+
+def requested_regions(region: RegionSpec) -> List[str]:
+    if region is None:
+        return []
+    if isinstance(region, str):
+        return [region]
+    return list(dict.fromkeys(region))
+
+
+def provider_regions(provider: str, region: RegionSpec) -> List[str]:
+    """The requested regions `provider` has catalogs for, in request order."""
+    available = available_regions(provider)
+    return [r for r in requested_regions(region) if r in available]
+
+
+def pick_region(provider: str, region: RegionSpec) -> str:
+    """First requested region the provider has, else its default region."""
+    matches = provider_regions(provider, region)
+    return matches[0] if matches else DEFAULT_REGIONS[provider]
+
+
+def unknown_regions(region: RegionSpec, providers: Iterable[str] = tuple(DEFAULT_REGIONS)) -> List[str]:
+    """Requested regions that no provider has a catalog for."""
+    known = set()
+    for provider in providers:
+        known.update(available_regions(provider))
+    return [r for r in requested_regions(region) if r not in known]
@@ -0,0 +1,338 @@
+"""Monte Carlo cost of running on spot capacity, with interruptions and price volatility.
+
+The catalog's `spot` rate is a single number; a real spot month is not. For
+every SKU a workload runs on, a `SpotModel` describes:
+
+- the hourly spot price as a mean-reverting log-normal process around its mean
+  (`volatility` is the daily standard deviation of the log price, `reversion`
+  the share of the gap to the mean closed per day), and
+- interruptions as a Poisson process (`interruptions_per_month`), each moving
+  the SKU's nodes to on-demand capacity for `fallback_hours`.
+
+The mean and volatility are fitted from the recorded spot price history when
+there is enough of it (see `utils.price_history`), and otherwise taken from the
+catalog's spot rate; interruption parameters always come from
+`data/spot_models.json` (provider defaults with per-SKU overrides).
+
+`simulate` draws every trajectory of a month at once with NumPy: one matrix of
+daily price steps and one Poisson draw of interruptions per trajectory, whose
+fallback premiums are added at the price of a random day. All nodes of a SKU
+are interrupted together, as spot reclaims usually hit a whole capacity pool,
+so the bands are on the conservative side.
+
+`attach` adds `spot_risk` bands to the cloud results of one workload, inline.
+`fleet_risk` does the same for the workloads of a batch, on a process pool
+(`simulate_jobs`), and sums trajectories into fleet-wide bands.
+"""
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils import price_history
+
+from .catalog_pricing import DEFAULT_STORAGE_TYPE, HOURS_PER_MONTH, catalog_index, hourly_by_model
+from .catalog_registry import get_registry
+
+logger = logging.getLogger(__name__)
+
+MODELS_FILE = "spot_models.json"
+DEFAULT_TRAJECTORIES = int(os.environ.get("SPOT_SIM_TRAJECTORIES", "20000"))
+MIN_TRAJECTORIES = 1000
+MAX_TRAJECTORIES = 200000
+# Trajectories x simulated lines one batch may ask for (about 1 ms of CPU per 1000).
+MAX_FLEET_WORK = int(os.environ.get("SPOT_SIM_MAX_WORK", "20000000"))
+STEP_HOURS = 24
+PERCENTILES = (50, 90, 99)
+HISTORY_DAYS = 90
+MIN_HISTORY_POINTS = 8
+SPOT_SIM_WORKERS = int(os.environ.get("SPOT_SIM_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Below this many trajectory-lines in a batch, starting worker processes costs more than it saves.
+POOL_MIN_WORK = 500000
+
+DEFAULTS = {"interruptions_per_month": 1.0, "fallback_hours": 3.0, "volatility": 0.04, "reversion": 0.15}
+
+# (count, spot, on_demand, volatility, reversion, interruptions_per_month, fallback_hours)
+Line = Tuple[int, float, float, float, float, float, float]
+# (provider, lines, fixed monthly cost outside compute)
+Job = Tuple[str, List[Line], float]
+
+
+class FleetTooLarge(ValueError):
+    """A batch has too many SKU lines to simulate even at `MIN_TRAJECTORIES`."""
+
+
+class SpotModel:
+    """Spot price and interruption model of one SKU."""
+
+    __slots__ = ("sku", "spot", "on_demand", "volatility", "reversion", "interruptions_per_month",
+                 "fallback_hours", "source")
+
+    def __init__(self, sku: str, spot: float, on_demand: float, volatility: float, reversion: float,
+                 interruptions_per_month: float, fallback_hours: float, source: str):
+        self.sku = sku
+        self.spot = float(spot)
+        self.on_demand = float(on_demand)
+        self.volatility = float(volatility)
+        self.reversion = min(max(float(reversion), 1e-6), 1.0)
+        self.interruptions_per_month = float(interruptions_per_month)
+        self.fallback_hours = float(fallback_hours)
+        self.source = source
+
+    def line(self, count: int) -> Line:
+        return (int(count), self.spot, self.on_demand, self.volatility, self.reversion,
+                self.interruptions_per_month, self.fallback_hours)
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def fit_history(points: Sequence[Mapping]) -> Optional[Tuple[float, float]]:
+    """`(mean price, daily log-price volatility)` of price history buckets, or None if too few."""
+    if len(points) < MIN_HISTORY_POINTS:
+        return None
+    ts = np.array([p["ts"] for p in points], dtype=np.float64)
+    prices = np.array([p["avg"] for p in points], dtype=np.float64)
+    if (prices <= 0).any():
+        return None
+    days = np.diff(ts) / 86400.0
+    steps = np.diff(np.log(prices))
+    keep = days > 0
+    if not keep.any():
+        return None
+    return float(prices.mean()), float(math.sqrt(np.sum(steps[keep] ** 2) / np.sum(days[keep])))
+
+
+def _history(provider: str, region: str, sku: str) -> Optional[Tuple[float, float]]:
+    # Reading must not create the database on hosts that never synced.
+    if not price_history.enabled() or not price_history.history_path().exists():
+        return None
+    end = int(time.time())
+    try:
+        series = price_history.get_history().series(provider, region, sku, "spot", end - HISTORY_DAYS * 86400, end)
+    except Exception:
+        logger.exception("Could not read %s/%s spot history for %s", provider, region, sku)
+        return None
+    return fit_history(series.get("spot", []))
+
+
+def spot_model(provider: str, region: str, entry: Mapping, use_history: bool = True) -> SpotModel:
+    """Model for catalog `entry`: configured parameters, with mean and volatility from history if available."""
+    config = get_registry().get(MODELS_FILE).get(provider, {})
+    sku = entry.get("sku")
+    params = {**DEFAULTS, **config.get("default", {}), **config.get("skus", {}).get(sku, {})}
+    params = {name: float(params[name]) for name in DEFAULTS}
+    spot, source = hourly_by_model(entry, "spot"), "catalog"
+    fitted = _history(provider, region, sku) if use_history else None
+    if fitted is not None:
+        (spot, params["volatility"]), source = fitted, "history"
+    return SpotModel(sku, spot, hourly_by_model(entry, "on_demand"), source=source, **params)
+
+
+def simulate(lines: Iterable[Line], trajectories: int, rng: np.random.Generator,
+             hours: float = HOURS_PER_MONTH) -> Tuple[np.ndarray, np.ndarray]:
+    """Compute cost and interruption count of one month per trajectory, for all `lines` together."""
+    cost = np.zeros(trajectories)
+    interruptions = np.zeros(trajectories)
+    steps = np.full(int(hours // STEP_HOURS), float(STEP_HOURS))
+    if hours % STEP_HOURS:
+        steps = np.append(steps, hours % STEP_HOURS)
+    for count, spot, on_demand, volatility, reversion, per_month, fallback in lines:
+        if count <= 0:
+            continue
+        # Exact discretization of a mean-reverting log price, started from its
+        # stationary distribution; `mu` makes the mean price equal `spot`.
+        keep = (1.0 - reversion) ** (steps / 24.0)
+        spread = volatility / math.sqrt(1.0 - (1.0 - reversion) ** 2)
+        mu = math.log(spot) - spread * spread / 2.0 if spot > 0 else -np.inf
+        shocks = rng.standard_normal((len(steps) + 1, trajectories))
+        log_price = np.empty((len(steps), trajectories))
+        x = mu + spread * shocks[0]
+        for k in range(len(steps)):
+            x = mu + keep[k] * (x - mu) + spread * math.sqrt(1.0 - keep[k] ** 2) * shocks[k + 1]
+            log_price[k] = x
+        prices = np.exp(log_price)
+        cost += count * (steps @ prices)
+
+        events = rng.poisson(per_month * hours / HOURS_PER_MONTH, trajectories)
+        total = int(events.sum())
+        if total:
+            who = np.repeat(np.arange(trajectories), events)
+            when = rng.choice(len(steps), size=total, p=steps / hours)
+            np.add.at(cost, who, count * fallback * (on_demand - prices[when, who]))
+            interruptions += events
+    return cost, interruptions
+
+
+def bands(costs: np.ndarray, interruptions: Optional[np.ndarray] = None) -> Dict:
+    """Expected value and percentile bands of monthly totals."""
+    summary = {"trajectories": int(costs.size), "expected": round(float(costs.mean()), 2)}
+    for pct, value in zip(PERCENTILES, np.percentile(costs, PERCENTILES)):
+        summary[f"p{pct}"] = round(float(value), 2)
+    if interruptions is not None:
+        summary["expected_interruptions"] = round(float(interruptions.mean()), 3)
+    return summary
+
+
+def settings(options: Optional[Mapping]) -> Tuple[int, int]:
+    """`(trajectories, seed)` from a payload's `spot_risk` options."""
+    options = options or {}
+    return int(options.get("trajectories") or DEFAULT_TRAJECTORIES), int(options.get("seed") or 0)
+
+
+def _items(result: Mapping) -> List[Mapping]:
+    composition = result.get("composition")
+    if composition and composition.get("feasible"):
+        return composition["items"]
+    return [result["selected_instance"]]
+
+
+def workload_lines(provider: str, result: Mapping, models: Optional[Dict] = None) -> Tuple[List[Line], List[SpotModel]]:
+    """Simulation lines for the SKUs in one provider result; `models` caches models across calls."""
+    models = {} if models is None else models
+    index = catalog_index(provider, result["region"])
+    lines, used = [], []
+    for item in _items(result):
+        key = (provider, result["region"], item["sku"])
+        model = models.get(key)
+        if model is None:
+            model = models[key] = spot_model(provider, result["region"], index.lookup(item["sku"]))
+        lines.append(model.line(item["count"]))
+        used.append(model)
+    return lines, used
+
+
+def _fixed(result: Mapping) -> float:
+    breakdown = result["breakdown"]
+    return math.fsum(value for key, value in breakdown.items() if key != "instance")
+
+
+def _simulatable(result: Mapping) -> bool:
+    return result.get("total") is not None and "selected_instance" in result
+
+
+def attach(results: Mapping[str, Dict], trajectories: int = DEFAULT_TRAJECTORIES, seed: int = 0) -> Dict[str, Dict]:
+    """`results` with a `spot_risk` summary added to every priced cloud provider result."""
+    out = dict(results)
+    for position, provider in enumerate(DEFAULT_STORAGE_TYPE):
+        result = results.get(provider)
+        if not result or not _simulatable(result):
+            continue
+        lines, models = workload_lines(provider, result)
+        rng = np.random.default_rng([seed, position])
+        costs, interruptions = simulate(lines, trajectories, rng)
+        out[provider] = {**result, "spot_risk": {
+            **bands(costs + _fixed(result), interruptions),
+            "models": [model.to_dict() for model in models],
+        }}
+    return out
+
+
+def _run_chunk(jobs: Sequence[Job], seeds: Sequence[np.random.SeedSequence],
+               trajectories: int) -> Tuple[List[Dict], Dict[str, np.ndarray]]:
+    summaries = []
+    sums: Dict[str, np.ndarray] = {}
+    for (provider, lines, fixed), seed in zip(jobs, seeds):
+        costs, interruptions = simulate(lines, trajectories, np.random.default_rng(seed))
+        costs += fixed
+        summaries.append(bands(costs, interruptions))
+        if provider in sums:
+            sums[provider] += costs
+        else:
+            sums[provider] = costs
+    return summaries, sums
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Get or create the shared simulation process pool."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # Spawned, not forked: the web servers run threads, and forking them is unsafe.
+                _pool = ProcessPoolExecutor(max_workers=SPOT_SIM_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def fleet_risk(workloads: Sequence[Mapping], by_provider: Dict[str, List[Dict]]) -> Dict[str, Dict]:
+    """Simulate the workloads that ask for `spot_risk` and return fleet bands per provider.
+
+    Adds `spot_risk` to those workloads' results in `by_provider` (replacing the
+    result dicts). Every simulated workload uses the largest trajectory count
+    requested in the batch and seeds derived from the first one's seed; the
+    others count towards the fleet bands at their fixed total. The trajectory
+    count is lowered so trajectories x lines stays within `MAX_FLEET_WORK`;
+    raises `FleetTooLarge` if that would take it below `MIN_TRAJECTORIES`.
+    """
+    rows = [i for i, d in enumerate(workloads) if d.get("spot_risk")]
+    if not rows:
+        return {}
+    trajectories = max(settings(workloads[i]["spot_risk"])[0] for i in rows)
+    seed = settings(workloads[rows[0]]["spot_risk"])[1]
+    models: Dict = {}
+    jobs: List[Job] = []
+    owners: List[Tuple[str, int]] = []
+    for provider in DEFAULT_STORAGE_TYPE:
+        for i in rows:
+            result = by_provider.get(provider, [None] * len(workloads))[i]
+            if result and _simulatable(result):
+                jobs.append((provider, workload_lines(provider, result, models)[0], _fixed(result)))
+                owners.append((provider, i))
+    lines = sum(len(job_lines) for _, job_lines, _ in jobs)
+    if lines and MAX_FLEET_WORK // lines < MIN_TRAJECTORIES:
+        raise FleetTooLarge(f"too many workloads with spot_risk: {lines} SKU lines to simulate, "
+                            f"at most {MAX_FLEET_WORK // MIN_TRAJECTORIES} per batch")
+    if lines:
+        trajectories = min(trajectories, MAX_FLEET_WORK // lines)
+    summaries, sums = simulate_jobs(jobs, trajectories, seed)
+    for (provider, i), summary in zip(owners, summaries):
+        by_provider[provider][i] = {**by_provider[provider][i], "spot_risk": summary}
+
+    simulated = set(owners)
+    fleet = {}
+    for provider, costs in sums.items():
+        rest = math.fsum(result["total"] for i, result in enumerate(by_provider[provider])
+                         if (provider, i) not in simulated and result.get("total") is not None)
+        fleet[provider] = bands(costs + rest)
+    return fleet
+
+
+def simulate_jobs(jobs: Sequence[Job], trajectories: int = DEFAULT_TRAJECTORIES,
+                  seed: int = 0) -> Tuple[List[Dict], Dict[str, np.ndarray]]:
+    """Bands per job, and per-provider sums of job totals per trajectory (for fleet bands).
+
+    Each job gets its own seed from `seed`, so results do not depend on how
+    jobs are split across worker processes (up to the order of float sums).
+    """
+    seeds = np.random.SeedSequence(seed).spawn(len(jobs))
+    work = trajectories * sum(len(lines) for _, lines, _ in jobs)
+    if SPOT_SIM_WORKERS <= 1 or len(jobs) < 2 or work < POOL_MIN_WORK:
+        return _run_chunk(jobs, seeds, trajectories)
+
+    size = math.ceil(len(jobs) / SPOT_SIM_WORKERS)
+    futures = [
+        get_pool().submit(_run_chunk, jobs[i:i + size], seeds[i:i + size], trajectories)
+        for i in range(0, len(jobs), size)
+    ]
+    summaries: List[Dict] = []
+    sums: Dict[str, np.ndarray] = {}
+    for future in futures:
+        chunk_summaries, chunk_sums = future.result()
+        summaries.extend(chunk_summaries)
+        for provider, costs in chunk_sums.items():
+            if provider in sums:
+                sums[provider] += costs
+            else:
+                sums[provider] = costs
+    return summaries, sums
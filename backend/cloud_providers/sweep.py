@@ -0,0 +1,140 @@
+"""Cost cubes over a grid of workloads.
+
+`sweep_grid` takes the cartesian product of the axis values, e.g. every
+cpu x ram x instance_count combination, and prices it for every requested
+provider and pricing model in one vectorized pass (see `vectorized`). The
+result is a dense array with shape `(providers, pricing_models, *axes)`.
+
+`encode_cube` serializes a cube as a compact binary payload:
+
+    8 bytes   magic b"ICQCUBE1"
+    4 bytes   header length H (uint32, little endian)
+    H bytes   JSON header: axes, providers, pricing_models, shape, dtype, offset
+    ...       float64 totals in C order, starting at `offset` (8-byte aligned)
+"""
+import json
+import struct
+from typing import Dict, Mapping, Optional, Sequence
+
+import numpy as np
+
+from .catalog_pricing import DEFAULT_STORAGE_TYPE, PricingContext
+from .regions import RegionSpec
+from .vectorized import INPUT_COLUMNS, PRICING_MODELS, k8s_columns, onprem_columns, provider_columns
+
+PROVIDERS = tuple(DEFAULT_STORAGE_TYPE) + ("kubernetes", "onprem")
+
+CUBE_MAGIC = b"ICQCUBE1"
+CUBE_MIMETYPE = "application/vnd.infracostiq.cube"
+
+
+def grid_columns(axes: Mapping[str, Sequence[float]], fixed: Mapping[str, float]) -> Dict[str, np.ndarray]:
+    """Input columns for every point of the grid, in C order over `axes`."""
+    shape = tuple(len(values) for values in axes.values())
+    n = int(np.prod(shape, dtype=np.int64))
+    grids = np.meshgrid(*[np.asarray(values, dtype=np.float64) for values in axes.values()], indexing="ij")
+    columns = {name: grid.reshape(-1) for name, grid in zip(axes, grids)}
+    for name in INPUT_COLUMNS:
+        if name not in columns:
+            columns[name] = np.full(n, fixed.get(name, 0), dtype=np.float64)
+    columns["instance_count"] = columns["instance_count"].astype(np.int64)
+    return columns
+
+
+def sweep_grid(
+    axes: Mapping[str, Sequence[float]],
+    fixed: Mapping[str, float],
+    pricing_models: Sequence[str] = PRICING_MODELS,
+    providers: Sequence[str] = PROVIDERS,
+    skus: Optional[Mapping[str, Optional[str]]] = None,
+    storage_types: Optional[Mapping[str, Optional[str]]] = None,
+    context: Optional[PricingContext] = None,
+    region: RegionSpec = None,
+) -> Dict:
+    """Monthly totals for every grid point, provider and pricing model.
+
+    Kubernetes and on-prem costs do not depend on the pricing model; their
+    values are repeated along that dimension so the cube stays dense. Cloud
+    providers are priced from their catalog for `region` (see
+    `regions.pick_region`) unless a `context` is given.
+    """
+    unknown = set(providers) - set(PROVIDERS)
+    if unknown:
+        raise ValueError(f"unknown providers: {sorted(unknown)}")
+    clouds = [p for p in providers if p in DEFAULT_STORAGE_TYPE]
+    if context is None and clouds:
+        context = PricingContext(providers=tuple(clouds), region=region)
+    skus = skus or {}
+    storage_types = storage_types or {}
+
+    shape = tuple(len(values) for values in axes.values())
+    columns = grid_columns(axes, fixed)
+    totals = np.empty((len(providers), len(pricing_models)) + shape, dtype=np.float64)
+    for p, provider in enumerate(providers):
+        if provider == "kubernetes":
+            totals[p] = k8s_columns(columns)["total"].reshape(shape)
+        elif provider == "onprem":
+            totals[p] = onprem_columns(columns)["total"].reshape(shape)
+        else:
+            for m, model in enumerate(pricing_models):
+                priced = provider_columns(
+                    provider,
+                    columns,
+                    pricing_model=model,
+                    skus=skus.get(provider),
+                    storage_types=storage_types.get(provider),
+                    context=context,
+                )
+                totals[p, m] = priced["total"].reshape(shape)
+
+    return {
+        "axes": {name: list(values) for name, values in axes.items()},
+        "regions": dict(context.regions) if context is not None else {},
+        "providers": list(providers),
+        "pricing_models": list(pricing_models),
+        "totals": totals,
+    }
+
+
+def cube_json(result: Dict) -> Dict:
+    """JSON-ready form of a `sweep_grid` result, with the cube as nested lists."""
+    return {
+        "axes": result["axes"],
+        "regions": result.get("regions", {}),
+        "dims": ["provider", "pricing_model"] + list(result["axes"]),
+        "providers": result["providers"],
+        "pricing_models": result["pricing_models"],
+        "shape": list(result["totals"].shape),
+        "currency": "USD",
+        "totals": result["totals"].tolist(),
+    }
+
+
+def encode_cube(result: Dict) -> bytes:
+    """Binary form of a `sweep_grid` result (see module docstring)."""
+    totals = np.ascontiguousarray(result["totals"], dtype="<f8")
+    header = {key: value for key, value in cube_json({**result, "totals": totals[:0]}).items() if key != "totals"}
+    header.update({"shape": list(totals.shape), "dtype": "<f8", "order": "C"})
+
+    def encoded(offset: int) -> bytes:
+        return json.dumps({**header, "offset": offset}, separators=(",", ":")).encode()
+
+    # The offset is part of the header; grow it until the header fits in front of it.
+    offset = 0
+    while len(CUBE_MAGIC) + 4 + len(encoded(offset)) > offset:
+        offset = (len(CUBE_MAGIC) + 4 + len(encoded(offset)) + 7) & ~7
+    head = encoded(offset)
+    padding = b"\0" * (offset - len(CUBE_MAGIC) - 4 - len(head))
+    return b"".join([CUBE_MAGIC, struct.pack("<I", len(head)), head, padding, totals.tobytes()])
+
+
+def decode_cube(data: bytes) -> Dict:
+    """Inverse of `encode_cube`; the totals array is a read-only view of `data`."""
+    if data[: len(CUBE_MAGIC)] != CUBE_MAGIC:
+        raise ValueError("not a cost cube")
+    (header_len,) = struct.unpack_from("<I", data, len(CUBE_MAGIC))
+    start = len(CUBE_MAGIC) + 4
+    header = json.loads(bytes(data[start: start + header_len]))
+    count = int(np.prod(header["shape"], dtype=np.int64))
+    totals = np.frombuffer(data, dtype=header["dtype"], count=count, offset=header["offset"]).reshape(header["shape"])
+    return {**header, "totals": totals}
@@ -0,0 +1,347 @@
+"""NumPy pricing engine for many workloads at once.
+
+Every function here takes columns (1-D arrays) of workload inputs and returns
+arrays with one value per row. The float operations are performed in the same
+order as the scalar functions (`calculate_provider_cost`, `k8s_cost`,
+`calculate_onprem_tco`) and rounded with the same semantics as Python's
+`round`, so each row agrees with the scalar result to the cent.
+"""
+import weakref
+from typing import Dict, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+from .catalog_index import CatalogIndex, GROUPS
+from .catalog_pricing import (
+    BACKUP_PRICING_PER_GB,
+    DEFAULT_STORAGE_TYPE,
+    HOURS_PER_MONTH,
+    NETWORK_PRICING_PER_GB,
+    PricingContext,
+    hourly_by_model,
+)
+
+
+PRICING_MODELS = ("on_demand", "reserved_1yr", "reserved_3yr", "spot")
+
+INPUT_COLUMNS = ("cpu", "ram", "storage", "network", "backup", "instance_count")
+
+Columns = Mapping[str, np.ndarray]
+StrColumn = Union[None, str, Sequence[Optional[str]]]
+
+
+def round_half_even_like_python(values: np.ndarray, digits: int = 2) -> np.ndarray:
+    """Round like the builtin `round(x, digits)` on every element.
+
+    `np.round` scales before rounding, which can land on the other side of a tie
+    (`np.round(2.675, 2) == 2.68` but `round(2.675, 2) == 2.67`). Elements that
+    sit within a hair of a tie after scaling are re-rounded with the builtin.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scale = 10.0 ** digits
+    scaled = values * scale
+    out = np.rint(scaled)
+    # Reuse `scaled` for the distance to the nearest integer; ties sit at 0.5.
+    np.subtract(scaled, out, out=scaled)
+    np.abs(scaled, out=scaled)
+    out /= scale
+    near_tie = np.flatnonzero(scaled > 0.5 - 1e-6)
+    if near_tie.size:
+        # Ties repeat a lot (constant columns, grids), so round each distinct value once.
+        distinct, inverse = np.unique(values.reshape(-1)[near_tie], return_inverse=True)
+        rounded = np.array([round(float(v), digits) for v in distinct], dtype=np.float64)
+        out.reshape(-1)[near_tie] = rounded[inverse.reshape(-1)]
+    return out
+
+
+_round2 = round_half_even_like_python
+
+
+class IndexArrays:
+    """NumPy views of a `CatalogIndex` for vectorized matching."""
+
+    def __init__(self, index: CatalogIndex):
+        n_cpu, n_ram = len(index.vcpus), len(index.rams)
+        self.vcpus = np.asarray(index.vcpus, dtype=np.float64)
+        self.rams = np.asarray(index.rams, dtype=np.float64)
+
+        # One extra row and column of -1 so out-of-range bisects need no branch.
+        self.tables = {}
+        for group in GROUPS:
+            table = np.full((n_cpu + 1, n_ram + 1), -1, dtype=np.int64)
+            table[:n_cpu, :n_ram] = np.asarray(index.tables[group], dtype=np.int64).reshape(n_cpu, n_ram)
+            self.tables[group] = table
+        self.group_min = {group: index.group_min[group] for group in GROUPS}
+
+        self.hourly = np.array(
+            [[hourly_by_model(entry, model) for model in PRICING_MODELS] for entry in index.entries],
+            dtype=np.float64,
+        ).reshape(len(index.entries), len(PRICING_MODELS))
+
+
+_arrays_cache: "weakref.WeakKeyDictionary[CatalogIndex, IndexArrays]" = weakref.WeakKeyDictionary()
+
+
+def index_arrays(index: CatalogIndex) -> IndexArrays:
+    arrays = _arrays_cache.get(index)
+    if arrays is None:
+        arrays = IndexArrays(index)
+        _arrays_cache[index] = arrays
+    return arrays
+
+
+def _as_float(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64)
+
+
+def _map_column(values: StrColumn, n: int, mapping, default, dtype) -> np.ndarray:
+    """Per-row `mapping.get(value, default)`, evaluated once per distinct value."""
+    if values is None or isinstance(values, str):
+        return np.full(n, mapping.get(values, default), dtype=dtype)
+    if len(values) != n:
+        raise ValueError(f"expected {n} values, got {len(values)}")
+    cache = {}
+
+    def lookup(value):
+        try:
+            return cache[value]
+        except KeyError:
+            cache[value] = mapping.get(value, default)
+            return cache[value]
+
+    if dtype is object:
+        out = np.empty(n, dtype=object)
+        out[:] = [lookup(value) for value in values]
+        return out
+    return np.fromiter((lookup(value) for value in values), dtype=dtype, count=n)
+
+
+def match_rows(index: CatalogIndex, cpu: np.ndarray, ram: np.ndarray) -> np.ndarray:
+    """Vectorized `CatalogIndex.match_index` over columns of targets."""
+    if not index.entries:
+        raise IndexError("cannot match against an empty catalog")
+    arrays = index_arrays(index)
+    target_cpu = np.maximum(_as_float(cpu), 0.0)
+    target_ram = np.maximum(_as_float(ram), 0.0)
+
+    a = np.searchsorted(arrays.vcpus, target_cpu, side="left")
+    b = np.searchsorted(arrays.rams, target_ram, side="left")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(target_cpu > 0, target_ram / np.where(target_cpu > 0, target_cpu, 1.0), 0.0)
+    wants_memory = ratio > 6
+    wants_compute = ~wants_memory & (ratio < 3) & (target_cpu > 0)
+
+    covering = arrays.tables["all"][a, b]
+    preferred = np.where(
+        wants_memory,
+        arrays.tables["memory"][a, b],
+        np.where(wants_compute, arrays.tables["compute"][a, b], -1),
+    )
+    selected = np.where(preferred >= 0, preferred, covering)
+
+    def fallback(group):
+        return arrays.group_min[group] if arrays.group_min[group] >= 0 else arrays.group_min["all"]
+
+    uncovered = covering < 0
+    if uncovered.any():
+        selected = np.where(
+            uncovered,
+            np.where(wants_memory, fallback("memory"), np.where(wants_compute, fallback("compute"), arrays.group_min["all"])),
+            selected,
+        )
+    return selected
+
+
+def provider_columns(
+    provider: str,
+    columns: Columns,
+    pricing_model: StrColumn = "on_demand",
+    skus: StrColumn = None,
+    storage_types: StrColumn = None,
+    context: Optional[PricingContext] = None,
+) -> Dict[str, np.ndarray]:
+    """Vectorized `calculate_provider_cost` for one cloud provider."""
+    if context is None or provider not in context.indexes:
+        context = PricingContext(providers=(provider,))
+    index = context.indexes[provider]
+    storage_rates = context.storage_rates[provider]
+    arrays = index_arrays(index)
+
+    cpu = _as_float(columns["cpu"])
+    n = len(cpu)
+    instance_count = np.asarray(columns["instance_count"], dtype=np.int64)
+
+    selected = match_rows(index, cpu, columns["ram"])
+    if skus is not None and (isinstance(skus, str) or any(skus)):
+        override = _map_column(skus, n, index.by_sku, -1, np.int64)
+        selected = np.where(override >= 0, override, selected)
+
+    models = _map_column(pricing_model, n, {m: k for k, m in enumerate(PRICING_MODELS)}, -1, np.int64)
+    if (models < 0).any():
+        raise ValueError(f"pricing_model must be one of {PRICING_MODELS}")
+    hourly = arrays.hourly[selected, models]
+
+    default_type = DEFAULT_STORAGE_TYPE[provider]
+    resolved_types = _map_column(storage_types, n, {t: t for t in storage_rates}, default_type, object)
+    rate_by_type = {t: float(storage_rates.get(t, 0.10)) for t in list(storage_rates) + [default_type]}
+    default_rate = rate_by_type[default_type]
+    storage_rate = _map_column(storage_types, n, {t: rate_by_type[t] for t in storage_rates}, default_rate, np.float64)
+
+    per_instance_monthly = hourly * HOURS_PER_MONTH
+    compute_cost = per_instance_monthly * instance_count
+    storage_cost = np.maximum(_as_float(columns["storage"]), 0.0) * storage_rate
+    monthly_gb_transfer = np.maximum(_as_float(columns["network"]), 0.0) * 324
+    network_cost = monthly_gb_transfer * NETWORK_PRICING_PER_GB[provider]
+    backup_cost = np.maximum(_as_float(columns["backup"]), 0.0) * BACKUP_PRICING_PER_GB[provider]
+    total = compute_cost + storage_cost + network_cost + backup_cost
+
+    return {
+        "total": _round2(total),
+        "instance": _round2(compute_cost),
+        "storage": _round2(storage_cost),
+        "network": _round2(network_cost),
+        "backup": _round2(backup_cost),
+        "selected": selected,
+        "price_per_hour": round_half_even_like_python(hourly, 5),
+        "price_per_month": _round2(per_instance_monthly),
+        "storage_type": resolved_types,
+    }
+
+
+def _counts(columns: Columns) -> np.ndarray:
+    return np.maximum(np.asarray(columns["instance_count"], dtype=np.int64), 1)
+
+
+def _monthly_kwh(watts_total: np.ndarray, pue: float) -> np.ndarray:
+    return (watts_total / 1000.0) * 24 * 30 * pue
+
+
+def k8s_columns(columns: Columns) -> Dict[str, np.ndarray]:
+    """Vectorized `k8s_cost`."""
+    cpu = _as_float(columns["cpu"])
+    ram = _as_float(columns["ram"])
+    storage = _as_float(columns["storage"])
+    count = _counts(columns)
+
+    real_util = 0.45
+    effective_cpu = cpu / real_util
+    effective_ram = ram / real_util
+    effective_storage = storage / real_util
+
+    capex_total = (effective_cpu * 500.0) + (effective_ram * 25.0) + (effective_storage * 0.15)
+    capex_monthly = (capex_total / (5 * 12)) * 1.5
+    watts_total = (effective_cpu * 10.0) + (effective_ram * 0.5) + (effective_storage * 0.1)
+    power_cost = _monthly_kwh(watts_total, 1.56) * 0.12 * 1.5
+
+    raw = {
+        "capex": capex_monthly,
+        "power": power_cost,
+        "facilities": 0.15 * capex_monthly,
+        "operations": (0.25 * capex_total / 12),
+        "maintenance": 0.12 * capex_total / 12,
+        "software_licensing": (cpu * 80.0) / 12,
+        "k8s_overhead": 0.15 * (capex_monthly + power_cost),
+        "network": _as_float(columns["network"]) * 324 * 0.03,
+        "backup": _as_float(columns["backup"]) * 0.02,
+    }
+    # k8s_cost rounds each line, scales by instance count, then rounds again.
+    breakdown = {key: _round2(value) for key, value in raw.items()}
+    breakdown = {key: np.where(count > 1, _round2(value * count), value) for key, value in breakdown.items()}
+
+    total = np.zeros(len(cpu))
+    for value in breakdown.values():
+        total = total + value
+    breakdown["total"] = _round2(total)
+    return breakdown
+
+
+def onprem_columns(columns: Columns) -> Dict[str, np.ndarray]:
+    """Vectorized `calculate_onprem_tco`."""
+    cpu = _as_float(columns["cpu"])
+    ram = _as_float(columns["ram"])
+    storage = _as_float(columns["storage"])
+    count = _counts(columns)
+    redundancy = 1.4
+
+    capex_total = cpu * 500.0 + ram * 25.0 + storage * 0.15
+    capex_monthly = (capex_total / (5 * 12)) * redundancy
+    watts_total = cpu * 5.0 + ram * 0.3 + storage * 0.05
+    power_cost = _monthly_kwh(watts_total, 1.56) * 0.12 * redundancy
+    facilities_cost = 0.15 * capex_monthly
+    ops_cost = (0.35 * capex_total / 12)
+    maintenance_cost = 0.12 * capex_total / 12
+    software_licensing_cost = (cpu * 100.0) / 12
+    network_cost = _as_float(columns["network"]) * 324 * 0.02
+    backup_cost = _as_float(columns["backup"]) * 0.03
+
+    opex_single = (
+        power_cost
+        + facilities_cost
+        + ops_cost
+        + maintenance_cost
+        + software_licensing_cost
+        + network_cost
+        + backup_cost
+    )
+    capex_monthly = capex_monthly * count
+    opex_monthly = opex_single * count
+
+    return {
+        "total": _round2(capex_monthly + opex_monthly),
+        "capex_monthly": _round2(capex_monthly),
+        "opex_monthly": _round2(opex_monthly),
+        "capex": _round2(capex_monthly),
+        "power": _round2(power_cost * count),
+        "facilities": _round2(facilities_cost * count),
+        "operations": _round2(ops_cost * count),
+        "maintenance": _round2(maintenance_cost * count),
+        "software_licensing": _round2(software_licensing_cost * count),
+        "network": _round2(network_cost * count),
+        "backup": _round2(backup_cost * count),
+    }
+
+
+def price_columns(
+    columns: Columns,
+    pricing_model: StrColumn = "on_demand",
+    skus: Optional[Mapping[str, StrColumn]] = None,
+    storage_types: Optional[Mapping[str, StrColumn]] = None,
+    context: Optional[PricingContext] = None,
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """Price every row for all five providers in one pass.
+
+    `skus` and `storage_types` map a cloud provider to its per-row overrides,
+    e.g. `{"aws": ["m6i.xlarge", None, ...]}`.
+    """
+    if context is None:
+        context = PricingContext()
+    skus = skus or {}
+    storage_types = storage_types or {}
+
+    result = {
+        provider: provider_columns(
+            provider,
+            columns,
+            pricing_model=pricing_model,
+            skus=skus.get(provider),
+            storage_types=storage_types.get(provider),
+            context=context,
+        )
+        for provider in DEFAULT_STORAGE_TYPE
+    }
+    result["kubernetes"] = k8s_columns(columns)
+    result["onprem"] = onprem_columns(columns)
+    return result
+
+
+def payload_columns(workloads: Sequence[Mapping]) -> Dict:
+    """Split validated payload dicts into the keyword arguments of `price_columns`."""
+    columns = {name: np.array([w[name] for w in workloads], dtype=np.float64) for name in INPUT_COLUMNS}
+    columns["instance_count"] = columns["instance_count"].astype(np.int64)
+    return {
+        "columns": columns,
+        "pricing_model": [w["pricing_model"] for w in workloads],
+        "skus": {p: [w.get(f"{p}_sku") for w in workloads] for p in DEFAULT_STORAGE_TYPE},
+        "storage_types": {p: [w.get(f"{p}_storage_type") for w in workloads] for p in DEFAULT_STORAGE_TYPE},
+    }
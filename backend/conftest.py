@@ -1,5 +1,16 @@
 import sys
 import os
 
+import pytest
+
 # Add the backend directory to the Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def _clear_result_cache():
+    # Tests swap providers in place, which the catalog-versioned cache key cannot see.
+    from utils.result_cache import get_result_cache
+
+    get_result_cache().clear()
+    yield
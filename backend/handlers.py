@@ -0,0 +1,179 @@
+"""Framework-independent request handlers shared by the Flask app and the ASGI app.
+
+Handlers take already-parsed request data and return `(payload, status)`, so
+`app.py` (WSGI) and `asgi.py` serve identical responses from one
+implementation and one process-wide catalog registry and result cache.
+"""
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+from pydantic import ValidationError
+
+from cloud_providers import spot_risk
+from cloud_providers.catalog_pricing import catalog_version
+from cloud_providers.catalog_response import PreparedBody, parse_fields, prepared_catalog
+from cloud_providers.executor import STATUS_OK, run_providers
+from cloud_providers.fleet import price_regions
+from cloud_providers.regions import DEFAULT_REGIONS, requested_regions, unknown_regions
+from schemas import CalcPayload
+from utils import metrics, profiling
+from utils.price_history import DEFAULT_POINTS, MAX_POINTS, bucket_width, get_history
+from utils.result_cache import get_result_cache, payload_key
+
+logger = logging.getLogger(__name__)
+
+CATALOG_MAX_AGE = int(os.environ.get("CATALOG_MAX_AGE", "300"))
+PRICE_HISTORY_DEFAULT_DAYS = 90
+
+Result = Tuple[Dict, int]
+
+
+def validation_details(e: ValidationError) -> List[Dict]:
+    """`e.errors()` with non-JSON context values (custom validator exceptions) stringified."""
+    return error_details(e.errors())
+
+
+def error_details(errors: List[Dict]) -> List[Dict]:
+    """Pydantic error dicts with non-JSON context values stringified."""
+    details = []
+    for error in errors:
+        ctx = error.get("ctx")
+        if ctx:
+            error = {**error, "ctx": {k: v if isinstance(v, (str, int, float, bool, type(None))) else str(v)
+                                      for k, v in ctx.items()}}
+        details.append(error)
+    return details
+
+
+def health() -> Result:
+    return {"status": "Backend is running"}, 200
+
+
+def api_health() -> Result:
+    return {"service": "InfraCostIQ API", "status": "ok"}, 200
+
+
+def calculate(body: Any) -> Result:
+    """Price one payload for every provider (cached per payload and catalog version).
+
+    Records `validate`, `catalog`, per-provider and `cache` stages in the
+    request's Server-Timing (see `utils.metrics`). Profiled requests (see
+    `utils.profiling`) skip the cache.
+    """
+    with metrics.stage("validate"):
+        try:
+            payload = CalcPayload(**(body or {}))
+        except ValidationError as e:
+            logger.debug("Validation error: %s", e)
+            return {"error": "invalid input", "details": validation_details(e)}, 400
+        except TypeError:
+            return {"error": "invalid input", "details": "expected a JSON object"}, 400
+
+        d = payload.model_dump()
+        unknown = unknown_regions(d["region"])
+        if unknown:
+            return {"error": "invalid input", "details": f"no catalog for regions {unknown}"}, 400
+
+    computed = []
+
+    def compute():
+        computed.append(True)
+        results, status = run_providers(d)
+        if d["spot_risk"] is not None:
+            with metrics.stage("spot_risk"):
+                results = spot_risk.attach(results, *spot_risk.settings(d["spot_risk"]))
+        if len(requested_regions(d["region"])) > 1:
+            results = {**results, "regions": price_regions(d)}
+        return results, status
+
+    try:
+        with metrics.stage("catalog"):
+            key = (catalog_version(region=d["region"]), payload_key(d))
+        if profiling.active():
+            # A cache hit would leave nothing to profile.
+            return _respond(*compute())
+        started = time.perf_counter()
+        results, status = get_result_cache().get_or_compute(
+            key,
+            compute,
+            # Timeouts and provider errors are transient; only cache complete results.
+            cacheable=lambda value: all(s == STATUS_OK for s in value[1].values()),
+        )
+        metrics.record_stage("cache", time.perf_counter() - started, "miss" if computed else "hit")
+    except Exception:
+        logger.exception("Unexpected error in /calculate")
+        return {"error": "internal server error"}, 500
+    return _respond(results, status)
+
+
+def _respond(results: Dict, status: Dict[str, str]) -> Result:
+    if STATUS_OK not in status.values():
+        return {"error": "internal server error", "status": status}, 500
+    return {**results, "status": status}, 200
+
+
+def catalog(args: Mapping[str, str]) -> Tuple[Union[PreparedBody, Dict], int]:
+    """Prepared catalog body for `provider`/`fields`/`region` query args, or an error payload."""
+    region = args.get("region") or None
+    if unknown_regions(region):
+        return {"error": f"no catalog for region {region!r}"}, 400
+    try:
+        return prepared_catalog(args.get("provider") or None, parse_fields(args.get("fields")), region), 200
+    except KeyError as e:
+        return {"error": f"unknown provider {e.args[0]!r}"}, 400
+
+
+def if_none_match(header: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an (unquoted) entity tag."""
+    if not header:
+        return False
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag.strip('"') == etag:
+            return True
+    return False
+
+
+def _epoch(value: str) -> int:
+    """Epoch seconds from epoch digits or an ISO 8601 date/time (UTC unless an offset is given)."""
+    if value.isdigit():
+        return int(value)
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def price_history(args: Mapping[str, str]) -> Result:
+    """Downsampled price series of one SKU (see `utils.price_history`).
+
+    Query args: `sku` (required), `provider` (default aws), `region` (default
+    the provider's default region), `model`, `start`/`end` (epoch seconds or
+    ISO 8601; default the last 90 days) and `points` (buckets per model).
+    """
+    provider = args.get("provider") or "aws"
+    sku = args.get("sku")
+    if provider not in DEFAULT_REGIONS:
+        return {"error": f"unknown provider {provider!r}"}, 400
+    if not sku:
+        return {"error": "sku is required"}, 400
+    region = args.get("region") or DEFAULT_REGIONS[provider]
+    try:
+        end = _epoch(args["end"]) if args.get("end") else int(time.time())
+        start = _epoch(args["start"]) if args.get("start") else end - PRICE_HISTORY_DEFAULT_DAYS * 86400
+        points = int(args.get("points") or DEFAULT_POINTS)
+    except ValueError as e:
+        return {"error": "invalid input", "details": str(e)}, 400
+    if start > end or not 1 <= points <= MAX_POINTS:
+        return {"error": "invalid input", "details": f"need start <= end and 1 <= points <= {MAX_POINTS}"}, 400
+
+    series = get_history().series(provider, region, sku, args.get("model") or None, start, end, points)
+    return {"provider": provider, "region": region, "sku": sku, "start": start, "end": end,
+            "bucket_seconds": bucket_width(start, end, points), "series": series}, 200
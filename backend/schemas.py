@@ -1,10 +1,45 @@
-from typing import Optional
+import math
+from typing import Dict, List, Literal, Optional, Sequence, Union
 
-from pydantic import BaseModel, Field, conint, confloat
+import numpy as np
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, conint, confloat, field_validator, model_validator
+
+MAX_REGIONS = 32
+MAX_FLEET_NODES = 100000
+MAX_SPOT_TRAJECTORIES = 200000
+# Far above any machine; keeps vCPU counts exact as floats in cache keys and columns.
+MAX_CPU = 1000000
+
+
+class FleetConstraints(BaseModel):
+    """Limits on the SKU mix picked with `composition="optimal"`."""
+
+    max_nodes: Optional[int] = Field(default=None, ge=1, le=MAX_FLEET_NODES)
+    min_vcpu: confloat(ge=0) = 0
+    max_vcpu: Optional[confloat(gt=0)] = None
+    min_ram_gb: confloat(ge=0) = 0
+    max_ram_gb: Optional[confloat(gt=0)] = None
+    # Catalog categories nodes may come from, e.g. ["general", "compute"].
+    categories: Optional[List[str]] = Field(default=None, min_length=1)
+
+    @model_validator(mode="after")
+    def _check_bounds(self):
+        if self.max_vcpu is not None and self.max_vcpu < self.min_vcpu:
+            raise ValueError("max_vcpu must be >= min_vcpu")
+        if self.max_ram_gb is not None and self.max_ram_gb < self.min_ram_gb:
+            raise ValueError("max_ram_gb must be >= min_ram_gb")
+        return self
+
+
+class SpotRiskOptions(BaseModel):
+    """Monte Carlo spot simulation settings; the trajectory count defaults to `SPOT_SIM_TRAJECTORIES`."""
+
+    trajectories: Optional[int] = Field(default=None, ge=1000, le=MAX_SPOT_TRAJECTORIES)
+    seed: conint(ge=0) = 0
 
 
 class CalcPayload(BaseModel):
-    cpu: conint(ge=0)
+    cpu: conint(ge=0, le=MAX_CPU)
     ram: confloat(ge=0)
     storage: confloat(ge=0)
     network: confloat(ge=0)
@@ -17,6 +52,304 @@ class CalcPayload(BaseModel):
     aws_storage_type: str = Field(default="gp3")
     azure_storage_type: str = Field(default="standard_ssd")
     gcp_storage_type: str = Field(default="balanced_pd")
+    # Provider region code(s), e.g. "eu-west-1" or ["us-east-1", "westeurope"].
+    # Each provider uses the first listed region it has a catalog for.
+    region: Optional[Union[str, List[str]]] = None
+    # "optimal" prices cloud compute as the cheapest mix of SKUs covering
+    # cpu * instance_count and ram * instance_count, instead of instance_count
+    # copies of one SKU. Explicit *_sku values still take precedence.
+    composition: Literal["single", "optimal"] = "single"
+    fleet_constraints: Optional[FleetConstraints] = None
+    # Adds expected cost and P50/P90/P99 bands of a simulated spot month
+    # (interruptions, price swings) to each cloud result. Needs pricing_model "spot".
+    spot_risk: Optional[SpotRiskOptions] = None
+
+    @field_validator("region")
+    @classmethod
+    def _check_region(cls, region):
+        if isinstance(region, list):
+            if len(region) > MAX_REGIONS:
+                raise ValueError(f"at most {MAX_REGIONS} regions per request")
+            return region or None
+        return region
+
+    @model_validator(mode="after")
+    def _check_spot_risk(self):
+        if self.spot_risk is not None and self.pricing_model != "spot":
+            raise ValueError('spot_risk needs pricing_model "spot"')
+        return self
+
+
+PRICING_MODELS = ("on_demand", "reserved_1yr", "reserved_3yr", "spot")
+SWEEP_PROVIDERS = ("aws", "azure", "gcp", "kubernetes", "onprem")
+MAX_AXIS_POINTS = 10000
+
+SweepInput = Literal["cpu", "ram", "storage", "network", "backup", "instance_count"]
+
+
+# Sweep inputs must be finite: they are expanded into grids and cast to ints.
+SweepAmount = confloat(ge=0, allow_inf_nan=False)
+
+
+class SweepRange(BaseModel):
+    """Inclusive arithmetic range: start, start + step, ... up to stop."""
+
+    start: SweepAmount
+    stop: SweepAmount
+    step: confloat(gt=0, allow_inf_nan=False) = 1
+
+    @model_validator(mode="after")
+    def _check_bounds(self):
+        if self.stop < self.start:
+            raise ValueError("stop must be >= start")
+        if self.count() > MAX_AXIS_POINTS:
+            raise ValueError(f"range has more than {MAX_AXIS_POINTS} points")
+        return self
+
+    def count(self) -> int:
+        # The epsilon keeps float steps such as 0.1 from dropping the stop value.
+        steps = (self.stop - self.start) / self.step + 1e-9
+        if not math.isfinite(steps):
+            raise ValueError(f"range has more than {MAX_AXIS_POINTS} points")
+        return int(math.floor(steps)) + 1
+
+    def values(self) -> List[float]:
+        return [self.start + k * self.step for k in range(self.count())]
+
+
+class SweepPayload(BaseModel):
+    """Grid of workloads: every combination of the `axes` values, other inputs fixed."""
+
+    axes: Dict[SweepInput, Union[List[SweepAmount], SweepRange]] = Field(min_length=1)
+    cpu: Optional[conint(ge=0, le=MAX_CPU)] = None
+    ram: Optional[SweepAmount] = None
+    storage: SweepAmount = 0
+    network: SweepAmount = 0
+    backup: SweepAmount = 0
+    instance_count: int = Field(default=1, ge=1, le=500)
+    pricing_models: List[Literal[PRICING_MODELS]] = Field(default=list(PRICING_MODELS), min_length=1)
+    providers: List[Literal[SWEEP_PROVIDERS]] = Field(default=list(SWEEP_PROVIDERS), min_length=1)
+    aws_sku: Optional[str] = None
+    azure_sku: Optional[str] = None
+    gcp_sku: Optional[str] = None
+    aws_storage_type: str = Field(default="gp3")
+    azure_storage_type: str = Field(default="standard_ssd")
+    gcp_storage_type: str = Field(default="balanced_pd")
+    region: Optional[Union[str, List[str]]] = None
+
+    @field_validator("axes")
+    @classmethod
+    def _expand_axes(cls, axes):
+        expanded = {}
+        for name, spec in axes.items():
+            values = spec.values() if isinstance(spec, SweepRange) else list(spec)
+            if not values:
+                raise ValueError(f"axis {name!r} has no values")
+            if len(values) > MAX_AXIS_POINTS:
+                raise ValueError(f"axis {name!r} has more than {MAX_AXIS_POINTS} points")
+            if not all(math.isfinite(v) for v in values):
+                raise ValueError(f"axis {name!r} takes finite numbers")
+            if name in ("cpu", "instance_count"):
+                if any(v != int(v) for v in values):
+                    raise ValueError(f"axis {name!r} takes whole numbers")
+                values = [int(v) for v in values]
+            if name == "cpu" and max(values) > MAX_CPU:
+                raise ValueError(f"cpu values must be at most {MAX_CPU}")
+            if name == "instance_count" and not all(1 <= v <= 500 for v in values):
+                raise ValueError("instance_count values must be between 1 and 500")
+            expanded[name] = values
+        return expanded
+
+    @model_validator(mode="after")
+    def _check_required_inputs(self):
+        for name in ("cpu", "ram"):
+            if name not in self.axes and getattr(self, name) is None:
+                raise ValueError(f"{name} must be given either as an axis or as a fixed value")
+        return self
+
+    def points(self) -> int:
+        return math.prod(len(values) for values in self.axes.values())
+
+
+# Bulk validation of batch rows. Rows that only set the numeric inputs, the
+# pricing model, SKUs and storage types are checked column by column with
+# NumPy; everything else (and every row that fails a column check, so its
+# errors read exactly as for `/api/calculate`) goes through `CalcPayload`.
+BATCH_NUMERIC = ("cpu", "ram", "storage", "network", "backup", "instance_count")
+BATCH_CLOUDS = ("aws", "azure", "gcp")
+_MODEL_FIELDS = frozenset(("composition", "fleet_constraints", "spot_risk"))
+_PAYLOAD_LIST = TypeAdapter(List[CalcPayload])
+_DEFAULTS = {name: field.default for name, field in CalcPayload.model_fields.items() if not field.is_required()}
+_COLUMN_FIELDS = BATCH_NUMERIC + ("pricing_model",) + tuple(f"{p}_sku" for p in BATCH_CLOUDS) + tuple(
+    f"{p}_storage_type" for p in BATCH_CLOUDS)
+_ROW_DEFAULTS = {name: _DEFAULTS[name] for name in ("region", "composition", "fleet_constraints", "spot_risk")}
+
+
+def _column_candidates(rows: Sequence[Dict]) -> np.ndarray:
+    """Mask of rows that need no field beyond what the column checks cover."""
+    return np.fromiter(
+        (row.get("region") is None and _MODEL_FIELDS.isdisjoint(row) for row in rows), dtype=bool, count=len(rows)
+    )
+
+
+def _numeric_column(rows: Sequence[Dict], name: str, ok: np.ndarray) -> np.ndarray:
+    """`name` of every row as float64; rows with a missing, non-number or out-of-range value are cleared from `ok`."""
+    values = [row.get(name, _DEFAULTS.get(name)) for row in rows]
+    if not set(map(type, values)) <= {int, float}:
+        for i, v in enumerate(values):
+            if type(v) not in (int, float):
+                ok[i] = False
+                values[i] = 0.0
+    try:
+        column = np.array(values, dtype=np.float64)
+    except (OverflowError, TypeError):
+        # Ints beyond float range; `CalcPayload` reports them.
+        column = np.zeros(len(values), dtype=np.float64)
+        for i, v in enumerate(values):
+            try:
+                column[i] = v
+            except (OverflowError, TypeError):
+                ok[i] = False
+    with np.errstate(invalid="ignore"):
+        if name in ("cpu", "instance_count"):
+            ok &= column == np.floor(column)
+        if name == "cpu":
+            ok &= column <= MAX_CPU
+        if name == "instance_count":
+            ok &= (column >= 1) & (column <= 500)
+        else:
+            ok &= column >= 0
+    return column
+
+
+def _string_column(rows: Sequence[Dict], name: str, ok: np.ndarray, allowed=None, optional=False) -> List:
+    """`name` of every row; rows with a missing, non-string or disallowed value are cleared from `ok`."""
+    values = [row.get(name, _DEFAULTS.get(name)) for row in rows]
+    types = {str, type(None)} if optional else {str}
+    # Types first: values such as lists cannot be hashed into a set.
+    if set(map(type, values)) <= types and (allowed is None or set(values) <= allowed):
+        return values
+    for i, v in enumerate(values):
+        if type(v) not in types or (allowed is not None and v not in allowed):
+            ok[i] = False
+    return values
+
+
+class PayloadBatch:
+    """Valid batch rows as columns in row order, plus the errors of the invalid ones.
+
+    `columns` holds the keyword arguments of `vectorized.price_columns`.
+    `validated` maps a valid row's position (among the valid rows) to its
+    `CalcPayload` dict, for rows that went through the model; `workloads()`
+    builds the dicts of the others from the columns.
+    """
+
+    __slots__ = ("count", "columns", "indices", "validated", "errors")
+
+    def __init__(self, count: int, columns: Dict, indices: List[int], validated: Dict[int, Dict],
+                 errors: List[Dict]):
+        self.count = count
+        self.columns = columns
+        self.indices = indices
+        self.validated = validated
+        self.errors = errors
+
+    def regions(self) -> Dict[int, Union[str, List[str]]]:
+        """`{row index: region}` of the valid rows that name regions."""
+        return {self.indices[pos]: d["region"] for pos, d in self.validated.items() if d["region"]}
+
+    def workloads(self) -> List[Dict]:
+        """The valid rows as `CalcPayload` dicts."""
+        columns = self.columns["columns"]
+        rows = zip(
+            *(columns[name].tolist() for name in BATCH_NUMERIC),
+            self.columns["pricing_model"],
+            *(self.columns["skus"][p] for p in BATCH_CLOUDS),
+            *(self.columns["storage_types"][p] for p in BATCH_CLOUDS),
+        )
+        out = []
+        for pos, row in enumerate(rows):
+            d = self.validated.get(pos)
+            if d is None:
+                d = dict(zip(_COLUMN_FIELDS, row), **_ROW_DEFAULTS)
+                d["cpu"] = int(d["cpu"])
+            out.append(d)
+        return out
+
+
+def validate_batch(rows: Sequence) -> PayloadBatch:
+    """Validate a batch of `CalcPayload` rows in bulk.
+
+    Accepts exactly the rows `CalcPayload` accepts, with the same values.
+    Errors are `{"index": row, "errors": [...]}`, where each error is a
+    pydantic error dict whose `loc` is relative to the row.
+    """
+    errors: Dict[int, List[Dict]] = {}
+    objects = []
+    for index, row in enumerate(rows):
+        if isinstance(row, dict):
+            objects.append(index)
+        else:
+            errors[index] = [{"msg": "expected a JSON object"}]
+    dicts = [rows[i] for i in objects]
+
+    ok = _column_candidates(dicts)
+    numeric = {name: _numeric_column(dicts, name, ok) for name in BATCH_NUMERIC}
+    models = _string_column(dicts, "pricing_model", ok, allowed=frozenset(PRICING_MODELS))
+    skus = {p: _string_column(dicts, f"{p}_sku", ok, optional=True) for p in BATCH_CLOUDS}
+    storage = {p: _string_column(dicts, f"{p}_storage_type", ok) for p in BATCH_CLOUDS}
+
+    # The rest is validated in one call; its errors carry the row position first.
+    rest = np.flatnonzero(~ok).tolist()
+    payloads: Dict[int, Dict] = {}
+    if rest:
+        try:
+            validated = _PAYLOAD_LIST.validate_python([dicts[pos] for pos in rest])
+            payloads = dict(zip(rest, (p.model_dump() for p in validated)))
+        except ValidationError as e:
+            failed = set()
+            for error in e.errors():
+                pos = rest[error["loc"][0]]
+                failed.add(pos)
+                errors.setdefault(objects[pos], []).append({**error, "loc": error["loc"][1:]})
+            valid = [pos for pos in rest if pos not in failed]
+            if valid:
+                validated = _PAYLOAD_LIST.validate_python([dicts[pos] for pos in valid])
+                payloads = dict(zip(valid, (p.model_dump() for p in validated)))
+
+    keep = ok.copy()
+    keep[list(payloads)] = True
+    positions = np.flatnonzero(keep)
+    kept = positions.tolist()
+    at = {pos: n for n, pos in enumerate(kept)}
+    for pos, d in payloads.items():
+        for name in BATCH_NUMERIC:
+            numeric[name][pos] = d[name]
+        models[pos] = d["pricing_model"]
+        for p in BATCH_CLOUDS:
+            skus[p][pos] = d[f"{p}_sku"]
+            storage[p][pos] = d[f"{p}_storage_type"]
+
+    def pick(values: List) -> List:
+        return [values[pos] for pos in kept]
+
+    columns = {name: numeric[name][positions] for name in BATCH_NUMERIC}
+    columns["instance_count"] = columns["instance_count"].astype(np.int64)
+    return PayloadBatch(
+        count=len(kept),
+        columns={
+            "columns": columns,
+            "pricing_model": pick(models),
+            "skus": {p: pick(skus[p]) for p in BATCH_CLOUDS},
+            "storage_types": {p: pick(storage[p]) for p in BATCH_CLOUDS},
+        },
+        indices=[objects[pos] for pos in kept],
+        validated={at[pos]: d for pos, d in payloads.items()},
+        errors=[{"index": index, "errors": errors[index]} for index in sorted(errors)],
+    )
 
 
-__all__ = ["CalcPayload"]
+__all__ = [
+    "CalcPayload", "FleetConstraints", "PayloadBatch", "SpotRiskOptions", "SweepPayload", "SweepRange",
+    "validate_batch",
+]
@@ -1,10 +1,10 @@
 #!/usr/bin/env python3
-"""Post a sample payload to the backend /calculate endpoint and print the JSON response."""
+"""Post a sample payload to the backend /api/calculate endpoint and print the JSON response."""
 import requests
 import sys
 
 
-def main(url="http://127.0.0.1:5000/calculate"):
+def main(url="http://127.0.0.1:5000/api/calculate"):
     payload = {"cpu": 2, "ram": 8, "storage": 100, "network": 10, "backup": 50}
     try:
         r = requests.post(url, json=payload, timeout=5)
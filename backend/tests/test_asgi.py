@@ -0,0 +1,99 @@
+import asyncio
+import gzip
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import app as flask_app
+from asgi import app
+
+
+def _call(method, path, body=None, headers=(), query=b""):
+    """Drive the ASGI app for one request and return (status, headers, body)."""
+    raw = json.dumps(body).encode() if body is not None else b""
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query,
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers],
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": raw, "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = messages[0]
+    response_headers = {k.decode(): v.decode() for k, v in start["headers"]}
+    return start["status"], response_headers, b"".join(m.get("body", b"") for m in messages[1:])
+
+
+def test_asgi_calculate_matches_flask():
+    payload = {"cpu": 2, "ram": 8, "storage": 100, "network": 10, "backup": 50}
+    status, headers, body = _call("POST", "/api/calculate", payload, [("Content-Type", "application/json")])
+    assert status == 200
+    assert headers["access-control-allow-origin"] == "*"
+    assert "validate;dur=" in headers["server-timing"]
+    data = json.loads(body)
+    assert data == flask_app.test_client().post("/api/calculate", json=payload).get_json()
+    assert data["aws"]["selected_instance"]["count"] >= 1
+    assert data["onprem"]["currency"] == "USD"
+
+    status, _, body = _call("POST", "/api/calculate", {"cpu": -1})
+    assert status == 400
+    assert json.loads(body)["error"] == "invalid input"
+
+
+def test_asgi_catalog_and_health():
+    status, headers, body = _call("GET", "/api/catalog", headers=[("Accept-Encoding", "gzip")], query=b"provider=gcp")
+    assert status == 200
+    assert headers["content-encoding"] == "gzip"
+    assert list(json.loads(gzip.decompress(body))) == ["gcp"]
+
+    status, _, body = _call("GET", "/api/catalog", headers=[("Accept-Encoding", "gzip"), ("If-None-Match", headers["etag"])],
+                            query=b"provider=gcp")
+    assert status == 304
+    assert body == b""
+
+    assert json.loads(_call("GET", "/api/health")[2]) == {"service": "InfraCostIQ API", "status": "ok"}
+    assert _call("GET", "/api/calculate")[0] == 405
+    assert _call("GET", "/api/missing")[0] == 404
+
+
+def test_asgi_head_sends_headers_without_body():
+    _, get_headers, get_body = _call("GET", "/api/catalog")
+    status, headers, body = _call("HEAD", "/api/catalog")
+    assert status == 200
+    assert body == b""
+    assert headers["etag"] == get_headers["etag"]
+    assert headers["content-length"] == str(len(get_body))
+
+
+def test_asgi_serves_every_flask_route():
+    from asgi import ROUTES
+
+    rules = {(method, rule.rule) for rule in flask_app.url_map.iter_rules() for method in rule.methods}
+    assert set(ROUTES) <= rules
+
+    # Routes without an ASGI handler are handed to the Flask app.
+    payload = {"cpu": 2, "ram": 8, "storage": 100, "network": 10, "backup": 50}
+    status, headers, body = _call("POST", "/api/calculate/batch", [payload], [("Content-Type", "application/json")])
+    assert status == 200
+    assert headers["access-control-allow-origin"] == "*"
+    client = flask_app.test_client()
+    assert json.loads(body) == client.post("/api/calculate/batch", json=[payload]).get_json()
+
+    sweep = {"axes": {"cpu": [2, 4], "ram": [8]}, "storage": 100, "providers": ["gcp"]}
+    status, _, body = _call("POST", "/api/sweep", sweep, [("Content-Type", "application/json")])
+    assert status == 200
+    assert json.loads(body) == client.post("/api/sweep", json=sweep).get_json()
+
+    for path in ("/api/cache/stats", "/api/prices/history", "/api/admin/profiles", "/api/missing"):
+        assert _call("GET", path)[0] == client.get(path).status_code, path
+    assert _call("HEAD", "/api/cache/stats")[2] == b""
@@ -0,0 +1,91 @@
+import io
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import utils.aws_price_sync as sync_mod
+from utils.aws_offer_stream import stream_offerings
+
+
+def _product(instance_type, location='US East (N. Virginia)', os_name='Linux', tenancy='Shared'):
+    return {
+        'sku': instance_type,
+        'productFamily': 'Compute Instance',
+        'attributes': {
+            'instanceType': instance_type,
+            'location': location,
+            'operatingSystem': os_name,
+            'tenancy': tenancy,
+        },
+    }
+
+
+def _term(product_key, price):
+    return {
+        f'{product_key}.JRTCKXETXF': {
+            'offerTermCode': 'JRTCKXETXF',
+            'priceDimensions': {
+                f'{product_key}.JRTCKXETXF.6YS6EN2CT7': {'unit': 'Hrs', 'pricePerUnit': {'USD': price}},
+            },
+            'termAttributes': {},
+        }
+    }
+
+
+OFFER_FILE = {
+    'formatVersion': 'v1.0',
+    'disclaimer': 'This pricing list is for informational purposes only.',
+    'offerCode': 'AmazonEC2',
+    'products': {
+        'P1': _product('m5.large'),
+        'P2': _product('m5.large', location='EU (Ireland)'),
+        'P3': _product('m5.large', os_name='Windows'),
+        'P4': _product('m5.large', tenancy='Dedicated'),
+        'P5': _product('c5.large'),
+        'P6': _product('x1e.32xlarge'),
+    },
+    'terms': {
+        'OnDemand': {
+            'P1': _term('P1', '0.0960000000'),
+            'P2': _term('P2', '0.1070000000'),
+            'P5': _term('P5', '0.0850000000'),
+            'P6': _term('P6', '26.6880000000'),
+        },
+        'Reserved': {
+            'P1': _term('P1', '0.0600000000'),
+            'P3': _term('P3', '0.1000000000'),
+        },
+        'Spot': {
+            'P1': _term('P1', '0.0300000000'),
+        },
+    },
+}
+
+
+def test_stream_offerings_keeps_only_matching_products_and_terms():
+    data = stream_offerings(io.BytesIO(json.dumps(OFFER_FILE).encode()), instance_types={'m5.large', 'c5.large'})
+
+    assert set(data['products']) == {'P1', 'P5'}
+    assert set(data['terms']) == {'OnDemand', 'Reserved'}
+    assert set(data['terms']['OnDemand']) == {'P1', 'P5'}
+    assert set(data['terms']['Reserved']) == {'P1'}
+    assert sync_mod._get_pricing_for_sku_public(data, 'm5.large') == 0.096
+
+
+def test_sync_prices_public_reads_local_offer_file(monkeypatch, tmp_path):
+    offer_file = tmp_path / 'index.json'
+    offer_file.write_text(json.dumps(OFFER_FILE))
+    monkeypatch.setattr(sync_mod, 'CATALOG_PATH', tmp_path / 'catalog.json')
+    monkeypatch.setattr(sync_mod, 'CACHE_PATH', tmp_path / 'cache.json')
+    catalog = [
+        {'sku': 'm5.large', 'family': 'm5', 'vcpu': 2, 'ram_gb': 8, 'price_per_hour': 0.0},
+        {'sku': 'c5.large', 'family': 'c5', 'vcpu': 2, 'ram_gb': 4, 'price_per_hour': 0.0},
+        {'sku': 'r5.large', 'family': 'r5', 'vcpu': 2, 'ram_gb': 16, 'price_per_hour': 0.0},
+    ]
+    (tmp_path / 'catalog.json').write_text(json.dumps(catalog))
+
+    updated = sync_mod.sync_prices_public(write_back=False, offer_file=str(offer_file))
+
+    assert updated == {'m5.large': 0.096, 'c5.large': 0.085, 'r5.large': None}
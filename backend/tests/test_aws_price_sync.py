@@ -126,3 +126,168 @@ def test_sync_prices_public_writes_cache(monkeypatch, tmp_path):
     assert 'm5.large' in updated
     cache = json.loads((tmp_path / 'cache.json').read_text())
     assert cache['m5.large'] == 0.5678
+
+
+def _reserved_term(code, lease, offering_class, option, hourly, upfront=None):
+    dims = {f'{code}.hrs': {'unit': 'Hrs', 'pricePerUnit': {'USD': hourly}}}
+    if upfront is not None:
+        dims[f'{code}.upfront'] = {'unit': 'Quantity', 'pricePerUnit': {'USD': upfront}}
+    return {
+        'priceDimensions': dims,
+        'termAttributes': {
+            'LeaseContractLength': lease,
+            'OfferingClass': offering_class,
+            'PurchaseOption': option,
+        },
+    }
+
+
+def test_sync_prices_public_fills_all_pricing_models(monkeypatch, tmp_path):
+    monkeypatch.setattr(sync_mod, 'CATALOG_PATH', tmp_path / 'catalog.json')
+    monkeypatch.setattr(sync_mod, 'CACHE_PATH', tmp_path / 'cache.json')
+    sample_catalog = [
+        {'sku': 'm5.large', 'price_per_hour': {'on_demand': 0.0, 'reserved_1yr': 0.0, 'reserved_3yr': 0.0, 'spot': 0.03}},
+        {'sku': 'c5.large', 'price_per_hour': 0.0},
+        {'sku': 'r5.large', 'price_per_hour': 0.2},
+    ]
+    (tmp_path / 'catalog.json').write_text(json.dumps(sample_catalog))
+
+    attrs = {'location': 'US East (N. Virginia)', 'operatingSystem': 'Linux', 'tenancy': 'Shared'}
+    offerings = {
+        'products': {
+            'sql': {'attributes': {**attrs, 'instanceType': 'm5.large', 'preInstalledSw': 'SQL Web'}},
+            'plain': {'attributes': {**attrs, 'instanceType': 'm5.large', 'preInstalledSw': 'NA'}},
+            'c5': {'attributes': {**attrs, 'instanceType': 'c5.large'}},
+        },
+        'terms': {
+            'OnDemand': {
+                'sql': {'t': {'priceDimensions': {'d': {'pricePerUnit': {'USD': '0.1370'}}}}},
+                'plain': {'t': {'priceDimensions': {'d': {'pricePerUnit': {'USD': '0.0960'}}}}},
+                'c5': {'t': {'priceDimensions': {'d': {'pricePerUnit': {'USD': '0.0850'}}}}},
+            },
+            'Reserved': {
+                'plain': {
+                    'a': _reserved_term('a', '1yr', 'convertible', 'No Upfront', '0.0700'),
+                    'b': _reserved_term('b', '1yr', 'standard', 'No Upfront', '0.0600'),
+                    'c': _reserved_term('c', '3yr', 'standard', 'All Upfront', '0.0000', '1051.2'),
+                },
+            },
+        },
+    }
+    monkeypatch.setattr(sync_mod, '_download_public_offerings', lambda *args, **kwargs: offerings)
+
+    updated = sync_mod.sync_prices_public(write_back=True)
+
+    assert updated == {'m5.large': 0.096, 'c5.large': 0.085, 'r5.large': None}
+    catalog = json.loads((tmp_path / 'catalog.json').read_text())
+    assert catalog[0]['price_per_hour'] == {'on_demand': 0.096, 'reserved_1yr': 0.06, 'reserved_3yr': 0.04, 'spot': 0.03}
+    assert catalog[1]['price_per_hour'] == 0.085
+    assert catalog[2]['price_per_hour'] == 0.2
+
+
+class ThrottlingError(Exception):
+    def __init__(self):
+        super().__init__('Rate exceeded')
+        self.response = {'Error': {'Code': 'ThrottlingException'}}
+
+
+class PagedPricingClient:
+    """Returns a capacity-reservation product on page one and the priced product on page two."""
+
+    def __init__(self, throttle_first=0):
+        self.calls = []
+        self.filters = []
+        self.throttle_first = throttle_first
+
+    def get_products(self, ServiceCode=None, Filters=None, FormatVersion=None, NextToken=None):
+        self.calls.append(NextToken)
+        if self.throttle_first:
+            self.throttle_first -= 1
+            raise ThrottlingError()
+        instance_type = next(f for f in Filters if f['Field'] == 'instanceType')
+        self.filters.append(instance_type)
+        skus = instance_type['Value'].split(',')
+        if NextToken is None:
+            return {'PriceList': [json.dumps({'product': {}, 'terms': {'OnDemand': {}}})], 'NextToken': 'page-2'}
+        products = [{
+            'product': {'attributes': {'instanceType': sku}},
+            'terms': {
+                'OnDemand': {'t': {'priceDimensions': {'d': {'pricePerUnit': {'USD': '0.2000'}}}}},
+                'Reserved': {'r': {
+                    'priceDimensions': {'d': {'unit': 'Hrs', 'pricePerUnit': {'USD': '0.1200'}}},
+                    'termAttributes': {'LeaseContractLength': '1yr', 'OfferingClass': 'standard', 'PurchaseOption': 'No Upfront'},
+                }},
+            },
+        } for sku in skus]
+        return {'PriceList': [json.dumps(product) for product in products]}
+
+
+def test_sync_prices_paginates_retries_and_reports_progress(monkeypatch, tmp_path):
+    monkeypatch.setattr(sync_mod, 'CATALOG_PATH', tmp_path / 'catalog.json')
+    monkeypatch.setattr(sync_mod, 'CACHE_PATH', tmp_path / 'cache.json')
+    monkeypatch.setattr('utils.rate_limit.time.sleep', lambda seconds: None)
+    skus = [f'm5.{size}' for size in ('large', 'xlarge', '2xlarge', '4xlarge', '8xlarge')]
+    catalog = [{'sku': sku, 'price_per_hour': {'on_demand': 0.0, 'spot': 0.01}} for sku in skus]
+    (tmp_path / 'catalog.json').write_text(json.dumps(catalog))
+
+    client = PagedPricingClient(throttle_first=3)
+    monkeypatch.setattr(sync_mod, 'boto3', SimpleNamespace(client=lambda name, region_name=None: client))
+    progress = []
+
+    updated = sync_mod.sync_prices(write_back=True, workers=4, rate=1000,
+                                   progress=lambda done, total, sku: progress.append((done, total)))
+
+    assert updated == {sku: 0.2 for sku in skus}
+    # All five SKUs go in one ANY_OF query: two pages plus three throttled attempts.
+    assert len(client.calls) == 2 + 3
+    assert client.filters[-1] == {'Type': 'ANY_OF', 'Field': 'instanceType', 'Value': ','.join(skus)}
+    assert sorted(progress) == [(i, len(skus)) for i in range(1, len(skus) + 1)]
+    written = json.loads((tmp_path / 'catalog.json').read_text())
+    assert written[0]['price_per_hour'] == {'on_demand': 0.2, 'reserved_1yr': 0.12, 'spot': 0.01}
+
+
+def test_sku_batches_fit_one_filter_value():
+    skus = [f'x{i}.{"a" * 40}' for i in range(60)]
+    batches = sync_mod._sku_batches(skus)
+    assert [sku for batch in batches for sku in batch] == skus
+    assert all(len(batch) <= sync_mod.SKUS_PER_QUERY for batch in batches)
+    assert all(len(','.join(batch)) <= sync_mod.MAX_FILTER_VALUE_CHARS for batch in batches)
+
+
+def test_token_bucket_limits_rate():
+    from utils.rate_limit import TokenBucket
+
+    now = [0.0]
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=sleep)
+    for _ in range(6):
+        bucket.acquire()
+    # Two tokens are available immediately; the other four arrive at 2 per second.
+    assert abs(now[0] - 2.0) < 1e-9
+
+
+def test_public_sync_writes_catalog_only_when_prices_change(monkeypatch, tmp_path):
+    monkeypatch.setattr(sync_mod, 'CATALOG_PATH', tmp_path / 'catalog.json')
+    monkeypatch.setattr(sync_mod, 'CACHE_PATH', tmp_path / 'cache.json')
+    (tmp_path / 'catalog.json').write_text(json.dumps([{'sku': 'm5.large', 'price_per_hour': 0.1}]))
+    attrs = {'location': 'US East (N. Virginia)', 'operatingSystem': 'Linux', 'tenancy': 'Shared', 'instanceType': 'm5.large'}
+
+    def offerings(price):
+        return {
+            'products': {'p': {'attributes': attrs}},
+            'terms': {'OnDemand': {'p': {'t': {'priceDimensions': {'d': {'pricePerUnit': {'USD': price}}}}}}},
+        }
+
+    monkeypatch.setattr(sync_mod, '_download_public_offerings', lambda *args, **kwargs: offerings('0.0960'))
+    sync_mod.sync_prices_public(write_back=True)
+    stamp = os.stat(tmp_path / 'catalog.json').st_mtime_ns
+    sync_mod.sync_prices_public(write_back=True)
+    assert os.stat(tmp_path / 'catalog.json').st_mtime_ns == stamp
+
+    monkeypatch.setattr(sync_mod, '_download_public_offerings', lambda *args, **kwargs: offerings('0.0980'))
+    sync_mod.sync_prices_public(write_back=True)
+    assert json.loads((tmp_path / 'catalog.json').read_text()) == [{'sku': 'm5.large', 'price_per_hour': 0.098}]
+    assert not [p for p in tmp_path.iterdir() if p.name.startswith('.') or p.name.endswith('.jsonl')]
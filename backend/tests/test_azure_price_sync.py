@@ -0,0 +1,118 @@
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import utils.azure_price_sync as sync_mod
+from utils.price_history import get_history
+
+
+def _item(sku, kind, price, sku_name=None, **extra):
+    return {"currencyCode": "USD", "armRegionName": "eastus", "armSkuName": sku, "type": kind,
+            "unitPrice": price, "unitOfMeasure": "1 Hour", "serviceName": "Virtual Machines",
+            "productName": "Virtual Machines Dv3 Series", "skuName": sku_name or sku, **extra}
+
+
+# Recorded-shape Retail Prices items per SKU, served two per page.
+ITEMS = {
+    "Standard_D2s_v3": [
+        _item("Standard_D2s_v3", "Consumption", 0.096, "D2s v3"),
+        _item("Standard_D2s_v3", "Consumption", 0.0192, "D2s v3 Spot"),
+        _item("Standard_D2s_v3", "Consumption", 0.188, "D2s v3", productName="Virtual Machines Dv3 Series Windows"),
+        _item("Standard_D2s_v3", "Consumption", 0.0192, "D2s v3 Low Priority"),
+        _item("Standard_D2s_v3", "DevTestConsumption", 0.05, "D2s v3"),
+        _item("Standard_D2s_v3", "Reservation", 525.6, "D2s v3", reservationTerm="1 Year"),
+        _item("Standard_D2s_v3", "Reservation", 1016.16, "D2s v3", reservationTerm="3 Years"),
+    ],
+    "Standard_E2s_v3": [
+        _item("Standard_E2s_v3", "Consumption", 0.126, "E2s v3"),
+        _item("Standard_E2s_v3", "Consumption", 0.0252, "E2s v3 Spot"),
+    ],
+    "Standard_F4s_v2": [],
+}
+
+
+class _RetailPrices(BaseHTTPRequestHandler):
+    state = {"active": 0, "peak": 0, "requests": 0, "throttled": False}
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        with self.lock:
+            self.state["active"] += 1
+            self.state["requests"] += 1
+            self.state["peak"] = max(self.state["peak"], self.state["active"])
+            throttle = not self.state["throttled"]
+            self.state["throttled"] = True
+        try:
+            time.sleep(0.05)
+            if throttle:
+                self.send_response(429)
+                self.end_headers()
+                return
+            query = parse_qs(urlparse(self.path).query)
+            sku = query["$filter"][0].split("armSkuName eq '")[1].rstrip("'")
+            skip = int(query.get("$skip", ["0"])[0])
+            items = ITEMS.get(sku, [])
+            page = {"BillingCurrency": "USD", "Items": items[skip:skip + 2], "Count": len(items[skip:skip + 2])}
+            if skip + 2 < len(items):
+                host, port = self.server.server_address
+                page["NextPageLink"] = (f"http://{host}:{port}/api/retail/prices?"
+                                        f"$filter={query['$filter'][0]}&$skip={skip + 2}")
+            body = json.dumps(page).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with self.lock:
+                self.state["active"] -= 1
+
+
+def test_sync_maps_every_pricing_model_from_paged_responses(monkeypatch, tmp_path):
+    catalog = [
+        {"sku": "Standard_D2s_v3", "vcpu": 2, "ram_gb": 8, "price_per_hour": {"on_demand": 0.1, "spot": 0.03}},
+        {"sku": "Standard_E2s_v3", "vcpu": 2, "ram_gb": 16, "price_per_hour": 0.13},
+        {"sku": "Standard_F4s_v2", "vcpu": 4, "ram_gb": 8, "price_per_hour": 0.17},
+    ]
+    (tmp_path / "azure_catalog.json").write_text(json.dumps(catalog))
+    monkeypatch.setattr(sync_mod, "CATALOG_PATH", tmp_path / "azure_catalog.json")
+    monkeypatch.setattr(sync_mod, "CACHE_PATH", tmp_path / "azure_prices.json")
+    monkeypatch.setenv("PRICE_HISTORY_DB", str(tmp_path / "history.db"))
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _RetailPrices)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        base_url = f"http://127.0.0.1:{server.server_address[1]}/api/retail/prices"
+        updated = sync_mod.sync_prices(write_back=True, workers=2, rate=1000, base_url=base_url)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert updated == {"Standard_D2s_v3": 0.096, "Standard_E2s_v3": 0.126, "Standard_F4s_v2": None}
+    written = {entry["sku"]: entry["price_per_hour"] for entry in json.loads((tmp_path / "azure_catalog.json").read_text())}
+    assert written["Standard_D2s_v3"] == {"on_demand": 0.096, "spot": 0.0192, "reserved_1yr": 0.06, "reserved_3yr": 0.038667}
+    assert written["Standard_E2s_v3"] == {"on_demand": 0.126, "spot": 0.0252}
+    assert written["Standard_F4s_v2"] == 0.17
+    assert json.loads((tmp_path / "azure_prices.json").read_text())["Standard_D2s_v3"] == 0.096
+
+    # Queries ran concurrently, never beyond the worker pool, and survived a 429.
+    state = _RetailPrices.state
+    assert state["peak"] == 2 and state["throttled"]
+    assert state["requests"] == 1 + 4 + 1 + 1  # the 429, four D2s_v3 pages, one each for the others
+    history = get_history(tmp_path / "history.db").series("azure", "eastus", "Standard_D2s_v3", "spot")
+    assert history["spot"][0]["avg"] == 0.0192
+
+
+def test_classify_item_skips_meters_outside_the_catalog():
+    assert sync_mod.classify_item(_item("X", "Consumption", 0.1)) == ("on_demand", 0.1)
+    assert sync_mod.classify_item(_item("X", "Consumption", 0.1, unitOfMeasure="1 GB/Month")) is None
+    assert sync_mod.classify_item(_item("X", "Consumption", 0.1, currencyCode="EUR")) is None
+    assert sync_mod.classify_item(_item("X", "Reservation", 87.6, reservationTerm="5 Years")) is None
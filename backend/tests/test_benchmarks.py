@@ -0,0 +1,50 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks import run
+from benchmarks.harness import bench, compare, histogram, percentile
+
+
+def test_percentiles_and_histogram():
+    samples = [float(i) for i in range(1, 1001)]
+    assert percentile(samples, 50) == 500
+    assert percentile(samples, 99) == 990
+    assert percentile(samples, 99.9) == 999
+    buckets = histogram(samples, buckets=8)
+    assert len(buckets) == 8
+    assert sum(b["count"] for b in buckets) == 1000
+    assert buckets[-1]["le_us"] == 1000
+
+    result = bench(lambda: sum(range(100)), iterations=50, warmup=5)
+    assert result["samples"] == 50
+    assert result["p50_us"] <= result["p99_us"] <= result["p999_us"]
+    assert result["alloc_bytes_per_op"] >= 0
+
+
+def test_compare_flags_regressions_past_threshold():
+    baseline = {"a": {"p50_us": 100.0, "p99_us": 200.0, "alloc_bytes_per_op": 1000.0},
+                "b": {"p50_us": 0.5, "p99_us": 0.8}}
+    results = {"a": {"p50_us": 120.0, "p99_us": 300.0, "alloc_bytes_per_op": 2000.0},
+               "b": {"p50_us": 1.0, "p99_us": 1.2},
+               "new": {"p50_us": 5.0}}
+    regressions = compare(results, baseline, threshold=0.25)
+    assert {(r["case"], r["metric"]) for r in regressions} == {("a", "p99_us"), ("a", "alloc_bytes_per_op")}
+    assert compare(results, baseline, threshold=1.5) == []
+
+
+def test_quick_runs_gate_only_against_a_quick_baseline(tmp_path):
+    path = tmp_path / "baseline.json"
+    impossible = {"k8s_cost": {"p50_us": 1e-6, "p99_us": 1e-6}}
+    args = ["--quick", "--cases", "k8s_cost", "--baseline", str(path)]
+
+    path.write_text(json.dumps({"quick": False, "results": impossible}))
+    assert run.main(args) == 0
+    path.write_text(json.dumps({"quick": True, "results": impossible}))
+    assert run.main(args) == 1
+
+    assert run.main(args + ["--save-baseline"]) == 0
+    saved = json.loads(path.read_text())
+    assert saved["quick"] is True and "k8s_cost" in saved["results"]
@@ -0,0 +1,103 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from pydantic import ValidationError
+
+from app import app
+from cloud_providers.fleet import price_fleet
+from schemas import CalcPayload, validate_batch
+
+
+WORKLOADS = [
+    {"cpu": 2, "ram": 8, "storage": 100, "network": 10, "backup": 50},
+    {"cpu": 16, "ram": 128, "storage": 500, "network": 5, "backup": 0, "pricing_model": "reserved_1yr"},
+    {"cpu": 4, "ram": 16, "storage": 200, "network": 20, "backup": 80, "aws_sku": "m6i.xlarge", "instance_count": 3},
+]
+
+
+def test_batch_matches_single_calculations_and_totals():
+    client = app.test_client()
+    res = client.post("/api/calculate/batch", json=WORKLOADS)
+    assert res.status_code == 200
+    data = res.get_json()
+
+    assert data["count"] == len(WORKLOADS)
+    for payload, result in zip(WORKLOADS, data["results"]):
+        single = client.post("/api/calculate", json=payload).get_json()
+        assert result == {provider: single[provider] for provider in result}
+
+    for provider in ("aws", "azure", "gcp", "kubernetes", "onprem"):
+        expected = sum(result[provider]["total"] for result in data["results"])
+        assert abs(data["totals"][provider]["total"] - expected) < 0.01
+
+
+def test_batch_accepts_ndjson_and_workloads_object():
+    client = app.test_client()
+    body = "\n".join(json.dumps(w) for w in WORKLOADS) + "\n"
+    ndjson = client.post("/api/calculate/batch?results=false", data=body, content_type="application/x-ndjson")
+    wrapped = client.post("/api/calculate/batch?results=false", json={"workloads": WORKLOADS})
+
+    assert ndjson.status_code == 200
+    assert "results" not in ndjson.get_json()
+    assert ndjson.get_json() == wrapped.get_json()
+
+
+def test_batch_reports_validation_errors_by_row_index():
+    client = app.test_client()
+    rows = [WORKLOADS[0], {"cpu": -1, "ram": 8, "storage": 1, "network": 1, "backup": 1}, "nope"]
+    res = client.post("/api/calculate/batch", json=rows)
+    assert res.status_code == 400
+    assert [detail["index"] for detail in res.get_json()["details"]] == [1, 2]
+
+
+def test_bulk_validation_matches_calc_payload():
+    rows = WORKLOADS + [
+        {"cpu": 4.0, "ram": 8, "storage": 1, "network": 1, "backup": 1, "instance_count": 2.0},
+        {"cpu": "4", "ram": 8, "storage": 1, "network": 1, "backup": 1, "region": "eu-west-1"},
+        {"cpu": 4.5, "ram": 8, "storage": 1, "network": 1, "backup": 1},
+        {"cpu": 2, "ram": 8, "storage": 1, "network": 1, "backup": 1, "pricing_model": "hourly"},
+        {"cpu": 2, "ram": 8, "network": 1, "backup": 1},
+        [1, 2],
+    ]
+    batch = validate_batch(rows)
+
+    expected, failed = [], {}
+    for index, row in enumerate(rows):
+        try:
+            expected.append(CalcPayload(**row).model_dump())
+        except ValidationError as e:
+            failed[index] = e.errors()
+        except TypeError:
+            failed[index] = [{"msg": "expected a JSON object"}]
+    assert batch.workloads() == expected
+    assert batch.indices == [i for i in range(len(rows)) if i not in failed]
+    assert {e["index"]: e["errors"] for e in batch.errors} == failed
+
+    columns = batch.columns["columns"]
+    assert columns["cpu"].tolist() == [d["cpu"] for d in expected]
+    assert columns["instance_count"].dtype == np.int64
+    assert batch.regions() == {4: "eu-west-1"}
+
+
+def test_totals_only_batch_prices_validated_columns():
+    client = app.test_client()
+    rows = WORKLOADS * 50
+    totals = client.post("/api/calculate/batch?results=false", json=rows).get_json()
+    assert totals == price_fleet(validate_batch(rows).workloads(), include_results=False)
+    assert totals["totals"] == client.post("/api/calculate/batch", json=rows).get_json()["totals"]
+
+
+def test_batch_rejects_unhashable_and_overflowing_values_like_calculate():
+    client = app.test_client()
+    for bad in ({"pricing_model": ["on_demand"]}, {"cpu": 10 ** 400}, {"storage": 10 ** 400}):
+        row = {**WORKLOADS[0], **bad}
+        single = client.post("/api/calculate", json=row)
+        res = client.post("/api/calculate/batch", json=[WORKLOADS[1], row])
+        assert single.status_code == res.status_code == 400
+        details = res.get_json()["details"]
+        assert [detail["index"] for detail in details] == [1]
+        assert [e["loc"] for e in details[0]["errors"]] == [e["loc"] for e in single.get_json()["details"]]
@@ -0,0 +1,58 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cloud_providers.catalog_index import CatalogIndex
+from cloud_providers.catalog_pricing import hourly_on_demand, load_catalog, lookup_sku, smart_match
+
+
+def _random_catalog(rng, size):
+    catalog = []
+    for i in range(size):
+        price = rng.choice([0.01, 0.02, 0.05, 0.1, 0.2, rng.uniform(0.001, 2.0)])
+        entry = {
+            "sku": f"sku-{rng.randrange(size)}",
+            "category": rng.choice(["general", "compute", "memory", "burstable"]),
+            "vcpu": rng.choice([1, 2, 4, 8, 16, 32, 64]),
+            "ram_gb": rng.choice([0.5, 1, 2, 4, 8, 16, 32, 64, 128, 256]),
+            "price_per_hour": {"on_demand": price, "spot": price / 3} if rng.random() < 0.7 else price,
+        }
+        if rng.random() < 0.05:
+            del entry["category"]
+        catalog.append(entry)
+    return catalog
+
+
+def _random_target(rng):
+    return (
+        rng.choice([0, 1, 2, 3, 4, 6, 8, 12, 16, 48, 64, 100, rng.uniform(0, 80)]),
+        rng.choice([0, 0.5, 1, 3, 8, 16, 40, 64, 200, 300, rng.uniform(0, 300)]),
+    )
+
+
+def test_match_agrees_with_smart_match_on_random_catalogs():
+    rng = random.Random(1234)
+    for _ in range(300):
+        catalog = _random_catalog(rng, rng.randint(1, 40))
+        index = CatalogIndex(catalog, hourly_on_demand)
+        for _ in range(30):
+            cpu, ram = _random_target(rng)
+            assert index.match(cpu, ram) is smart_match(catalog, cpu, ram), (cpu, ram)
+
+
+def test_match_agrees_with_smart_match_on_shipped_catalogs():
+    for provider in ("aws", "azure", "gcp"):
+        catalog = load_catalog(provider)
+        index = CatalogIndex(catalog, hourly_on_demand)
+        for cpu in range(0, 70):
+            for ram in (0, 0.5, 1, 2, 3.5, 4, 8, 12, 16, 32, 64, 128, 256, 512):
+                assert index.match(cpu, ram) is smart_match(catalog, cpu, ram)
+
+
+def test_lookup_agrees_with_lookup_sku():
+    catalog = load_catalog("aws")
+    index = CatalogIndex(catalog, hourly_on_demand)
+    for sku in [e["sku"] for e in catalog] + [None, "", "does-not-exist"]:
+        assert index.lookup(sku) is lookup_sku(catalog, sku)
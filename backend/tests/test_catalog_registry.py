@@ -0,0 +1,60 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cloud_providers import catalog_pricing
+from cloud_providers.catalog_registry import CatalogRegistry
+
+
+def _write(path, data, mtime_ns):
+    path.write_text(json.dumps(data))
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_registry_parses_once_until_file_changes(tmp_path):
+    _write(tmp_path / "aws_catalog.json", [{"sku": "a"}], 1_000_000_000)
+    registry = CatalogRegistry(str(tmp_path))
+
+    first = registry.get("aws_catalog.json")
+    assert registry.get("aws_catalog.json") is first
+    assert registry.loads == 1
+
+    _write(tmp_path / "aws_catalog.json", [{"sku": "a"}, {"sku": "b"}], 2_000_000_000)
+    assert [e["sku"] for e in registry.get("aws_catalog.json")] == ["a", "b"]
+    assert registry.loads == 2
+
+
+def test_registry_derived_values_follow_reload(tmp_path):
+    _write(tmp_path / "gcp_catalog.json", [{"sku": "a"}], 1_000_000_000)
+    registry = CatalogRegistry(str(tmp_path))
+    calls = []
+
+    def builder(data):
+        calls.append(1)
+        return len(data)
+
+    assert registry.derive("gcp_catalog.json", "count", builder) == 1
+    assert registry.derive("gcp_catalog.json", "count", builder) == 1
+    _write(tmp_path / "gcp_catalog.json", [{"sku": "a"}, {"sku": "b"}], 2_000_000_000)
+    assert registry.derive("gcp_catalog.json", "count", builder) == 2
+    assert len(calls) == 2
+
+
+def test_registry_keeps_previous_version_on_partial_write(tmp_path):
+    _write(tmp_path / "aws_catalog.json", [{"sku": "a"}], 1_000_000_000)
+    registry = CatalogRegistry(str(tmp_path))
+    registry.get("aws_catalog.json")
+
+    (tmp_path / "aws_catalog.json").write_text('[{"sku": ')
+    assert registry.get("aws_catalog.json") == [{"sku": "a"}]
+
+
+def test_load_catalog_uses_shared_registry(monkeypatch, tmp_path):
+    _write(tmp_path / "aws_catalog.json", [{"sku": "a"}], 1_000_000_000)
+    registry = CatalogRegistry(str(tmp_path))
+    monkeypatch.setattr(catalog_pricing, "get_registry", lambda: registry)
+
+    assert catalog_pricing.load_catalog("aws") is catalog_pricing.load_catalog("aws")
+    assert registry.loads == 1
@@ -0,0 +1,94 @@
+import gzip
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import app
+from cloud_providers import catalog_response
+from cloud_providers.catalog_pricing import load_catalog, load_storage_rates
+from cloud_providers.catalog_registry import CatalogRegistry
+
+
+def test_catalog_body_matches_catalogs_and_revalidates():
+    client = app.test_client()
+    res = client.get("/api/catalog", headers={"Accept-Encoding": "identity"})
+    assert res.status_code == 200
+    assert res.get_json() == {
+        "aws": list(load_catalog("aws")),
+        "azure": list(load_catalog("azure")),
+        "gcp": list(load_catalog("gcp")),
+        "storage_rates": load_storage_rates(),
+    }
+    etag = res.headers["ETag"]
+    assert res.headers["Last-Modified"]
+    assert "Accept-Encoding" in res.headers["Vary"]
+
+    again = client.get("/api/catalog", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+
+
+def test_catalog_compressed_and_projected():
+    client = app.test_client()
+    res = client.get("/api/catalog?provider=aws&fields=sku,vcpu", headers={"Accept-Encoding": "gzip"})
+    assert res.status_code == 200
+    assert res.headers["Content-Encoding"] == "gzip"
+    data = json.loads(gzip.decompress(res.data))
+    assert list(data) == ["aws"]
+    assert data["aws"] == [{"sku": e["sku"], "vcpu": e["vcpu"]} for e in load_catalog("aws")]
+
+    assert client.get("/api/catalog?provider=oracle").status_code == 400
+
+
+def test_projection_keys_are_canonical():
+    catalog_response.clear_prepared()
+    body = catalog_response.prepared_catalog("aws", ("sku", "vcpu"))
+    assert catalog_response.prepared_catalog("aws", ("bogus", "sku", "vcpu")) is body
+    assert catalog_response.prepared_catalog("aws", ("sku", "vcpu"), region="us-east-1") is body
+    assert catalog_response.prepared_catalog("aws", ("a", "b")) is catalog_response.prepared_catalog("aws", ("c",))
+
+
+def test_prepared_body_rebuilt_on_catalog_change(tmp_path, monkeypatch):
+    catalog = [{"sku": "a", "vcpu": 2, "ram_gb": 4}]
+    (tmp_path / "aws_catalog.json").write_text(json.dumps(catalog))
+    registry = CatalogRegistry(data_dir=str(tmp_path))
+    monkeypatch.setattr(catalog_response, "get_registry", lambda: registry)
+    monkeypatch.setattr("cloud_providers.catalog_pricing.get_registry", lambda: registry)
+    catalog_response.clear_prepared()
+    try:
+        first = catalog_response.prepared_catalog("aws")
+        assert catalog_response.prepared_catalog("aws") is first
+
+        catalog.append({"sku": "b", "vcpu": 4, "ram_gb": 8})
+        (tmp_path / "aws_catalog.json").write_text(json.dumps(catalog))
+        second = catalog_response.prepared_catalog("aws")
+        assert second.etag() != first.etag()
+        assert json.loads(second.raw) == {"aws": catalog}
+    finally:
+        catalog_response.clear_prepared()
+
+
+def test_known_fields_computed_once_per_catalog_version(tmp_path, monkeypatch):
+    catalog = [{"sku": "a", "vcpu": 2}]
+    (tmp_path / "aws_catalog.json").write_text(json.dumps(catalog))
+    registry = CatalogRegistry(data_dir=str(tmp_path))
+    monkeypatch.setattr(catalog_response, "get_registry", lambda: registry)
+    monkeypatch.setattr("cloud_providers.catalog_pricing.get_registry", lambda: registry)
+    scans = []
+    entry_fields = catalog_response._entry_fields
+    monkeypatch.setattr(catalog_response, "_entry_fields", lambda data: scans.append(1) or entry_fields(data))
+    catalog_response.clear_prepared()
+    try:
+        body = catalog_response.prepared_catalog("aws", ("gpu", "sku"))
+        assert catalog_response.prepared_catalog("aws", ("sku",)) is body
+        assert len(scans) == 1
+
+        catalog.append({"sku": "b", "vcpu": 4, "gpu": 1})
+        (tmp_path / "aws_catalog.json").write_text(json.dumps(catalog))
+        body = catalog_response.prepared_catalog("aws", ("gpu", "sku"))
+        assert json.loads(body.raw) == {"aws": [{"sku": "a"}, {"sku": "b", "gpu": 1}]}
+        assert len(scans) == 2
+    finally:
+        catalog_response.clear_prepared()
@@ -0,0 +1,84 @@
+import json
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+
+from cloud_providers import catalog_pricing
+from cloud_providers.catalog_registry import CatalogRegistry
+from cloud_providers.catalog_snapshot import (
+    CatalogSnapshot,
+    SnapshotError,
+    snapshot_path,
+    write_catalog_snapshot,
+    write_snapshot,
+)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+
+@pytest.mark.parametrize("provider", ["aws", "azure", "gcp"])
+def test_snapshot_round_trips_shipped_catalogs(tmp_path, provider):
+    with open(os.path.join(DATA_DIR, f"{provider}_catalog.json")) as f:
+        catalog = json.load(f)
+    path = write_snapshot(catalog, str(tmp_path / f"{provider}.snap"))
+
+    snapshot = CatalogSnapshot(path)
+    assert len(snapshot) == len(catalog)
+    assert json.dumps(snapshot.to_list()) == json.dumps(catalog)
+    assert snapshot[-1] == catalog[-1]
+
+
+def test_snapshot_preserves_types_and_missing_fields(tmp_path):
+    catalog = [
+        {"sku": "a", "vcpu": 2, "ram_gb": 0.5, "price_per_hour": 0.01},
+        {"sku": "b", "vcpu": 4, "ram_gb": 16, "price_per_hour": {"on_demand": 0.2, "spot": 0.05}, "category": "memory"},
+        {"sku": "a", "vcpu": 8, "ram_gb": 32.0},
+    ]
+    snapshot = CatalogSnapshot(write_snapshot(catalog, str(tmp_path / "c.snap")))
+
+    assert json.dumps(list(snapshot)) == json.dumps(catalog)
+    assert snapshot.strings.count("a") == 1
+    assert snapshot.column("vcpu").flags.writeable is False
+
+
+def test_snapshot_rejects_unsupported_values(tmp_path):
+    with pytest.raises(SnapshotError):
+        write_snapshot([{"sku": "a", "tags": ["x"]}], str(tmp_path / "c.snap"))
+
+
+def test_registry_prefers_current_snapshot_and_ignores_stale_one(tmp_path):
+    shutil.copy(os.path.join(DATA_DIR, "aws_catalog.json"), tmp_path / "aws_catalog.json")
+    shutil.copy(os.path.join(DATA_DIR, "storage_rates.json"), tmp_path / "storage_rates.json")
+    json_path = str(tmp_path / "aws_catalog.json")
+    write_catalog_snapshot(json_path)
+
+    registry = CatalogRegistry(str(tmp_path))
+    assert isinstance(registry.get("aws_catalog.json"), CatalogSnapshot)
+
+    with open(json_path) as f:
+        edited = json.load(f)[:3]
+    with open(json_path, "w") as f:
+        json.dump(edited, f)
+    os.utime(json_path, ns=(1, 1))
+    assert registry.get("aws_catalog.json") == edited
+    assert os.path.exists(snapshot_path(json_path))
+
+
+def test_pricing_from_snapshot_matches_json(monkeypatch, tmp_path):
+    for name in ("aws_catalog.json", "azure_catalog.json", "gcp_catalog.json", "storage_rates.json"):
+        shutil.copy(os.path.join(DATA_DIR, name), tmp_path / name)
+    for provider in ("aws", "azure", "gcp"):
+        write_catalog_snapshot(str(tmp_path / f"{provider}_catalog.json"))
+    registry = CatalogRegistry(str(tmp_path))
+    args = dict(cpu=6, ram=40, storage=100, network=10, backup=50, sku=None,
+                pricing_model="reserved_1yr", instance_count=2, storage_type=None)
+
+    expected = {p: catalog_pricing.calculate_provider_cost(provider=p, **args) for p in ("aws", "azure", "gcp")}
+    monkeypatch.setattr(catalog_pricing, "get_registry", lambda: registry)
+    for provider in ("aws", "azure", "gcp"):
+        assert isinstance(catalog_pricing.load_catalog(provider), CatalogSnapshot)
+        assert catalog_pricing.calculate_provider_cost(provider=provider, **args) == expected[provider]
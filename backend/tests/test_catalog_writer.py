@@ -0,0 +1,41 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils import catalog_writer
+
+
+def test_write_if_changed_is_atomic_and_skips_identical_content(tmp_path, monkeypatch):
+    path = tmp_path / "catalog.json"
+    assert catalog_writer.write_if_changed(path, "[1]")
+    stamp = os.stat(path).st_mtime_ns
+    assert not catalog_writer.write_if_changed(path, "[1]")
+    assert os.stat(path).st_mtime_ns == stamp
+
+    def crash(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(catalog_writer.os, "replace", crash)
+    try:
+        catalog_writer.write_if_changed(path, "[2]")
+    except OSError:
+        pass
+    assert path.read_text() == "[1]"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["catalog.json"]
+
+
+def test_write_catalog_reports_price_changes(tmp_path):
+    path = tmp_path / "aws_catalog.json"
+    v1 = [{"sku": "m5.large", "price_per_hour": 0.096}, {"sku": "c5.large", "price_per_hour": {"on_demand": 0.085, "spot": 0.03}}]
+    written, changes = catalog_writer.write_catalog(path, v1)
+    assert written and len(changes) == 3
+
+    v2 = [{"sku": "m5.large", "price_per_hour": 0.096}, {"sku": "c5.large", "price_per_hour": {"on_demand": 0.09, "spot": 0.03}}]
+    written, changes = catalog_writer.write_catalog(path, v2)
+    assert written
+    assert changes == [{"sku": "c5.large", "model": "on_demand", "old": 0.085, "new": 0.09}]
+    assert catalog_writer.write_catalog(path, v2) == (False, [])
+    assert json.loads(path.read_text()) == v2
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["aws_catalog.json"]
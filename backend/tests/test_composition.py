@@ -0,0 +1,118 @@
+import os
+import random
+import sys
+from functools import lru_cache
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import app
+from cloud_providers.catalog_pricing import hourly_on_demand
+from cloud_providers.composition import FleetOptions, NodeConstraints, solve
+from cloud_providers.fleet import price_fleet
+from schemas import CalcPayload
+
+
+def _random_catalog(rng, size):
+    return [
+        {
+            "sku": f"sku-{i}",
+            "category": rng.choice(["general", "compute", "memory"]),
+            "vcpu": rng.choice([1, 2, 4, 8, 16]),
+            "ram_gb": rng.choice([0.5, 1, 2, 4, 8, 16, 32, 64]),
+            "price_per_hour": {"on_demand": round(rng.uniform(0.005, 2.0), 4)},
+        }
+        for i in range(size)
+    ]
+
+
+def _cheapest(catalog, cpu, ram, max_nodes=None):
+    """Reference: cheapest cover by exhaustive recursion over (cpu, ram, nodes) left."""
+    options = [(e["vcpu"], e["ram_gb"], hourly_on_demand(e)) for e in catalog]
+
+    @lru_cache(maxsize=None)
+    def best(cpu_left, ram_left, nodes_left):
+        if cpu_left <= 0 and ram_left <= 0:
+            return 0.0
+        if nodes_left == 0:
+            return float("inf")
+        return min(
+            p + best(max(cpu_left - v, 0), max(ram_left - r, 0), nodes_left - 1)
+            for v, r, p in options
+        )
+
+    return best(cpu, ram, -1 if max_nodes is None else max_nodes)
+
+
+def _check(fleet, cpu, ram, expected, max_nodes=None):
+    assert fleet is not None and fleet.optimal
+    assert fleet.vcpu >= cpu and fleet.ram_gb >= ram
+    assert abs(fleet.hourly - expected) < 1e-9
+    if max_nodes is not None:
+        assert fleet.nodes <= max_nodes
+
+
+def test_solver_finds_the_cheapest_mix_on_random_catalogs():
+    rng = random.Random(2020)
+    for _ in range(40):
+        catalog = _random_catalog(rng, rng.randint(1, 8))
+        options = FleetOptions(catalog, hourly_on_demand)
+        for _ in range(5):
+            cpu, ram = rng.randint(1, 24), rng.choice([0.5, 3, 10, 40, 70])
+            expected = _cheapest(catalog, cpu, ram)
+            # Grid DP and branch and bound must both reach the optimum.
+            _check(solve(options, cpu, ram), cpu, ram, expected)
+            _check(solve(options, cpu, ram, max_steps=10 ** 7, grid_cells=0), cpu, ram, expected)
+
+            max_nodes = rng.randint(1, 6)
+            expected = _cheapest(catalog, cpu, ram, max_nodes)
+            fleet = solve(options, cpu, ram, max_nodes=max_nodes, max_steps=10 ** 7)
+            if expected == float("inf"):
+                assert fleet is None
+            else:
+                _check(fleet, cpu, ram, expected, max_nodes)
+
+
+def test_node_constraints_filter_options():
+    catalog = [
+        {"sku": "small", "category": "general", "vcpu": 2, "ram_gb": 4, "price_per_hour": 0.04},
+        {"sku": "big", "category": "general", "vcpu": 16, "ram_gb": 64, "price_per_hour": 0.30},
+        {"sku": "mem", "category": "memory", "vcpu": 4, "ram_gb": 64, "price_per_hour": 0.30},
+    ]
+    fleet = solve(FleetOptions(catalog, hourly_on_demand), 16, 64)
+    assert [(entry["sku"], count) for entry, count, _ in fleet.items] == [("big", 1)]
+
+    constrained = FleetOptions(catalog, hourly_on_demand, NodeConstraints(max_vcpu=8))
+    fleet = solve(constrained, 16, 64)
+    assert {entry["sku"] for entry, _, _ in fleet.items} <= {"small", "mem"}
+    assert solve(constrained, 16, 64, max_nodes=1) is None
+    assert solve(FleetOptions(catalog, hourly_on_demand, NodeConstraints(categories=["compute"])), 1, 1) is None
+
+
+def test_calculate_optimal_composition():
+    client = app.test_client()
+    body = {"cpu": 6, "ram": 20, "storage": 10, "network": 1, "backup": 0, "instance_count": 3}
+    single = client.post("/api/calculate", json=body).get_json()
+    optimal = client.post("/api/calculate", json={**body, "composition": "optimal"}).get_json()
+
+    for provider in ("aws", "azure", "gcp"):
+        composition = optimal[provider]["composition"]
+        assert composition["feasible"] and composition["optimal"]
+        assert composition["vcpu"] >= 18 and composition["memory_gb"] >= 60
+        assert optimal[provider]["instance_count"] == composition["nodes"]
+        # Three copies of the single best match are one feasible mix.
+        assert optimal[provider]["breakdown"]["instance"] <= single[provider]["breakdown"]["instance"]
+        assert "composition" not in single[provider]
+
+    # An explicit SKU still wins over the solver.
+    pinned = client.post("/api/calculate", json={**body, "composition": "optimal", "aws_sku": "m5.large"}).get_json()
+    assert pinned["aws"]["selected_instance"]["sku"] == "m5.large"
+    assert "composition" not in pinned["aws"]
+
+    bad = client.post("/api/calculate", json={**body, "composition": "optimal",
+                                              "fleet_constraints": {"min_vcpu": 8, "max_vcpu": 4}})
+    assert bad.status_code == 400
+
+    # Fleet totals skip the vectorized engine for composed workloads.
+    workloads = [CalcPayload(**body, composition="optimal").model_dump()] * 2
+    totals = price_fleet(workloads, include_results=False)["totals"]
+    assert totals["aws"]["total"] == round(2 * optimal["aws"]["total"], 2)
@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cloud_providers import executor
+from cloud_providers.fleet import PROVIDERS
+from app import app
+from utils import metrics
+
+
+def _slow(**_):
+    time.sleep(1.0)
+    return {"provider": "slow", "total": 1}
+
+
+def _broken(**_):
+    raise RuntimeError("price source unavailable")
+
+
+def test_run_providers_returns_partial_results_within_timeout():
+    providers = {"aws": PROVIDERS["aws"], "slow": _slow, "broken": _broken}
+    payload = {"cpu": 2, "ram": 8, "storage": 100, "network": 10, "backup": 50}
+
+    started = time.monotonic()
+    results, status = executor.run_providers(payload, providers=providers, timeout=0.2)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.9
+    assert status == {"aws": "ok", "slow": "timeout", "broken": "error"}
+    assert results["aws"]["provider"] == "aws"
+    assert results["slow"]["status"] == "timeout"
+    assert results["broken"]["status"] == "error"
+
+
+def test_deadline_runs_from_start_and_unstarted_providers_are_queued(monkeypatch):
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(executor, "_executor", pool)
+
+    def sleeper(seconds):
+        def run(**_):
+            time.sleep(seconds)
+            return {"total": seconds}
+        return run
+
+    payload = {"cpu": 2}
+    try:
+        # The second provider finishes 0.25s after submission but only 0.1s after it started.
+        _, status = executor.run_providers(payload, {"a": sleeper(0.15), "b": sleeper(0.1)}, timeout=0.2)
+        assert status == {"a": "ok", "b": "ok"}
+
+        results, status = executor.run_providers(payload, {"a": sleeper(0.5), "b": sleeper(0)},
+                                                 timeout=0.1, queue_timeout=0.05)
+        assert status == {"a": "timeout", "b": "queued"}
+        assert results["b"]["status"] == "queued"
+    finally:
+        pool.shutdown(wait=True)
+
+
+def test_profiled_requests_record_provider_compute_time(monkeypatch):
+    monkeypatch.setattr(executor.profiling, "active", lambda: True)
+    before = metrics.PROVIDER_COMPUTE_SECONDS.count("aws", "ok")
+    _, status = executor.run_providers({"cpu": 2, "ram": 8, "storage": 100, "network": 10, "backup": 50})
+    assert status["aws"] == "ok"
+    assert metrics.PROVIDER_COMPUTE_SECONDS.count("aws", "ok") == before + 1
+
+
+def test_calculate_endpoint_reports_failed_provider(monkeypatch):
+    monkeypatch.setitem(PROVIDERS, "gcp", _broken)
+    client = app.test_client()
+    res = client.post("/api/calculate", json={"cpu": 2, "ram": 8, "storage": 100, "network": 10, "backup": 50})
+
+    assert res.status_code == 200
+    data = res.get_json()
+    assert data["status"]["gcp"] == "error"
+    assert data["status"]["aws"] == "ok"
+    assert data["aws"]["total"] >= 0
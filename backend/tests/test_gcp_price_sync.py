@@ -0,0 +1,118 @@
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import utils.gcp_price_sync as sync_mod
+
+
+def _sku(description, usage, nanos, regions=("us-central1", "europe-west1"), family="Compute", units="0"):
+    return {
+        "description": description,
+        "category": {"serviceDisplayName": "Compute Engine", "resourceFamily": family, "usageType": usage},
+        "serviceRegions": list(regions),
+        "pricingInfo": [{"pricingExpression": {"usageUnit": "h", "tieredRates": [
+            {"startUsageAmount": 0, "unitPrice": {"currencyCode": "USD", "units": units, "nanos": nanos}},
+        ]}}],
+    }
+
+
+# Recorded-shape Cloud Billing SKU listing, split over token-chained pages.
+PAGES = [
+    [
+        _sku("N2 Instance Core running in Americas", "OnDemand", 31611000),
+        _sku("N2 Instance Ram running in Americas", "OnDemand", 4237000),
+        _sku("Spot Preemptible N2 Instance Core running in Americas", "Preemptible", 7650000),
+    ],
+    [
+        _sku("Spot Preemptible N2 Instance Ram running in Americas", "Preemptible", 1025000),
+        _sku("Commitment v1: N2 Cpu in Americas for 1 Year", "Commit1Yr", 19915000),
+        _sku("Commitment v1: N2 Ram in Americas for 1 Year", "Commit1Yr", 2669000),
+        _sku("N2 Custom Instance Core running in Americas", "OnDemand", 33191000),
+        _sku("N2 Instance Core running in Zurich", "OnDemand", 40000000, regions=("europe-west6",)),
+    ],
+    [
+        _sku("Commitment v1: N2 Cpu in Americas for 3 Year", "Commit3Yr", 14225000),
+        _sku("Commitment v1: N2 Ram in Americas for 3 Year", "Commit3Yr", 1907000),
+        _sku("N1 Predefined Instance Core running in Americas", "OnDemand", 31611000, regions=("us-central1",)),
+        _sku("N1 Predefined Instance Ram running in Americas", "OnDemand", 4237000, regions=("us-central1",)),
+        _sku("Storage PD Capacity", "OnDemand", 40000000, family="Storage"),
+    ],
+]
+
+
+class _Listing(BaseHTTPRequestHandler):
+    tokens = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        token = query.get("pageToken", [""])[0]
+        self.tokens.append(token)
+        index = int(token or 0)
+        page = {"skus": PAGES[index]}
+        if index + 1 < len(PAGES):
+            page["nextPageToken"] = str(index + 1)
+        body = json.dumps(page).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def listing_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Listing)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1/services/6F81-5844-456A/skus"
+    server.shutdown()
+    server.server_close()
+
+
+def test_sync_prices_machine_types_for_every_region_in_one_pass(monkeypatch, tmp_path, listing_url):
+    catalog = [
+        {"sku": "n2-standard-4", "vcpu": 4, "ram_gb": 16, "price_per_hour": {"on_demand": 0.2}},
+        {"sku": "n1-standard-2", "vcpu": 2, "ram_gb": 7.5, "price_per_hour": {"on_demand": 0.1, "spot": 0.02}},
+        {"sku": "a2-highgpu-1g", "vcpu": 12, "ram_gb": 85, "price_per_hour": {"on_demand": 3.67}},
+    ]
+    (tmp_path / "gcp_catalog.json").write_text(json.dumps(catalog))
+    monkeypatch.setattr(sync_mod, "CATALOG_PATH", tmp_path / "gcp_catalog.json")
+    monkeypatch.setattr(sync_mod, "CACHE_PATH", tmp_path / "gcp_prices.json")
+    monkeypatch.setenv("PRICE_HISTORY_DB", str(tmp_path / "history.db"))
+    _Listing.tokens = []
+
+    results = sync_mod.sync_prices(write_back=True, regions=["us-central1", "europe-west1"], api_key="k",
+                                   base_url=listing_url, rate=1000)
+
+    assert _Listing.tokens == ["", "1", "2"]
+    assert results["us-central1"] == {"n2-standard-4": pytest.approx(0.194236), "n1-standard-2": pytest.approx(0.0949995),
+                                      "a2-highgpu-1g": None}
+    main = {e["sku"]: e["price_per_hour"] for e in json.loads((tmp_path / "gcp_catalog.json").read_text())}
+    assert main["n2-standard-4"] == {"on_demand": 0.194236, "spot": 0.0470, "reserved_1yr": 0.122364,
+                                     "reserved_3yr": 0.087412}
+    # Models the listing has no rates for (N1 spot here) are kept.
+    assert main["n1-standard-2"] == {"on_demand": round(2 * 0.031611 + 7.5 * 0.004237, 6), "spot": 0.02}
+    assert main["a2-highgpu-1g"] == {"on_demand": 3.67}
+
+    # europe-west1 has no catalog yet: seeded from the main one, keeping only the SKUs priced there.
+    regional = json.loads((tmp_path / "regions" / "gcp" / "europe-west1.json").read_text())
+    assert [entry["sku"] for entry in regional] == ["n2-standard-4"]
+
+
+def test_classify_sku_reads_descriptions():
+    assert sync_mod.classify_sku(_sku("N2D AMD Instance Core running in Americas", "OnDemand", 27502000)) == \
+        ("N2D", "core", "on_demand", 0.027502)
+    assert sync_mod.classify_sku(_sku("Compute optimized Ram running in Americas", "Preemptible", 1000000)) == \
+        ("C2", "ram", "spot", 0.001)
+    assert sync_mod.classify_sku(_sku("Commitment v1: Cpu in Americas for 1 Year", "Commit1Yr", 19915000)) == \
+        ("N1", "core", "reserved_1yr", 0.019915)
+    assert sync_mod.classify_sku(_sku("N1 Extended Instance Ram running in Americas", "OnDemand", 1)) is None
+    assert sync_mod.classify_sku(_sku("Licensing Fee for SQL Server", "OnDemand", 1)) is None
@@ -0,0 +1,120 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils import leader_lease, metrics, price_sync_scheduler
+from utils.leader_lease import Lease, run_as_leader
+
+
+def test_lease_has_one_owner_until_released_or_expired(tmp_path):
+    now = [1000.0]
+    first, second = (Lease("aws_price_sync", tmp_path, ttl=60, clock=lambda: now[0]) for _ in range(2))
+    assert first.acquire()
+    assert not second.acquire()
+    assert first.acquire()  # re-entrant for its owner
+
+    now[0] += 61  # the first owner stopped renewing
+    assert second.acquire()
+    assert not first.renew()
+    first.release(succeeded=True)  # no longer the owner: ignored
+    assert second.last_success() is None
+
+    second.release(succeeded=True)
+    assert second.last_success() == now[0]
+    assert first.acquire()
+
+
+def test_only_one_of_many_workers_runs_a_job(tmp_path):
+    runs = []
+    start = threading.Barrier(8)
+
+    def job():
+        runs.append(1)
+        time.sleep(0.2)
+
+    def worker():
+        start.wait()
+        run_as_leader("aws_price_sync", job, tmp_path)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(runs) == 1
+
+    # A worker whose jittered timer fires later sees the recent success and skips.
+    assert not run_as_leader("aws_price_sync", job, tmp_path)
+    assert run_as_leader("aws_price_sync", job, tmp_path, min_interval=0)
+
+    # A failed run records no success: later workers back off, then retry.
+    def fail():
+        raise RuntimeError("offer file unavailable")
+
+    try:
+        run_as_leader("azure_price_sync", fail, tmp_path)
+    except RuntimeError:
+        pass
+    assert not run_as_leader("azure_price_sync", job, tmp_path)
+    assert run_as_leader("azure_price_sync", job, tmp_path, retry_interval=0)
+    assert len(runs) == 3
+
+
+def test_scheduler_staggers_leader_jobs(monkeypatch, tmp_path):
+    monkeypatch.setenv("PRICE_SYNC_LOCK_DIR", str(tmp_path))
+    monkeypatch.setenv("GCP_API_KEY", "k")
+    calls = []
+    monkeypatch.setattr(price_sync_scheduler, "JOBS", [
+        (job_id, name, provider, lambda regions, provider=provider: calls.append(provider) or regions)
+        for job_id, name, provider, _ in price_sync_scheduler.JOBS
+    ])
+    price_sync_scheduler.start_scheduler(cron_hour=23, cron_minute=40)
+    try:
+        jobs = {job.id: job for job in price_sync_scheduler.scheduler.get_jobs()}
+        starts = {job_id: (str(job.trigger.fields[5]), str(job.trigger.fields[6])) for job_id, job in jobs.items()}
+        assert starts == {"aws_price_sync": ("23", "40"), "azure_price_sync": ("23", "55"), "gcp_price_sync": ("0", "10")}
+        assert all(job.trigger.jitter == price_sync_scheduler.JITTER_SECONDS for job in jobs.values())
+
+        # Two workers firing the same job: the second one is a follower.
+        before = metrics.PRICE_SYNC_RUNS.value("aws", "all", "skipped")
+        jobs["aws_price_sync"].func()
+        jobs["aws_price_sync"].func()
+        assert calls == ["aws"]
+        assert metrics.PRICE_SYNC_RUNS.value("aws", "all", "skipped") == before + 1
+        assert leader_lease.Lease("aws_price_sync").last_success() is not None
+    finally:
+        price_sync_scheduler.stop_scheduler()
+
+
+def test_failed_sync_backs_off_then_retries_only_failed_regions(monkeypatch, tmp_path):
+    from utils import azure_price_sync
+
+    monkeypatch.setenv("PRICE_SYNC_LOCK_DIR", str(tmp_path))
+    monkeypatch.setenv("AZURE_PRICE_SYNC_REGIONS", "eastus,westeurope")
+    calls = []
+
+    def sync_prices(write_back=False, region=None):
+        calls.append(region)
+        if region == "westeurope" and calls.count(region) == 1:
+            raise RuntimeError("Retail Prices API unavailable")
+        return {}
+
+    monkeypatch.setattr(azure_price_sync, "sync_prices", sync_prices)
+    job = price_sync_scheduler.leader_job("azure_price_sync", "azure", price_sync_scheduler.sync_azure_prices)
+
+    job()  # the leader: westeurope fails
+    assert calls == ["eastus", "westeurope"]
+    state = Lease("azure_price_sync").snapshot()
+    assert "last_success" not in state and state["last_attempt"]
+    assert set(state["parts"]) == {"eastus"}
+
+    job()  # a follower within the retry window skips
+    assert calls == ["eastus", "westeurope"]
+
+    monkeypatch.setattr(leader_lease, "RETRY_INTERVAL_SECONDS", 0)
+    job()  # after the window, only the failed region is retried
+    assert calls == ["eastus", "westeurope", "westeurope"]
+    assert Lease("azure_price_sync").last_success() is not None
@@ -0,0 +1,57 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import app
+from utils import metrics, price_sync_scheduler
+import utils.aws_price_sync as sync_mod
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = metrics.MetricsRegistry()
+    latency = registry.histogram("test_seconds", "Test latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.observe(value, '/a"b')
+    registry.counter("test_total", "Test counter.").inc()
+
+    lines = registry.render().splitlines()
+    assert "# TYPE test_seconds histogram" in lines
+    assert 'test_seconds_bucket{route="/a\\"b",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="/a\\"b",le="1"} 3' in lines
+    assert 'test_seconds_bucket{route="/a\\"b",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{route="/a\\"b"} 4' in lines
+    assert "test_total 1" in lines
+
+
+def test_calculate_reports_stages_and_metrics():
+    client = app.test_client()
+    payload = {"cpu": 2, "ram": 8, "storage": 100, "network": 10, "backup": 50}
+    before = metrics.HTTP_REQUEST_SECONDS.count("/api/calculate", "POST", "200")
+
+    first = client.post("/api/calculate", json=payload).headers["Server-Timing"]
+    second = client.post("/api/calculate", json=payload).headers["Server-Timing"]
+    stages = [part.split(";")[0] for part in first.split(", ")]
+    for name in ("validate", "catalog", "aws", "azure", "gcp", "cache", "serialize", "total"):
+        assert name in stages
+    assert 'cache;desc="miss"' in first
+    assert 'cache;desc="hit"' in second and "aws;" not in second
+
+    assert metrics.HTTP_REQUEST_SECONDS.count("/api/calculate", "POST", "200") == before + 2
+    response = client.get("/api/metrics")
+    assert response.content_type.startswith("text/plain")
+    text = response.get_data(as_text=True)
+    assert 'infracostiq_provider_compute_seconds_count{provider="aws",status="ok"}' in text
+    assert "infracostiq_result_cache_hit_ratio" in text
+
+
+def test_price_sync_outcomes_are_counted(monkeypatch):
+    def fail(**kwargs):
+        raise RuntimeError("offer file unavailable")
+
+    monkeypatch.setattr(sync_mod, "sync_prices_public", fail)
+    monkeypatch.setenv("PRICE_SYNC_REGIONS", "eu-west-1")
+    before = metrics.PRICE_SYNC_RUNS.value("aws", "eu-west-1", "error")
+    price_sync_scheduler.sync_aws_prices()
+    assert metrics.PRICE_SYNC_RUNS.value("aws", "eu-west-1", "error") == before + 1
+    assert metrics.PRICE_SYNC_SECONDS.count("aws", "eu-west-1") >= 1
@@ -0,0 +1,55 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import utils.aws_price_sync as sync_mod
+from app import app
+from utils.price_history import PriceHistory
+
+DAY = 86400
+START = 1767225600  # 2026-01-01T00:00:00Z
+
+
+def test_series_are_downsampled_per_model(tmp_path):
+    history = PriceHistory(tmp_path / "history.db")
+    for day in range(90):
+        history.record("aws", "us-east-1", {
+            "m5.xlarge": {"on_demand": 0.192 if day < 45 else 0.18, "reserved_1yr": 0.12},
+            "c5.large": {"on_demand": 0.085, "spot": None},
+        }, ts=START + day * DAY)
+    assert history.count() == 270
+
+    series = history.series("aws", "us-east-1", "m5.xlarge", start=START, end=START + 90 * DAY - 1, points=3)
+    assert list(series) == ["on_demand", "reserved_1yr"]
+    on_demand = series["on_demand"]
+    assert [bucket["count"] for bucket in on_demand] == [30, 30, 30]
+    assert on_demand[0] == {"ts": START, "min": 0.192, "max": 0.192, "avg": 0.192, "count": 30}
+    assert (on_demand[1]["min"], on_demand[1]["max"]) == (0.18, 0.192)
+
+    assert history.series("aws", "us-east-1", "m5.xlarge", "on_demand", START, START + DAY - 1)["on_demand"][0]["count"] == 1
+    assert history.series("aws", "eu-west-1", "m5.xlarge") == {}
+
+
+def test_sync_records_history_and_endpoint_serves_it(monkeypatch, tmp_path):
+    monkeypatch.setattr(sync_mod, "CATALOG_PATH", tmp_path / "catalog.json")
+    monkeypatch.setattr(sync_mod, "CACHE_PATH", tmp_path / "cache.json")
+    monkeypatch.setenv("PRICE_HISTORY_DB", str(tmp_path / "history.db"))
+    (tmp_path / "catalog.json").write_text(json.dumps([{"sku": "m5.large", "price_per_hour": 0.1}]))
+    attrs = {"location": "US East (N. Virginia)", "operatingSystem": "Linux", "tenancy": "Shared", "instanceType": "m5.large"}
+    offerings = {
+        "products": {"p": {"attributes": attrs}},
+        "terms": {"OnDemand": {"p": {"t": {"priceDimensions": {"d": {"pricePerUnit": {"USD": "0.0960"}}}}}}},
+    }
+    monkeypatch.setattr(sync_mod, "_download_public_offerings", lambda *args, **kwargs: offerings)
+    sync_mod.sync_prices_public()
+
+    client = app.test_client()
+    data = client.get("/api/prices/history?sku=m5.large&start=2020-01-01").get_json()
+    assert data["region"] == "us-east-1"
+    assert [(b["min"], b["count"]) for b in data["series"]["on_demand"]] == [(0.096, 1)]
+
+    assert client.get("/api/prices/history").status_code == 400
+    assert client.get("/api/prices/history?sku=m5.large&start=yesterday").status_code == 400
+    assert client.get("/api/prices/history?sku=m5.large&provider=ibm").status_code == 400
@@ -0,0 +1,59 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import app
+from utils import profiling
+
+PAYLOAD = {"cpu": 2, "ram": 8, "storage": 100, "network": 10, "backup": 50}
+
+
+def _leaf(n):
+    return sum(range(n))
+
+
+def _outer():
+    return _leaf(1000) + _leaf(2000)
+
+
+def test_deterministic_profile_records_nested_stacks():
+    result, profile = profiling.profile_call(profiling.DETERMINISTIC, _outer)
+    assert result == _outer()
+    assert not profiling.active()
+
+    stacks = profile.collapsed().splitlines()
+    leaf = [line for line in stacks if line.startswith("test_profiling:_outer;test_profiling:_leaf;builtins:sum ")]
+    assert leaf and int(leaf[0].rsplit(" ", 1)[1]) >= 0
+
+    tree = profile.tree()
+    outer = tree["children"][0]
+    assert outer["name"] == "test_profiling:_outer"
+    assert outer["children"][0]["name"] == "test_profiling:_leaf"
+    assert abs(tree["value"] - sum(profile.stacks.values())) < 1e-3
+
+
+def test_profile_header_requires_token_and_stores_profile(monkeypatch, tmp_path):
+    client = app.test_client()
+    assert client.get("/api/admin/profiles").status_code == 404
+
+    monkeypatch.setenv("PROFILING_TOKEN", "s3cret")
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+
+    ignored = client.post("/api/calculate", json=PAYLOAD, headers={"X-Profile": "deterministic", "X-Profile-Token": "x"})
+    assert ignored.status_code == 200 and "X-Profile-Id" not in ignored.headers
+    assert client.get("/api/admin/profiles").status_code == 403
+
+    auth = {"X-Profile-Token": "s3cret"}
+    response = client.post("/api/calculate", json=PAYLOAD, headers={"X-Profile": "deterministic", **auth})
+    assert response.status_code == 200
+    assert response.get_json() == client.post("/api/calculate", json=PAYLOAD).get_json()
+    profile_id = response.headers["X-Profile-Id"]
+
+    listed = client.get("/api/admin/profiles", headers=auth).get_json()
+    assert [p["id"] for p in listed] == [profile_id]
+    collapsed = client.get(f"/api/admin/profiles/{profile_id}?format=collapsed", headers=auth).get_data(as_text=True)
+    assert "cloud_providers.catalog_pricing:calculate_provider_cost" in collapsed
+    stored = client.get(f"/api/admin/profiles/{profile_id}", headers=auth).get_json()
+    assert stored["mode"] == "deterministic" and stored["unit"] == "microseconds"
+    assert client.get("/api/admin/profiles/..%2Fsecrets", headers=auth).status_code == 404
@@ -0,0 +1,90 @@
+import json
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+
+from app import app
+from cloud_providers import catalog_registry, regions
+from cloud_providers.catalog_pricing import calculate_provider_cost
+from cloud_providers.catalog_registry import DATA_DIR, CatalogRegistry
+from utils import aws_price_sync as sync_mod
+from utils import price_sync_scheduler
+
+
+@pytest.fixture
+def region_registry(monkeypatch, tmp_path):
+    """Registry over a copy of the shipped data plus an eu-west-1 AWS catalog at double the price."""
+    for name in os.listdir(DATA_DIR):
+        if name.endswith(".json"):
+            shutil.copy(os.path.join(DATA_DIR, name), tmp_path / name)
+    catalog = json.loads((tmp_path / "aws_catalog.json").read_text())
+    for entry in catalog:
+        entry["price_per_hour"] = {model: price * 2 for model, price in entry["price_per_hour"].items()}
+    (tmp_path / "regions" / "aws").mkdir(parents=True)
+    (tmp_path / "regions" / "aws" / "eu-west-1.json").write_text(json.dumps(catalog))
+
+    registry = CatalogRegistry(str(tmp_path))
+    monkeypatch.setattr(catalog_registry, "_registry", registry)
+    return registry
+
+
+def test_region_catalog_is_loaded_on_first_use(region_registry):
+    kwargs = dict(cpu=4, ram=16, storage=0, network=0, backup=0, sku="m6i.xlarge",
+                  pricing_model="on_demand", instance_count=1, storage_type=None)
+    default = calculate_provider_cost("aws", **kwargs)
+    assert default["region"] == "us-east-1"
+    assert regions.catalog_file("aws", "eu-west-1") not in region_registry._entries
+
+    ireland = calculate_provider_cost("aws", region=["westeurope", "eu-west-1"], **kwargs)
+    assert ireland["region"] == "eu-west-1"
+    assert ireland["selected_instance"]["price_per_hour"] == round(default["selected_instance"]["price_per_hour"] * 2, 5)
+    assert regions.available_regions("aws") == ("us-east-1", "eu-west-1")
+    assert regions.available_regions("azure") == ("eastus",)
+
+
+def test_calculate_compares_requested_regions(region_registry):
+    client = app.test_client()
+    payload = {"cpu": 4, "ram": 16, "storage": 100, "network": 10, "backup": 50}
+    res = client.post("/api/calculate", json={**payload, "region": ["eu-west-1", "us-east-1", "eastus"]})
+    assert res.status_code == 200
+    data = res.get_json()
+    assert data["aws"]["region"] == "eu-west-1"
+    assert data["azure"]["region"] == "eastus"
+    assert set(data["regions"]["aws"]) == {"eu-west-1", "us-east-1"}
+    assert data["regions"]["aws"]["eu-west-1"]["total"] > data["regions"]["aws"]["us-east-1"]["total"]
+    assert "gcp" not in data["regions"]
+
+    assert client.post("/api/calculate", json={**payload, "region": "mars-1"}).status_code == 400
+
+
+def test_region_sync_seeds_catalog_and_scheduler_uses_region_codes(monkeypatch, tmp_path):
+    monkeypatch.setattr(sync_mod, "CATALOG_PATH", tmp_path / "aws_catalog.json")
+    monkeypatch.setattr(sync_mod, "CACHE_PATH", tmp_path / "aws_prices.json")
+    (tmp_path / "aws_catalog.json").write_text(json.dumps([
+        {"sku": "m5.large", "price_per_hour": 0.096},
+        {"sku": "x9.huge", "price_per_hour": 9.0},
+    ]))
+    attrs = {"location": "EU (Ireland)", "operatingSystem": "Linux", "tenancy": "Shared", "instanceType": "m5.large"}
+    offerings = {
+        "products": {"p": {"attributes": attrs}},
+        "terms": {"OnDemand": {"p": {"t": {"priceDimensions": {"d": {"pricePerUnit": {"USD": "0.107"}}}}}}},
+    }
+    calls = []
+
+    def download(**kwargs):
+        calls.append(kwargs)
+        return offerings
+
+    monkeypatch.setattr(sync_mod, "_download_public_offerings", download)
+    monkeypatch.setenv("PRICE_SYNC_REGIONS", "eu-west-1")
+    price_sync_scheduler.sync_aws_prices()
+
+    assert calls[0]["region"] == "eu-west-1"
+    assert calls[0]["location"] == "EU (Ireland)"
+    synced = json.loads((tmp_path / "regions" / "aws" / "eu-west-1.json").read_text())
+    assert synced == [{"sku": "m5.large", "price_per_hour": 0.107}]
+    assert json.loads((tmp_path / "aws_catalog.json").read_text())[0]["price_per_hour"] == 0.096
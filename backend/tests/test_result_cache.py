@@ -0,0 +1,71 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import app
+from utils.result_cache import ResultCache, get_result_cache, payload_key
+
+
+def test_payload_key_canonicalizes_floats_and_order():
+    assert payload_key({"cpu": 2, "ram": 8.0, "storage": -0.0}) == payload_key({"storage": 0, "ram": 8, "cpu": 2.0})
+    assert payload_key({"cpu": 2, "ram": 8}) != payload_key({"cpu": 2, "ram": 8.5})
+
+
+def test_lru_ttl_and_memory_bounds():
+    now = [0.0]
+    cache = ResultCache(max_entries=2, ttl=10, max_bytes=100, sizeof=lambda value: value, clock=lambda: now[0])
+    cache.put("a", 10)
+    cache.put("b", 10)
+    assert cache.get("a") == 10
+    cache.put("c", 10)  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    cache.put("d", 85)  # over max_bytes: evicts "a" so that "c" and "d" fit
+    assert cache.bytes == 95
+    assert cache.get("c") == 10
+    assert cache.get("d") == 85
+    now[0] = 11
+    assert cache.get("d") is None
+    stats = cache.stats()
+    assert stats["evictions"] == 2
+    assert stats["expirations"] == 1
+
+
+def test_concurrent_identical_requests_compute_once():
+    cache = ResultCache()
+    calls = []
+    started = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return {"total": 1}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{"total": 1}] * 8
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["coalesced"] + cache.stats()["hits"] == 7
+
+
+def test_calculate_endpoint_hits_cache():
+    client = app.test_client()
+    before = get_result_cache().stats()
+    payload = {"cpu": 2, "ram": 8, "storage": 100, "network": 10, "backup": 50}
+    first = client.post("/api/calculate", json=payload).get_json()
+    second = client.post("/api/calculate", json={**payload, "ram": 8.0, "instance_count": 1}).get_json()
+
+    assert first == second
+    stats = client.get("/api/cache/stats").get_json()
+    assert stats["misses"] - before["misses"] == 1
+    assert stats["hits"] - before["hits"] == 1
+    assert get_result_cache().stats()["entries"] == 1
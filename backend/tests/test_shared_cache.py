@@ -0,0 +1,93 @@
+import json
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cloud_providers.catalog_snapshot import CatalogSnapshot, load_catalog_file
+from utils import shared_cache
+from utils.catalog_writer import write_catalog
+from utils.result_cache import ResultCache
+from utils.shared_cache import CacheServer, SharedCache
+
+
+def _serve(tmp_path):
+    server = CacheServer(str(tmp_path / "cache.sock"))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_daemon_epochs_reject_stale_writes(tmp_path):
+    server = _serve(tmp_path)
+    try:
+        first, second = SharedCache(server.server_address), SharedCache(server.server_address)
+        epoch, value = first.get(b"k")
+        assert (epoch, value) == (0, None)
+        assert first.put(epoch, b"k", b"v" * 100000)
+        assert second.get(b"k") == (0, b"v" * 100000)
+
+        assert second.bump() == 1
+        assert first.get(b"k") == (1, None)
+        # Computed before the bump: not published after it.
+        assert not first.put(epoch, b"k", b"stale")
+        assert first.get(b"k") == (1, None)
+        assert second.stats()["stale_writes"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    # A missing daemon is a miss, not an error, and is not retried until the backoff passes.
+    first.close()
+    assert first.get(b"k") == (None, None)
+    assert not first.put(1, b"k", b"v")
+    assert first.errors == 1
+
+
+def test_workers_share_results_and_catalog_writes_invalidate_them(tmp_path, monkeypatch):
+    server = _serve(tmp_path)
+    monkeypatch.setenv("SHARED_CACHE_SOCKET", server.server_address)
+    try:
+        workers = [ResultCache(shared=shared_cache.get_shared_cache()) for _ in range(2)]
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return [{"aws": {"total": 1.5}}, {"aws": "ok"}]
+
+        key = ((("aws_catalog.json", (1, 2)),), (("cpu", 2.0),))
+        assert workers[0].get_or_compute(key, compute) == compute()
+        calls.clear()
+        assert workers[1].get_or_compute(key, compute) == [{"aws": {"total": 1.5}}, {"aws": "ok"}]
+        assert not calls and workers[1].stats()["shared_hits"] == 1
+
+        # A written catalog drops every worker's shared results at once.
+        assert write_catalog(tmp_path / "aws_catalog.json", [{"sku": "a", "price_per_hour": 1.0}])[0]
+        assert server.epoch == 1
+        workers[1].clear()
+        workers[1].get_or_compute(key, compute)
+        assert len(calls) == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_workers_map_one_shared_catalog_snapshot(tmp_path, monkeypatch):
+    shared_dir = tmp_path / "shm"
+    monkeypatch.setenv("SHARED_SNAPSHOT_DIR", str(shared_dir))
+    path = tmp_path / "aws_catalog.json"
+    path.write_text(json.dumps([{"sku": "a", "vcpu": 2, "price_per_hour": {"on_demand": 0.1}}]))
+
+    first = load_catalog_file(str(path))
+    second = load_catalog_file(str(path))
+    assert isinstance(first, CatalogSnapshot) and second.path == first.path
+    assert second[0] == {"sku": "a", "vcpu": 2, "price_per_hour": {"on_demand": 0.1}}
+
+    path.write_text(json.dumps([{"sku": "b", "vcpu": 4, "price_per_hour": {"on_demand": 0.2}}]))
+    updated = load_catalog_file(str(path))
+    assert updated[0]["sku"] == "b"
+    assert os.listdir(shared_dir) == [os.path.basename(updated.path)]
+
+    rates = tmp_path / "storage_rates.json"
+    rates.write_text(json.dumps({"aws": {"gp3": 0.08}}))
+    assert load_catalog_file(str(rates)) == {"aws": {"gp3": 0.08}}
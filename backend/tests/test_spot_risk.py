@@ -0,0 +1,93 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import app
+from cloud_providers import spot_risk
+from cloud_providers.catalog_pricing import HOURS_PER_MONTH
+from cloud_providers.fleet import price_fleet
+from schemas import CalcPayload
+
+
+def test_simulation_matches_closed_forms():
+    rng = np.random.default_rng(0)
+    # No volatility and no interruptions: every trajectory is the flat spot month.
+    costs, interruptions = spot_risk.simulate([(3, 0.05, 0.2, 0.0, 0.2, 0.0, 4.0)], 1000, rng)
+    assert np.allclose(costs, 3 * 0.05 * HOURS_PER_MONTH) and not interruptions.any()
+
+    # The mean price stays at the spot rate; each interruption adds its fallback premium.
+    line = (2, 0.05, 0.2, 0.08, 0.15, 1.5, 4.0)
+    costs, interruptions = spot_risk.simulate([line], 50000, rng)
+    expected = 2 * (0.05 * HOURS_PER_MONTH + 1.5 * 4.0 * (0.2 - 0.05))
+    assert abs(costs.mean() - expected) / expected < 0.01
+    assert abs(interruptions.mean() - 1.5) < 0.05
+
+    summary = spot_risk.bands(costs, interruptions)
+    assert summary["p50"] <= summary["p90"] <= summary["p99"]
+    assert summary["trajectories"] == 50000
+
+
+def test_calculate_spot_risk():
+    client = app.test_client()
+    body = {"cpu": 4, "ram": 16, "storage": 10, "network": 1, "backup": 0, "instance_count": 3,
+            "pricing_model": "spot"}
+    plain = client.post("/api/calculate", json=body).get_json()
+    first = client.post("/api/calculate", json={**body, "spot_risk": {"trajectories": 5000, "seed": 7}}).get_json()
+    again = client.post("/api/calculate", json={**body, "spot_risk": {"trajectories": 5000, "seed": 7}}).get_json()
+
+    for provider in ("aws", "azure", "gcp"):
+        risk = first[provider]["spot_risk"]
+        assert risk["trajectories"] == 5000
+        assert risk["models"][0]["sku"] == first[provider]["selected_instance"]["sku"]
+        # Interruptions only ever add on-demand premiums to the fixed-rate total.
+        assert risk["expected"] > plain[provider]["total"]
+        assert risk == again[provider]["spot_risk"]
+        assert first[provider]["breakdown"] == plain[provider]["breakdown"]
+    assert "spot_risk" not in first["onprem"]
+
+    assert client.post("/api/calculate", json={**body, "pricing_model": "on_demand", "spot_risk": {}}).status_code == 400
+    assert client.post("/api/calculate", json={**body, "spot_risk": {"trajectories": 10}}).status_code == 400
+
+
+def test_fleet_spot_risk_is_the_same_on_the_process_pool(monkeypatch):
+    body = {"cpu": 4, "ram": 16, "storage": 10, "network": 1, "backup": 0, "pricing_model": "spot"}
+    workloads = [
+        CalcPayload(**body, instance_count=2, spot_risk={"trajectories": 2000, "seed": 3}).model_dump(),
+        CalcPayload(**body, instance_count=5, spot_risk={"trajectories": 2000}).model_dump(),
+        CalcPayload(**body, instance_count=1).model_dump(),
+    ]
+    inline = price_fleet(workloads, include_results=True)
+
+    monkeypatch.setattr(spot_risk, "POOL_MIN_WORK", 0)
+    monkeypatch.setattr(spot_risk, "SPOT_SIM_WORKERS", 2)
+    pooled = price_fleet(workloads, include_results=True)
+
+    assert pooled == inline
+    for provider in ("aws", "azure", "gcp"):
+        totals = inline["totals"][provider]
+        assert totals["spot_risk"]["expected"] > totals["total"]
+        rows = [row[provider] for row in inline["results"]]
+        assert "spot_risk" in rows[0] and "spot_risk" in rows[1] and "spot_risk" not in rows[2]
+
+
+def test_fleet_spot_risk_caps_trajectories_times_lines(monkeypatch):
+    body = {"cpu": 4, "ram": 16, "storage": 10, "network": 1, "backup": 0, "pricing_model": "spot",
+            "spot_risk": {"trajectories": 200000}}
+    workloads = [CalcPayload(**body).model_dump() for _ in range(4)]
+
+    # 4 workloads x 3 providers = 12 lines: 200000 trajectories is scaled down to fit.
+    monkeypatch.setattr(spot_risk, "MAX_FLEET_WORK", 12 * 1500)
+    priced = price_fleet(workloads, include_results=True)
+    assert priced["totals"]["aws"]["spot_risk"]["trajectories"] == 1500
+    assert priced["results"][0]["gcp"]["spot_risk"]["trajectories"] == 1500
+
+    monkeypatch.setattr(spot_risk, "MAX_FLEET_WORK", 12 * 999)
+    with pytest.raises(spot_risk.FleetTooLarge):
+        price_fleet(workloads, include_results=True)
+    res = app.test_client().post("/api/calculate/batch", json=[body] * 4)
+    assert res.status_code == 400
+    assert "spot_risk" in res.get_json()["details"]
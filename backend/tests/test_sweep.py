@@ -0,0 +1,82 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from app import app
+from cloud_providers.fleet import price_workload
+from cloud_providers.sweep import decode_cube, encode_cube, sweep_grid
+
+
+def test_sweep_cube_matches_scalar_pricing():
+    axes = {"cpu": [2, 6, 48], "ram": [4.0, 30.0, 384.0], "instance_count": [1, 3]}
+    fixed = {"storage": 120, "network": 15, "backup": 40}
+    result = sweep_grid(axes, fixed, pricing_models=["on_demand", "spot"])
+    totals = result["totals"]
+    assert totals.shape == (5, 2, 3, 3, 2)
+
+    for i, cpu in enumerate(axes["cpu"]):
+        for j, ram in enumerate(axes["ram"]):
+            for k, count in enumerate(axes["instance_count"]):
+                for m, model in enumerate(result["pricing_models"]):
+                    scalar = price_workload(
+                        {"cpu": cpu, "ram": ram, "instance_count": count, "pricing_model": model, **fixed}
+                    )
+                    for p, provider in enumerate(result["providers"]):
+                        assert totals[p, m, i, j, k] == scalar[provider]["total"], (provider, model, cpu, ram, count)
+
+
+def test_binary_cube_round_trip():
+    result = sweep_grid({"cpu": [2, 4], "ram": [8.0]}, {"storage": 10}, providers=["aws", "onprem"])
+    decoded = decode_cube(encode_cube(result))
+    assert decoded["offset"] % 8 == 0
+    assert decoded["dims"] == ["provider", "pricing_model", "cpu", "ram"]
+    np.testing.assert_array_equal(decoded["totals"], result["totals"])
+
+
+def test_sweep_endpoint():
+    client = app.test_client()
+    res = client.post("/api/sweep", json={
+        "axes": {"cpu": {"start": 2, "stop": 8, "step": 2}, "ram": [8, 16]},
+        "storage": 100,
+        "providers": ["gcp", "kubernetes"],
+        "pricing_models": ["reserved_1yr"],
+    })
+    assert res.status_code == 200
+    data = res.get_json()
+    assert data["axes"]["cpu"] == [2, 4, 6, 8]
+    assert data["shape"] == [2, 1, 4, 2]
+
+    binary = client.post("/api/sweep?format=binary", json={"axes": {"cpu": [2], "ram": [8]}})
+    assert decode_cube(binary.data)["totals"].shape == (5, 4, 1, 1)
+
+    too_big = {"axes": {"cpu": {"start": 1, "stop": 1000}, "ram": {"start": 1, "stop": 1000}}}
+    assert client.post("/api/sweep", json=too_big).status_code == 413
+    assert client.post("/api/sweep", json={"axes": {"ram": [8]}}).status_code == 400
+
+
+def test_sweep_rejects_non_object_bodies_and_unbounded_ranges():
+    client = app.test_client()
+    res = client.post("/api/sweep", json=[1])
+    assert res.status_code == 400
+    assert res.get_json()["details"] == "expected a JSON object"
+
+    overflow = {"axes": {"cpu": [2], "ram": {"start": 0, "stop": 1e308, "step": 1e-300}}}
+    res = client.post("/api/sweep", json=overflow)
+    assert res.status_code == 400
+    assert any("more than" in detail["msg"] for detail in res.get_json()["details"])
+
+
+def test_sweep_rejects_non_finite_and_oversized_axis_values():
+    client = app.test_client()
+    for body in (
+        '{"axes": {"cpu": [Infinity]}, "ram": 4}',
+        '{"axes": {"ram": [NaN]}, "cpu": 2}',
+        '{"axes": {"cpu": [2]}, "ram": Infinity}',
+        '{"axes": {"cpu": [2000000]}, "ram": 4}',
+        '{"axes": {"cpu": {"start": 1, "stop": 1e300, "step": 1e297}}, "ram": 4}',
+    ):
+        res = client.post("/api/sweep", data=body, content_type="application/json")
+        assert res.status_code == 400, body
@@ -0,0 +1,64 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from cloud_providers.catalog_pricing import load_catalog, load_storage_rates
+from cloud_providers.fleet import BREAKDOWN_KEYS, price_fleet, price_workload
+from cloud_providers.vectorized import payload_columns, price_columns, round_half_even_like_python
+from schemas import CalcPayload
+
+
+def _random_workloads(rng, n):
+    rates = load_storage_rates()
+    skus = {p: [e["sku"] for e in load_catalog(p)] for p in ("aws", "azure", "gcp")}
+    workloads = []
+    for _ in range(n):
+        row = {
+            "cpu": rng.choice([0, 1, 2, 3, 4, 8, 16, 48, 96, rng.randint(0, 200)]),
+            "ram": rng.choice([0, 0.5, 4, 8, 16, 64, 256, round(rng.uniform(0, 1024), 3)]),
+            "storage": round(rng.uniform(0, 20000), rng.choice([0, 2, 7])),
+            "network": round(rng.uniform(0, 2000), rng.choice([0, 1, 5])),
+            "backup": round(rng.uniform(0, 50000), rng.choice([0, 3])),
+            "instance_count": rng.choice([1, 1, 2, 3, 7, 500]),
+            "pricing_model": rng.choice(["on_demand", "reserved_1yr", "reserved_3yr", "spot"]),
+        }
+        for provider in ("aws", "azure", "gcp"):
+            if rng.random() < 0.3:
+                row[f"{provider}_sku"] = rng.choice(skus[provider] + ["unknown-sku"])
+            if rng.random() < 0.5:
+                row[f"{provider}_storage_type"] = rng.choice(list(rates[provider]) + ["bogus"])
+        workloads.append(CalcPayload(**row).model_dump())
+    return workloads
+
+
+def test_vectorized_engine_agrees_with_scalar_functions_to_the_cent():
+    workloads = _random_workloads(random.Random(42), 400)
+    arrays = price_columns(**payload_columns(workloads))
+
+    for i, d in enumerate(workloads):
+        expected = price_workload(d)
+        for provider, keys in BREAKDOWN_KEYS.items():
+            assert arrays[provider]["total"][i] == expected[provider]["total"], (provider, d)
+            for key in keys:
+                assert arrays[provider][key][i] == expected[provider]["breakdown"][key], (provider, key, d)
+        for provider in ("aws", "azure", "gcp"):
+            assert arrays[provider]["storage_type"][i] == expected[provider]["storage_type"]
+            assert arrays[provider]["price_per_hour"][i] == expected[provider]["selected_instance"]["price_per_hour"]
+            sku = load_catalog(provider)[arrays[provider]["selected"][i]]["sku"]
+            assert sku == expected[provider]["selected_instance"]["sku"]
+        assert arrays["onprem"]["capex_monthly"][i] == expected["onprem"]["capex_monthly"]
+        assert arrays["onprem"]["opex_monthly"][i] == expected["onprem"]["opex_monthly"]
+
+
+def test_round_matches_builtin_round_on_ties():
+    values = np.array([2.675, 1.005, 0.125, 0.285, 1.115, 10.0, -0.005, 123456.785])
+    assert round_half_even_like_python(values).tolist() == [round(float(v), 2) for v in values]
+
+
+def test_fleet_totals_agree_between_vectorized_and_scalar_paths():
+    workloads = _random_workloads(random.Random(7), 200)
+    assert price_fleet(workloads, include_results=False)["totals"] == price_fleet(workloads)["totals"]
@@ -0,0 +1,120 @@
+"""Streaming reader for the AWS public EC2 offer file.
+
+The AmazonEC2 `index.json` is several gigabytes. `stream_offerings` walks it with
+an incremental JSON parser and keeps only the products matching the requested
+location / operating system / tenancy (and optionally instance types), plus
+their OnDemand and Reserved terms. Peak memory is bounded by the filtered
+output rather than by the size of the file.
+
+The result has the same shape as the parsed offer file
+(`{"products": {...}, "terms": {"OnDemand": {...}, "Reserved": {...}}}`), so it
+can be passed to the existing extraction helpers in `utils.aws_price_sync`.
+
+The reader relies on AWS offer files listing `products` before `terms`, which
+is how they are published.
+"""
+import logging
+from pathlib import Path
+from typing import IO, Iterable, Iterator, Optional, Tuple, Union
+
+try:
+    import ijson
+    from ijson.common import ObjectBuilder
+except Exception:  # pragma: no cover - ijson may not be available in every env
+    ijson = None
+    ObjectBuilder = None
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_TERM_TYPES = ('OnDemand', 'Reserved')
+
+Event = Tuple[str, str, object]
+
+
+def _take_value(events: Iterator[Event]):
+    """Consume one complete JSON value from `events` and return it."""
+    builder = ObjectBuilder()
+    depth = 0
+    for _, event, value in events:
+        builder.event(event, value)
+        if event in ('start_map', 'start_array'):
+            depth += 1
+        elif event in ('end_map', 'end_array'):
+            depth -= 1
+        if depth == 0:
+            return builder.value
+    raise ValueError('offer file ended in the middle of a value')
+
+
+def _skip_value(events: Iterator[Event]) -> None:
+    """Consume one complete JSON value from `events` without building it."""
+    depth = 0
+    for _, event, _ in events:
+        if event in ('start_map', 'start_array'):
+            depth += 1
+        elif event in ('end_map', 'end_array'):
+            depth -= 1
+        if depth == 0:
+            return
+    raise ValueError('offer file ended in the middle of a value')
+
+
+def _product_matches(product: dict, location: str, operating_system: str, tenancy: str,
+                     instance_types: Optional[set]) -> bool:
+    attrs = product.get('attributes', {})
+    return (attrs.get('location') == location and
+            attrs.get('operatingSystem') == operating_system and
+            attrs.get('tenancy') == tenancy and
+            (instance_types is None or attrs.get('instanceType') in instance_types))
+
+
+def _stream_events(fileobj: IO[bytes]) -> Iterator[Event]:
+    if ijson is None:
+        raise RuntimeError('ijson is required to stream the EC2 offer file; install it from requirements.txt')
+    return iter(ijson.parse(fileobj, use_float=True))
+
+
+def stream_offerings(
+    source: Union[str, Path, IO[bytes]],
+    location: str = 'US East (N. Virginia)',
+    operating_system: str = 'Linux',
+    tenancy: str = 'Shared',
+    instance_types: Optional[Iterable[str]] = None,
+    term_types: Iterable[str] = DEFAULT_TERM_TYPES,
+) -> dict:
+    """Incrementally parse an EC2 offer file and return only the matching subset.
+
+    `source` is a path to a local copy of the offer file or a binary file-like
+    object (for example a streamed HTTP response body).
+    """
+    if isinstance(source, (str, Path)):
+        with open(source, 'rb') as f:
+            return stream_offerings(f, location, operating_system, tenancy, instance_types, term_types)
+
+    wanted_types = None if instance_types is None else set(instance_types)
+    wanted_terms = set(term_types)
+    products = {}
+    terms = {term_type: {} for term_type in wanted_terms}
+    scanned = 0
+
+    events = _stream_events(source)
+    for prefix, event, value in events:
+        if event != 'map_key':
+            continue
+        if prefix == 'products':
+            product = _take_value(events)
+            scanned += 1
+            if _product_matches(product, location, operating_system, tenancy, wanted_types):
+                products[value] = product
+        elif prefix == 'terms':
+            if value not in wanted_terms:
+                _skip_value(events)
+        elif prefix.startswith('terms.') and prefix.count('.') == 1:
+            term_type = prefix[len('terms.'):]
+            if value in products:
+                terms[term_type][value] = _take_value(events)
+            else:
+                _skip_value(events)
+
+    LOG.info('Streamed offer file; kept %d of %d products', len(products), scanned)
+    return {'products': products, 'terms': terms}
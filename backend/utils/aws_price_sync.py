@@ -8,18 +8,32 @@ Provides a small CLI to refresh hourly on-demand prices for SKUs in
 Usage (local, public mode — no credentials needed):
   python -m utils.aws_price_sync --public --write-catalog
 
+Usage (public mode against a local copy of the offer file, no network):
+  python -m utils.aws_price_sync --public --offer-file /path/to/index.json
+
+Usage (another region; writes backend/data/regions/aws/<region>.json):
+  python -m utils.aws_price_sync --public --write-catalog --region eu-west-1
+
 Usage (with boto3, requires AWS credentials):
-  python -m utils.aws_price_sync --write-catalog
+  python -m utils.aws_price_sync --write-catalog [--workers 8] [--rate 10]
+
+The boto3 mode queries SKUs in batches (one `ANY_OF` instance type filter per
+query), concurrently on a bounded worker pool sharing one client,
+rate-limited by a token bucket; it follows `NextToken` pagination and retries
+throttled calls with jittered backoff.
 
 The script writes a cache file at `backend/cache/aws_prices.json` and optionally
-overwrites the catalog with updated `price_per_hour` values when `--write-catalog`
-is passed.
+updates the catalog's `price_per_hour` values when `--write-catalog` is passed.
+Files are only replaced when their content changed, atomically (see
+`utils.catalog_writer`).
 """
 import argparse
 import json
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
 
 try:
     import boto3
@@ -31,6 +45,11 @@ try:
 except Exception:
     requests = None
 
+from cloud_providers.regions import AWS_LOCATIONS, DEFAULT_REGIONS, catalog_file
+from utils.aws_offer_stream import ijson, stream_offerings
+from utils.catalog_sync import apply_prices, load_catalog, record_history, write_results
+from utils.rate_limit import TokenBucket, call_with_retries
+
 LOG = logging.getLogger(__name__)
 
 BASE_DIR = Path(__file__).parent.parent
@@ -41,6 +60,50 @@ CACHE_PATH = CACHE_DIR / 'aws_prices.json'
 
 # Public EC2 offerings URL
 PUBLIC_EC2_OFFERINGS_URL = "https://pricing.us-east-1.amazonaws.com/offers/v1.0/aws/AmazonEC2/current/index.json"
+# Per-region offer file; a fraction of the size of the global one.
+PUBLIC_EC2_REGION_OFFERINGS_URL = "https://pricing.us-east-1.amazonaws.com/offers/v1.0/aws/AmazonEC2/current/{region}/index.json"
+
+DEFAULT_LOCATION = AWS_LOCATIONS[DEFAULT_REGIONS['aws']]
+
+
+def _is_default_region(region: Optional[str]) -> bool:
+    return region is None or region == DEFAULT_REGIONS['aws']
+
+
+def _catalog_path(region: Optional[str] = None) -> Path:
+    """Catalog synced for `region`: the main catalog, or data/regions/aws/<region>.json."""
+    if _is_default_region(region):
+        return CATALOG_PATH
+    return CATALOG_PATH.parent / catalog_file('aws', region)
+
+
+def _cache_path(region: Optional[str] = None) -> Path:
+    return CACHE_PATH if _is_default_region(region) else CACHE_PATH.with_name(f'{CACHE_PATH.stem}-{region}.json')
+
+
+def _history_path() -> Path:
+    return Path(os.environ.get('PRICE_HISTORY_DB') or CACHE_PATH.with_name('price_history.db'))
+
+
+def _record_history(prices: Dict[str, Dict[str, float]], region: Optional[str]) -> None:
+    """Append this sync's prices to the price history (see `utils.price_history`)."""
+    record_history('aws', region or DEFAULT_REGIONS['aws'], prices, _history_path())
+
+
+def _resolve_location(region: Optional[str], location: Optional[str]) -> str:
+    if location is not None:
+        return location
+    if region is None:
+        return DEFAULT_LOCATION
+    try:
+        return AWS_LOCATIONS[region]
+    except KeyError:
+        raise ValueError(f'unknown AWS region {region!r}; pass --location explicitly') from None
+
+
+def _load_catalog(region: Optional[str] = None):
+    """Return `(catalog, seeded)`. A region without a catalog yet starts from the main catalog's SKUs."""
+    return load_catalog(_catalog_path(region), CATALOG_PATH)
 
 
 def _get_pricing_for_sku_public(offerings_data: dict, sku: str, location: str = 'US East (N. Virginia)') -> Optional[float]:
@@ -78,55 +141,259 @@ def _get_pricing_for_sku_public(offerings_data: dict, sku: str, location: str =
         return None
 
 
+HOURS_PER_YEAR = 8760
+
+# Reserved options in order of preference for each lease length.
+RESERVED_PREFERENCE = [
+    ('standard', 'No Upfront'),
+    ('standard', 'Partial Upfront'),
+    ('standard', 'All Upfront'),
+    ('convertible', 'No Upfront'),
+    ('convertible', 'Partial Upfront'),
+    ('convertible', 'All Upfront'),
+]
+RESERVED_MODELS = {'1yr': ('reserved_1yr', 1), '3yr': ('reserved_3yr', 3)}
+
+
+def _first_usd_price(term: dict) -> Optional[float]:
+    """First parseable USD pricePerUnit in a term, as `_get_pricing_for_sku_public` reads it."""
+    for dim in term.get('priceDimensions', {}).values():
+        price_str = dim.get('pricePerUnit', {}).get('USD')
+        if price_str:
+            try:
+                return float(price_str)
+            except (ValueError, TypeError):
+                continue
+    return None
+
+
+def _reserved_effective_hourly(term: dict, years: int) -> Optional[float]:
+    """Hourly rate plus any upfront fee spread over the lease."""
+    hourly = 0.0
+    upfront = 0.0
+    found = False
+    for dim in term.get('priceDimensions', {}).values():
+        try:
+            price = float(dim.get('pricePerUnit', {}).get('USD'))
+        except (ValueError, TypeError):
+            continue
+        found = True
+        if dim.get('unit') == 'Quantity':
+            upfront += price
+        else:
+            hourly += price
+    if not found:
+        return None
+    return hourly + upfront / (HOURS_PER_YEAR * years)
+
+
+def _reserved_prices(reserved_terms: dict) -> Dict[str, float]:
+    """Pick one reserved price per lease length from a product's Reserved terms."""
+    best: Dict[str, tuple] = {}
+    for term in reserved_terms.values():
+        attrs = term.get('termAttributes', {})
+        lease = RESERVED_MODELS.get(attrs.get('LeaseContractLength'))
+        option = (attrs.get('OfferingClass'), attrs.get('PurchaseOption'))
+        if lease is None or option not in RESERVED_PREFERENCE:
+            continue
+        model, years = lease
+        rank = RESERVED_PREFERENCE.index(option)
+        if model in best and best[model][0] <= rank:
+            continue
+        price = _reserved_effective_hourly(term, years)
+        if price is not None:
+            best[model] = (rank, price)
+    return {model: price for model, (_, price) in best.items()}
+
+
+def _product_preference(attrs: dict) -> int:
+    # Plain Linux capacity first; products with pre-installed software or
+    # capacity-reservation usage are only used when nothing else is priced.
+    return int(attrs.get('preInstalledSw', 'NA') != 'NA') + int(attrs.get('capacitystatus', 'Used') != 'Used')
+
+
+def _extract_public_prices(offerings_data: dict, skus, location: str = 'US East (N. Virginia)',
+                           operating_system: str = 'Linux', tenancy: str = 'Shared') -> Dict[str, Dict[str, float]]:
+    """Join products to OnDemand and Reserved terms in one pass over each.
+
+    Returns `{ sku: {pricing_model: hourly_usd} }` for every SKU that was found,
+    with `on_demand`, `reserved_1yr` and `reserved_3yr` keys where available.
+    """
+    wanted = set(skus)
+    products = offerings_data.get('products', {})
+    terms = offerings_data.get('terms', {})
+
+    # instanceType -> [(preference, product_key)] for the requested location/os/tenancy.
+    candidates: Dict[str, list] = {}
+    for product_key, product in products.items():
+        attrs = product.get('attributes', {})
+        sku = attrs.get('instanceType')
+        if (sku in wanted and
+                attrs.get('location') == location and
+                attrs.get('operatingSystem') == operating_system and
+                attrs.get('tenancy') == tenancy):
+            candidates.setdefault(sku, []).append((_product_preference(attrs), product_key))
+    product_keys = {key for keys in candidates.values() for _, key in keys}
+
+    on_demand: Dict[str, float] = {}
+    for product_key, product_terms in terms.get('OnDemand', {}).items():
+        if product_key not in product_keys:
+            continue
+        for term in product_terms.values():
+            price = _first_usd_price(term)
+            if price is not None:
+                on_demand[product_key] = price
+                break
+
+    reserved: Dict[str, Dict[str, float]] = {}
+    for product_key, product_terms in terms.get('Reserved', {}).items():
+        if product_key in product_keys:
+            reserved[product_key] = _reserved_prices(product_terms)
+
+    prices: Dict[str, Dict[str, float]] = {}
+    for sku, keys in candidates.items():
+        # sorted() is stable, so file order breaks ties like the per-SKU scan did.
+        for _, product_key in sorted(keys, key=lambda item: item[0]):
+            if product_key in on_demand:
+                prices[sku] = {'on_demand': on_demand[product_key], **reserved.get(product_key, {})}
+                break
+    return prices
+
+
+def _write_results(catalog: list, updated: Dict[str, Optional[float]], write_back: bool,
+                   region: Optional[str] = None, seeded: bool = False) -> None:
+    """Write the price cache and (with `write_back`) the catalog; see `catalog_sync.write_results`."""
+    write_results(catalog, updated, write_back, _cache_path(region), _catalog_path(region), seeded=seeded)
+
+
+DEFAULT_SYNC_WORKERS = 8
+DEFAULT_SYNC_RATE = 10.0  # get_products calls per second across all workers
+SKUS_PER_QUERY = 25
+MAX_FILTER_VALUE_CHARS = 1024  # GetProducts limit on a filter value
+
+
+def _sku_batches(skus: Sequence[str], size: int = SKUS_PER_QUERY) -> List[List[str]]:
+    """Split `skus` into batches of at most `size` whose comma-joined list fits one filter value."""
+    batches: List[List[str]] = []
+    batch: List[str] = []
+    chars = 0
+    for sku in skus:
+        if batch and (len(batch) == size or chars + 1 + len(sku) > MAX_FILTER_VALUE_CHARS):
+            batches.append(batch)
+            batch, chars = [], 0
+        chars += len(sku) + (1 if batch else 0)
+        batch.append(sku)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _pricing_filters(skus: Sequence[str], location: str) -> list:
+    # Tenancy, pre-installed software and capacity status narrow each SKU down to
+    # the plain shared Linux product, so a batch usually resolves in one page
+    # per hundred SKUs.
+    if len(skus) == 1:
+        instance_type = {'Type': 'TERM_MATCH', 'Field': 'instanceType', 'Value': skus[0]}
+    else:
+        instance_type = {'Type': 'ANY_OF', 'Field': 'instanceType', 'Value': ','.join(skus)}
+    return [
+        instance_type,
+        {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
+        {'Type': 'TERM_MATCH', 'Field': 'operatingSystem', 'Value': 'Linux'},
+        {'Type': 'TERM_MATCH', 'Field': 'tenancy', 'Value': 'Shared'},
+        {'Type': 'TERM_MATCH', 'Field': 'preInstalledSw', 'Value': 'NA'},
+        {'Type': 'TERM_MATCH', 'Field': 'capacitystatus', 'Value': 'Used'},
+    ]
+
+
+def _iter_price_list(client, filters: list, limiter: Optional[TokenBucket] = None) -> Iterator[str]:
+    """Yield every PriceList item for `filters`, following NextToken pagination."""
+    next_token = None
+    while True:
+        kwargs = {'ServiceCode': 'AmazonEC2', 'Filters': filters, 'FormatVersion': 'aws_v1'}
+        if next_token:
+            kwargs['NextToken'] = next_token
+        if limiter is not None:
+            limiter.acquire()
+        resp = call_with_retries(lambda: client.get_products(**kwargs))
+        yield from resp.get('PriceList', [])
+        next_token = resp.get('NextToken')
+        if not next_token:
+            return
+
+
+def _fetch_batch_prices(client, skus: Sequence[str], location: str = 'US East (N. Virginia)',
+                        limiter: Optional[TokenBucket] = None) -> Dict[str, Dict[str, float]]:
+    """Query the Pricing API for a batch of SKUs; `{sku: {pricing_model: hourly_usd}}` for those found."""
+    wanted = set(skus)
+    prices: Dict[str, Dict[str, float]] = {}
+    for item in _iter_price_list(client, _pricing_filters(skus, location), limiter):
+        # PriceList is a list of JSON strings; use each SKU's first product with an OnDemand price
+        data = json.loads(item) if isinstance(item, str) else item
+        sku = data.get('product', {}).get('attributes', {}).get('instanceType')
+        if sku not in wanted or sku in prices:
+            continue
+        terms = data.get('terms', {})
+        for term in terms.get('OnDemand', {}).values():
+            price = _first_usd_price(term)
+            if price is not None:
+                prices[sku] = {'on_demand': price, **_reserved_prices(terms.get('Reserved', {}))}
+                break
+    return prices
+
+
+def _fetch_sku_prices(client, sku: str, location: str = 'US East (N. Virginia)',
+                      limiter: Optional[TokenBucket] = None) -> Dict[str, float]:
+    """Query the Pricing API for one SKU and return `{pricing_model: hourly_usd}` (empty if not found)."""
+    return _fetch_batch_prices(client, [sku], location, limiter).get(sku, {})
+
+
 def _get_pricing_for_sku(client, sku: str, location: str = 'US East (N. Virginia)') -> Optional[float]:
     """Query the AWS Pricing 'get_products' API for a given instance type SKU.
 
     Returns hourly USD price for the on-demand Linux usage in the provided location, or None.
     """
     try:
-        filters = [
-            {'Type': 'TERM_MATCH', 'Field': 'instanceType', 'Value': sku},
-            {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
-            {'Type': 'TERM_MATCH', 'Field': 'operatingSystem', 'Value': 'Linux'},
-        ]
-        resp = client.get_products(ServiceCode='AmazonEC2', Filters=filters, FormatVersion='aws_v1')
-        price_list = resp.get('PriceList', [])
-        if not price_list:
-            return None
-
-        # PriceList is a list of JSON strings; pick first and parse OnDemand terms
-        for item in price_list:
-            data = json.loads(item)
-            terms = data.get('terms', {})
-            on_demand = terms.get('OnDemand', {})
-            for term in on_demand.values():
-                dims = term.get('priceDimensions', {})
-                for dim in dims.values():
-                    price = dim.get('pricePerUnit', {}).get('USD')
-                    if price:
-                        try:
-                            return float(price)
-                        except Exception:
-                            continue
-        return None
+        return _fetch_sku_prices(client, sku, location=location).get('on_demand')
     except Exception as e:
         LOG.exception('Error fetching pricing for %s: %s', sku, e)
         return None
 
 
-def _download_public_offerings(location: str = 'US East (N. Virginia)') -> Optional[dict]:
-    """Download and parse the public EC2 offerings JSON.
+def _download_public_offerings(location: str = DEFAULT_LOCATION, offer_file: Optional[str] = None,
+                               instance_types: Optional[Iterable[str]] = None,
+                               region: Optional[str] = None) -> Optional[dict]:
+    """Stream and filter the public EC2 offerings JSON.
+
+    Reads `offer_file` when given, otherwise streams the download (the regional
+    offer file when `region` is given, else the global one). Only products
+    for `location` (Linux, shared tenancy, and `instance_types` when given) and
+    their OnDemand/Reserved terms are kept in memory.
 
-    Returns the parsed offerings data or None on failure.
+    Returns the filtered offerings data or None on failure.
     """
+    if offer_file is not None:
+        LOG.info('Reading public EC2 offerings from %s', offer_file)
+        try:
+            return stream_offerings(offer_file, location=location, instance_types=instance_types)
+        except Exception as e:
+            LOG.exception('Error reading offer file %s: %s', offer_file, e)
+            return None
+
     if requests is None:
         raise RuntimeError('requests is required for --public mode; install it or use boto3 mode instead')
 
-    LOG.info('Downloading public EC2 offerings from %s', PUBLIC_EC2_OFFERINGS_URL)
+    url = PUBLIC_EC2_OFFERINGS_URL if region is None else PUBLIC_EC2_REGION_OFFERINGS_URL.format(region=region)
+    LOG.info('Downloading public EC2 offerings from %s', url)
     try:
-        resp = requests.get(PUBLIC_EC2_OFFERINGS_URL, timeout=60)
-        resp.raise_for_status()
-        data = resp.json()
+        with requests.get(url, timeout=60, stream=True) as resp:
+            resp.raise_for_status()
+            if ijson is None:
+                LOG.warning('ijson is not installed; loading the whole offer file into memory')
+                data = resp.json()
+            else:
+                resp.raw.decode_content = True
+                data = stream_offerings(resp.raw, location=location, instance_types=instance_types)
         LOG.info('Downloaded offerings; products: %d, terms: %d', len(data.get('products', {})), len(data.get('terms', {})))
         return data
     except Exception as e:
@@ -134,68 +401,78 @@ def _download_public_offerings(location: str = 'US East (N. Virginia)') -> Optio
         return None
 
 
-def sync_prices_public(write_back: bool = False, location: str = 'US East (N. Virginia)') -> dict:
+def sync_prices_public(write_back: bool = False, location: Optional[str] = None,
+                       offer_file: Optional[str] = None, region: Optional[str] = None) -> dict:
     """Load catalog, fetch public EC2 offerings, extract prices, write cache and optionally update catalog.
 
+    On-demand and reserved (1yr/3yr) prices for every catalog SKU are filled in
+    by a single join over products and terms. Pass `offer_file` to read a local copy of the offer file instead of downloading it.
+    `region` (e.g. 'eu-west-1') syncs that region's catalog from its regional offer file.
+
     Returns a mapping { sku: price_per_hour_or_None }.
     """
-    offerings = _download_public_offerings(location=location)
+    location = _resolve_location(region, location)
+    catalog, seeded = _load_catalog(region)
+    offerings = _download_public_offerings(
+        location=location,
+        offer_file=offer_file,
+        instance_types={entry.get('sku') for entry in catalog},
+        region=region,
+    )
     if offerings is None:
         raise RuntimeError('Failed to download or parse public offerings')
 
-    catalog = json.loads(CATALOG_PATH.read_text())
-    updated = {}
-    for sku_entry in catalog:
-        sku = sku_entry.get('sku')
-        LOG.info('Extracting price for %s', sku)
-        price = _get_pricing_for_sku_public(offerings, sku, location=location)
-        if price is None:
-            LOG.info('Price not found for %s; leaving as-is', sku)
-        else:
-            LOG.info('Found price for %s: %s USD/hour', sku, price)
-            sku_entry['price_per_hour'] = round(price, 6)
-        updated[sku] = price
-
-    # write cache
-    CACHE_PATH.write_text(json.dumps({k: (v if v is None else round(v, 6)) for k, v in updated.items()}, indent=2))
-    LOG.info('Wrote cache to %s', CACHE_PATH)
-
-    if write_back:
-        CATALOG_PATH.write_text(json.dumps(catalog, indent=2))
-        LOG.info('Wrote updated catalog to %s', CATALOG_PATH)
-
+    prices = _extract_public_prices(offerings, [entry.get('sku') for entry in catalog], location=location)
+    _record_history(prices, region)
+    updated = apply_prices(catalog, prices)
+    _write_results(catalog, updated, write_back, region=region, seeded=seeded)
     return updated
 
 
-def sync_prices(write_back: bool = False, location: str = 'US East (N. Virginia)') -> dict:
+def sync_prices(write_back: bool = False, location: Optional[str] = None,
+                workers: int = DEFAULT_SYNC_WORKERS, rate: float = DEFAULT_SYNC_RATE,
+                progress: Optional[Callable[[int, int, str], None]] = None,
+                region: Optional[str] = None) -> dict:
     """Load catalog, query AWS Pricing for each SKU, write cache and optionally update catalog.
 
+    SKUs are fetched in batches of `SKUS_PER_QUERY`, concurrently by `workers`
+    threads sharing one client and a token bucket of `rate` calls per second.
+    `progress(done, total, sku)` is called for each SKU as its batch completes.
+
     Returns a mapping { sku: price_per_hour_or_None }.
     """
     if boto3 is None:
         raise RuntimeError('boto3 is required to sync prices; install it or monkeypatch sync_mod.boto3 in tests')
+    # boto3 clients are thread-safe, so one client (and its connection pool) is shared by all workers.
     client = boto3.client('pricing', region_name='us-east-1')
-    catalog = json.loads(CATALOG_PATH.read_text())
-    updated = {}
-    for sku_entry in catalog:
-        sku = sku_entry.get('sku')
-        LOG.info('Fetching price for %s', sku)
-        price = _get_pricing_for_sku(client, sku, location=location)
-        if price is None:
-            LOG.info('Price not found for %s; leaving as-is', sku)
-        else:
-            LOG.info('Found price for %s: %s USD/hour', sku, price)
-            sku_entry['price_per_hour'] = round(price, 6)
-        updated[sku] = price
-
-    # write cache
-    CACHE_PATH.write_text(json.dumps({k: (v if v is None else round(v, 6)) for k, v in updated.items()}, indent=2))
-    LOG.info('Wrote cache to %s', CACHE_PATH)
-
-    if write_back:
-        CATALOG_PATH.write_text(json.dumps(catalog, indent=2))
-        LOG.info('Wrote updated catalog to %s', CATALOG_PATH)
-
+    location = _resolve_location(region, location)
+    catalog, seeded = _load_catalog(region)
+    skus = list(dict.fromkeys(entry.get('sku') for entry in catalog))
+    limiter = TokenBucket(rate)
+
+    def fetch(batch):
+        try:
+            return _fetch_batch_prices(client, batch, location=location, limiter=limiter)
+        except Exception as e:
+            LOG.exception('Error fetching pricing for %s: %s', ', '.join(batch), e)
+            return {}
+
+    prices = {}
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='aws-pricing') as pool:
+        futures = {pool.submit(fetch, batch): batch for batch in _sku_batches(skus)}
+        for future in as_completed(futures):
+            found = future.result()
+            for sku in futures[future]:
+                prices[sku] = found.get(sku, {})
+                done += 1
+                LOG.info('Fetched %s (%d/%d)', sku, done, len(skus))
+                if progress is not None:
+                    progress(done, len(skus), sku)
+
+    _record_history(prices, region)
+    updated = apply_prices(catalog, prices)
+    _write_results(catalog, updated, write_back, region=region, seeded=seeded)
     return updated
 
 
@@ -203,17 +480,24 @@ def main():
     parser = argparse.ArgumentParser(description='Sync AWS prices into local catalog cache')
     parser.add_argument('--public', action='store_true', help='Use public EC2 offerings (no AWS credentials required)')
     parser.add_argument('--write-catalog', action='store_true', help='Overwrite catalog with fetched prices')
-    parser.add_argument('--location', default='US East (N. Virginia)', help='AWS region name (location filter)')
+    parser.add_argument('--region', choices=sorted(AWS_LOCATIONS),
+                        help='AWS region code; syncs data/regions/aws/<region>.json (default: the main us-east-1 catalog)')
+    parser.add_argument('--location', help="Pricing location name; defaults to the region's (e.g. 'US East (N. Virginia)')")
+    parser.add_argument('--offer-file', help='Read a local copy of the EC2 offer file instead of downloading it (--public only)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_SYNC_WORKERS, help='Concurrent Pricing API workers (boto3 mode)')
+    parser.add_argument('--rate', type=float, default=DEFAULT_SYNC_RATE, help='Max Pricing API calls per second (boto3 mode)')
     args = parser.parse_args()
 
     logging.basicConfig(level=logging.INFO)
     
     if args.public:
-        LOG.info('Starting AWS price sync via public offerings (location=%s)', args.location)
-        updated = sync_prices_public(write_back=args.write_catalog, location=args.location)
+        LOG.info('Starting AWS price sync via public offerings (region=%s, location=%s)', args.region, args.location)
+        updated = sync_prices_public(write_back=args.write_catalog, location=args.location,
+                                     offer_file=args.offer_file, region=args.region)
     else:
-        LOG.info('Starting AWS price sync via boto3 Pricing API (location=%s)', args.location)
-        updated = sync_prices(write_back=args.write_catalog, location=args.location)
+        LOG.info('Starting AWS price sync via boto3 Pricing API (region=%s, location=%s)', args.region, args.location)
+        updated = sync_prices(write_back=args.write_catalog, location=args.location, workers=args.workers,
+                              rate=args.rate, region=args.region)
     
     LOG.info('Sync complete; %d SKUs processed', len(updated))
 
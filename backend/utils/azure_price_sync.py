@@ -0,0 +1,181 @@
+"""Azure price sync from the public Retail Prices API (no credentials required).
+
+Refreshes `price_per_hour` for the SKUs in `backend/data/azure_catalog.json`
+(or `backend/data/regions/azure/<region>.json`) with all four pricing models:
+
+  on_demand      Linux pay-as-you-go (`Consumption`) meter
+  spot           the SKU's `Spot` consumption meter
+  reserved_1yr   `Reservation` price for `1 Year`, spread over the term's hours
+  reserved_3yr   `Reservation` price for `3 Years`, likewise
+
+Usage:
+  python -m utils.azure_price_sync --write-catalog [--region westeurope] [--workers 8] [--rate 20]
+
+Each catalog SKU is one filtered query (`armSkuName eq '...'`). Queries run
+concurrently on a bounded worker pool sharing one pooled HTTP session and a
+token bucket; each follows its `NextPageLink` pages, which are parsed as they
+stream in (see `utils.catalog_sync`). Results are written like the AWS sync:
+a price cache at `backend/cache/azure_prices.json`, and with `--write-catalog`
+the catalog, atomically and only when prices changed.
+"""
+import argparse
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from cloud_providers.regions import DEFAULT_REGIONS, catalog_file
+from utils.catalog_sync import (
+    apply_prices,
+    fetch_page,
+    load_catalog,
+    make_session,
+    min_price,
+    record_history,
+    write_results,
+)
+from utils.rate_limit import TokenBucket
+
+LOG = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).parent.parent
+CATALOG_PATH = BASE_DIR / 'data' / 'azure_catalog.json'
+CACHE_DIR = BASE_DIR / 'cache'
+CACHE_PATH = CACHE_DIR / 'azure_prices.json'
+
+RETAIL_PRICES_URL = 'https://prices.azure.com/api/retail/prices'
+API_VERSION = '2023-01-01-preview'
+
+DEFAULT_SYNC_WORKERS = 8
+DEFAULT_SYNC_RATE = 20.0  # Retail Prices requests per second across all workers
+
+HOURS_PER_YEAR = 8760
+RESERVATION_TERMS = {'1 Year': ('reserved_1yr', 1), '3 Years': ('reserved_3yr', 3)}
+
+
+def _catalog_path(region: Optional[str] = None) -> Path:
+    if region is None or region == DEFAULT_REGIONS['azure']:
+        return CATALOG_PATH
+    return CATALOG_PATH.parent / catalog_file('azure', region)
+
+
+def _cache_path(region: Optional[str] = None) -> Path:
+    if region is None or region == DEFAULT_REGIONS['azure']:
+        return CACHE_PATH
+    return CACHE_PATH.with_name(f'{CACHE_PATH.stem}-{region}.json')
+
+
+def _history_path() -> Path:
+    return Path(os.environ.get('PRICE_HISTORY_DB') or CACHE_DIR / 'price_history.db')
+
+
+def _sku_filter(region: str, sku: str) -> str:
+    return f"serviceName eq 'Virtual Machines' and armRegionName eq '{region}' and armSkuName eq '{sku}'"
+
+
+def classify_item(item: dict):
+    """`(pricing_model, hourly_usd)` for a Retail Prices item, or None for meters the catalog does not use.
+
+    Windows, Low Priority and Dev/Test meters are skipped, as are non-USD prices.
+    """
+    if item.get('currencyCode', 'USD') != 'USD':
+        return None
+    product = item.get('productName', '')
+    sku_name = item.get('skuName', '')
+    if 'Windows' in product or 'Low Priority' in sku_name:
+        return None
+    try:
+        price = float(item.get('unitPrice', item.get('retailPrice')))
+    except (TypeError, ValueError):
+        return None
+    kind = item.get('type')
+    if kind == 'Consumption':
+        if item.get('unitOfMeasure') != '1 Hour':
+            return None
+        return ('spot' if 'Spot' in sku_name else 'on_demand'), price
+    if kind == 'Reservation':
+        term = RESERVATION_TERMS.get(item.get('reservationTerm'))
+        if term is None:
+            return None
+        model, years = term
+        return model, price / (HOURS_PER_YEAR * years)
+    return None
+
+
+def _fetch_sku_prices(session, sku: str, region: str, base_url: str = RETAIL_PRICES_URL,
+                      limiter: Optional[TokenBucket] = None) -> Dict[str, float]:
+    """All pricing models for one SKU in `region`, following NextPageLink pages."""
+    prices: Dict[str, Dict[str, float]] = {}
+
+    def on_item(item):
+        if item.get('armSkuName') != sku or item.get('armRegionName', region) != region:
+            return
+        classified = classify_item(item)
+        if classified is not None:
+            min_price(prices, sku, *classified)
+
+    url, params = base_url, {'api-version': API_VERSION, '$filter': _sku_filter(region, sku)}
+    while url:
+        # NextPageLink already carries the query string.
+        url = fetch_page(session, url, params, 'Items', 'NextPageLink', on_item, limiter=limiter)
+        params = None
+    return prices.get(sku, {})
+
+
+def sync_prices(write_back: bool = False, region: Optional[str] = None,
+                workers: int = DEFAULT_SYNC_WORKERS, rate: float = DEFAULT_SYNC_RATE,
+                base_url: str = RETAIL_PRICES_URL,
+                progress: Optional[Callable[[int, int, str], None]] = None) -> dict:
+    """Fetch Retail Prices for every catalog SKU, write the cache and optionally update the catalog.
+
+    Returns a mapping { sku: on_demand_price_per_hour_or_None }.
+    """
+    region = region or DEFAULT_REGIONS['azure']
+    catalog, seeded = load_catalog(_catalog_path(region), CATALOG_PATH)
+    skus = list(dict.fromkeys(entry.get('sku') for entry in catalog))
+    session = make_session(workers)
+    limiter = TokenBucket(rate)
+
+    def fetch(sku):
+        try:
+            return _fetch_sku_prices(session, sku, region, base_url=base_url, limiter=limiter)
+        except Exception as e:
+            LOG.exception('Error fetching Azure pricing for %s: %s', sku, e)
+            return {}
+
+    prices = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='azure-pricing') as pool:
+            futures = {pool.submit(fetch, sku): sku for sku in skus}
+            for done, future in enumerate(as_completed(futures), start=1):
+                sku = futures[future]
+                prices[sku] = future.result()
+                LOG.info('Fetched %s (%d/%d)', sku, done, len(skus))
+                if progress is not None:
+                    progress(done, len(skus), sku)
+    finally:
+        session.close()
+
+    record_history('azure', region, prices, _history_path())
+    updated = apply_prices(catalog, prices)
+    write_results(catalog, updated, write_back, _cache_path(region), _catalog_path(region), seeded=seeded)
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sync Azure prices into the local catalog')
+    parser.add_argument('--write-catalog', action='store_true', help='Overwrite catalog with fetched prices')
+    parser.add_argument('--region', help="Azure region code, e.g. 'westeurope' (default: the main eastus catalog)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_SYNC_WORKERS, help='Concurrent Retail Prices queries')
+    parser.add_argument('--rate', type=float, default=DEFAULT_SYNC_RATE, help='Max Retail Prices requests per second')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    LOG.info('Starting Azure price sync (region=%s)', args.region or DEFAULT_REGIONS['azure'])
+    updated = sync_prices(write_back=args.write_catalog, region=args.region, workers=args.workers, rate=args.rate)
+    LOG.info('Sync complete; %d SKUs processed', len(updated))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""Pieces shared by the provider price syncs.
+
+`aws_price_sync`, `azure_price_sync` and `gcp_price_sync` each fetch prices
+their own way into `{sku: {pricing_model: hourly_usd}}`; from there the steps
+are the same and live here: record the prices in the price history, write
+them into the catalog entries, and write the price cache and the catalog
+(atomically, only when changed, see `utils.catalog_writer`).
+
+The paged price APIs (Azure Retail Prices, GCP Cloud Billing) are read with
+`fetch_page`: one pooled `requests` session per sync, throttled by a shared
+token bucket, retried with jittered backoff, and parsed incrementally, so an
+item is handed to the caller as soon as it is read and a page is never held
+in memory whole.
+"""
+import json
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, Mapping, Optional
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except Exception:  # pragma: no cover - requests may not be available in every env
+    requests = None
+    HTTPAdapter = None
+
+from cloud_providers.catalog_snapshot import SnapshotError, write_catalog_snapshot
+from utils.aws_offer_stream import ObjectBuilder, ijson
+from utils.catalog_writer import write_catalog, write_if_changed
+from utils.price_history import record_sync
+from utils.rate_limit import TokenBucket, call_with_retries, is_throttling_error
+
+LOG = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+DEFAULT_TIMEOUT = 60
+
+
+def load_catalog(catalog_path: Path, main_path: Path):
+    """Return `(catalog, seeded)`. A region without a catalog yet starts from the main catalog's SKUs."""
+    if catalog_path.exists():
+        return json.loads(catalog_path.read_text()), False
+    LOG.info('No catalog at %s yet; seeding it from %s', catalog_path, main_path)
+    return json.loads(main_path.read_text()), True
+
+
+def record_history(provider: str, region: str, prices: Mapping[str, Mapping[str, Optional[float]]],
+                   path: Path) -> None:
+    """Append a sync's prices to the price history (see `utils.price_history`)."""
+    rounded = {sku: {model: round(price, 6) for model, price in models.items() if price is not None}
+               for sku, models in prices.items()}
+    record_sync(provider, region, rounded, path=path)
+
+
+def apply_prices(catalog: list, prices: Dict[str, Dict[str, float]]) -> Dict[str, Optional[float]]:
+    """Write fetched prices into catalog entries in place.
+
+    Entries that already carry a per-model `price_per_hour` dict keep models that
+    were not fetched (e.g. `spot`). Returns `{ sku: on_demand_price_or_None }`.
+    """
+    updated = {}
+    for sku_entry in catalog:
+        sku = sku_entry.get('sku')
+        models = prices.get(sku)
+        if not models or models.get('on_demand') is None:
+            LOG.info('Price not found for %s; leaving as-is', sku)
+            updated[sku] = None
+            continue
+        LOG.info('Found price for %s: %s USD/hour', sku, models['on_demand'])
+        rounded = {model: round(price, 6) for model, price in models.items()}
+        current = sku_entry.get('price_per_hour')
+        if isinstance(current, dict):
+            current.update(rounded)
+        elif len(rounded) > 1:
+            sku_entry['price_per_hour'] = rounded
+        else:
+            sku_entry['price_per_hour'] = rounded['on_demand']
+        updated[sku] = models['on_demand']
+    return updated
+
+
+def write_results(catalog: list, updated: Dict[str, Optional[float]], write_back: bool,
+                  cache_path: Path, catalog_path: Path, seeded: bool = False) -> None:
+    """Write the price cache and (with `write_back`) the catalog, each only if its content changed.
+
+    Files are replaced atomically (see `utils.catalog_writer`).
+    """
+    cache_text = json.dumps({k: (v if v is None else round(v, 6)) for k, v in updated.items()}, indent=2)
+    if write_if_changed(cache_path, cache_text):
+        LOG.info('Wrote cache to %s', cache_path)
+    else:
+        LOG.info('Cache %s unchanged', cache_path)
+
+    if write_back:
+        if seeded:
+            # SKUs with no price in a new region are not offered there.
+            catalog = [entry for entry in catalog if updated.get(entry.get('sku')) is not None]
+        written, changes = write_catalog(catalog_path, catalog)
+        if not written:
+            LOG.info('No price changes; %s left as is', catalog_path)
+            return
+        LOG.info('Wrote updated catalog to %s (%d price changes)', catalog_path, len(changes))
+        try:
+            LOG.info('Wrote catalog snapshot to %s', write_catalog_snapshot(str(catalog_path), catalog))
+        except SnapshotError as e:
+            LOG.warning('Catalog snapshot not written: %s', e)
+
+
+def make_session(workers: int):
+    """A `requests` session whose connection pool keeps one connection per worker alive."""
+    if requests is None:
+        raise RuntimeError('requests is required to sync prices; install it from requirements.txt')
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, workers))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def stream_items(fileobj, items_key: str, next_key: str, on_item: Callable[[Dict], None]) -> Optional[str]:
+    """Call `on_item` for each object of the top-level `items_key` array as it is parsed.
+
+    Returns the top-level `next_key` value (the next page link or token), if any.
+    """
+    if ijson is None:
+        LOG.warning('ijson is not installed; loading the whole page into memory')
+        page = json.load(fileobj)
+        for item in page.get(items_key) or []:
+            on_item(item)
+        return page.get(next_key) or None
+
+    item_prefix = f'{items_key}.item'
+    next_value = None
+    builder = None
+    for prefix, event, value in ijson.parse(fileobj, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == item_prefix and event == 'end_map':
+                on_item(builder.value)
+                builder = None
+        elif prefix == item_prefix and event == 'start_map':
+            builder = ObjectBuilder()
+            builder.event(event, value)
+        elif prefix == next_key and event == 'string':
+            next_value = value
+    return next_value or None
+
+
+def _retryable(exc: BaseException) -> bool:
+    if is_throttling_error(exc):
+        return True
+    response = getattr(exc, 'response', None)
+    if getattr(response, 'status_code', None) in RETRY_STATUSES:
+        return True
+    return requests is not None and isinstance(exc, (requests.ConnectionError, requests.Timeout))
+
+
+def fetch_page(session, url: str, params: Optional[Mapping[str, Any]], items_key: str, next_key: str,
+               on_item: Callable[[Dict], None], limiter: Optional[TokenBucket] = None,
+               timeout: float = DEFAULT_TIMEOUT) -> Optional[str]:
+    """GET one page and stream its items to `on_item`; returns the page's `next_key` value.
+
+    Throttled (429), 5xx and connection failures are retried with backoff. A
+    retried page may hand some items to `on_item` twice, so callers keep
+    prices in a way that tolerates repeats.
+    """
+    def get():
+        if limiter is not None:
+            limiter.acquire()
+        with session.get(url, params=params, timeout=timeout, stream=True) as resp:
+            resp.raise_for_status()
+            resp.raw.decode_content = True
+            return stream_items(resp.raw, items_key, next_key, on_item)
+
+    return call_with_retries(get, retry_on=_retryable)
+
+
+def min_price(prices: Dict[str, Dict[str, float]], sku: str, model: str, price: float) -> None:
+    """Keep the lowest `price` seen for `sku`/`model` (meters can repeat across pages and retries)."""
+    models = prices.setdefault(sku, {})
+    if model not in models or price < models[model]:
+        models[model] = price
@@ -0,0 +1,117 @@
+"""Crash-safe, diff-only catalog writes.
+
+Price syncs write through `write_if_changed`, which replaces a file only when
+its content changed, via a temp file in the same directory, fsync and
+`os.replace`. Readers (`CatalogRegistry`) therefore see either the old or the
+new version, never a partial one, and an unchanged sync does not bump the
+file's mtime, so nothing downstream is invalidated.
+
+`write_catalog` also returns the per-SKU price changes of a write (for the
+sync's log). Readers detect new versions through the registry stamps, and
+caches keyed on the catalog version drop all entries of the old one.
+
+A written catalog also invalidates the cross-worker result cache, if one is
+configured (`utils.shared_cache.bump`).
+"""
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+from utils import shared_cache
+
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+
+def atomic_write_bytes(path: PathLike, data: bytes) -> None:
+    """Replace `path` with `data` atomically and durably (temp file, fsync, rename, fsync dir)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    _fsync_dir(path.parent)
+
+
+def _fsync_dir(directory: Path) -> None:
+    # Makes the rename itself durable; not supported on every platform.
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_if_changed(path: PathLike, text: str) -> bool:
+    """Atomically write `text` to `path` unless it already has that content. Returns whether it wrote."""
+    data = text.encode("utf-8")
+    try:
+        if Path(path).read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    atomic_write_bytes(path, data)
+    return True
+
+
+def read_catalog(path: PathLike) -> List[Dict]:
+    """Catalog at `path`, or an empty list when it does not exist yet."""
+    try:
+        return json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        return []
+
+
+def _models(entry: Dict) -> Dict[str, Any]:
+    rate = entry.get("price_per_hour")
+    if isinstance(rate, dict):
+        return dict(rate)
+    return {"on_demand": rate}
+
+
+def diff_prices(old: Sequence[Dict], new: Sequence[Dict]) -> List[Dict]:
+    """Per-SKU, per-pricing-model price changes between two catalogs.
+
+    SKUs added or removed show up with `old` or `new` set to None.
+    """
+    before = {entry.get("sku"): _models(entry) for entry in old}
+    after = {entry.get("sku"): _models(entry) for entry in new}
+    changes = []
+    for sku in list(dict.fromkeys([*before, *after])):
+        old_models, new_models = before.get(sku, {}), after.get(sku, {})
+        for model in dict.fromkeys([*old_models, *new_models]):
+            old_price, new_price = old_models.get(model), new_models.get(model)
+            if old_price != new_price:
+                changes.append({"sku": sku, "model": model, "old": old_price, "new": new_price})
+    return changes
+
+
+def write_catalog(catalog_path: PathLike, catalog: Sequence[Dict]) -> Tuple[bool, List[Dict]]:
+    """Write `catalog` if it differs from the file on disk.
+
+    Returns `(written, changes)`.
+    """
+    changes = diff_prices(read_catalog(catalog_path), catalog)
+    if not write_if_changed(catalog_path, json.dumps(catalog, indent=2)):
+        return False, []
+    # Workers notice the new file on their next lookup; shared results are dropped for all of them now.
+    shared_cache.bump()
+    return True, changes
@@ -0,0 +1,216 @@
+"""GCP price sync from the Cloud Billing Catalog API.
+
+Compute Engine bills predefined machine types per vCPU-hour and per GB-hour of
+memory, by machine family. The sync reads the Compute Engine SKU listing and
+prices each catalog machine type (`n2-standard-4`: family N2, 4 vCPUs, 16 GB)
+as `vcpu * core rate + ram_gb * ram rate`, for all four pricing models:
+
+  on_demand      `OnDemand` usage
+  spot           `Preemptible` usage (Spot VMs)
+  reserved_1yr   `Commit1Yr` committed-use rates
+  reserved_3yr   `Commit3Yr` committed-use rates
+
+Machine types whose family has no core or RAM rate in the listing (e.g. GPU
+machine types, whose accelerators are billed separately) are left as they are.
+
+Usage (needs an API key with the Cloud Billing API enabled):
+  GCP_API_KEY=... python -m utils.gcp_price_sync --write-catalog [--region europe-west1 ...]
+
+The listing covers every region, so one pass over it syncs all requested
+regions. Its pages are chained by `nextPageToken` and therefore fetched one
+after another, each parsed as it streams in (see `utils.catalog_sync`).
+Results are written like the AWS sync: a price cache at
+`backend/cache/gcp_prices.json` (per region for other regions), and with
+`--write-catalog` the catalogs, atomically and only when prices changed.
+"""
+import argparse
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from cloud_providers.regions import DEFAULT_REGIONS, catalog_file
+from utils.catalog_sync import (
+    apply_prices,
+    fetch_page,
+    load_catalog,
+    make_session,
+    min_price,
+    record_history,
+    write_results,
+)
+from utils.rate_limit import TokenBucket
+
+LOG = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).parent.parent
+CATALOG_PATH = BASE_DIR / 'data' / 'gcp_catalog.json'
+CACHE_DIR = BASE_DIR / 'cache'
+CACHE_PATH = CACHE_DIR / 'gcp_prices.json'
+
+COMPUTE_ENGINE_SERVICE = '6F81-5844-456A'
+SKUS_URL = f'https://cloudbilling.googleapis.com/v1/services/{COMPUTE_ENGINE_SERVICE}/skus'
+PAGE_SIZE = 5000
+DEFAULT_SYNC_RATE = 5.0  # listing pages per second
+
+USAGE_MODELS = {
+    'OnDemand': 'on_demand',
+    'Preemptible': 'spot',
+    'Commit1Yr': 'reserved_1yr',
+    'Commit3Yr': 'reserved_3yr',
+}
+
+# "N2 Instance Core running in Americas", "N1 Predefined Instance Ram running in EMEA",
+# "Spot Preemptible N2D AMD Instance Core ...", "Commitment v1: N2 Cpu in Americas for 1 Year",
+# "Compute optimized Core running in Americas" (C2), "Memory-optimized Instance Ram ..." (M1).
+# Custom, sole-tenant and extended-memory SKUs do not match.
+_DESCRIPTION = re.compile(
+    r'^(?:Spot Preemptible |Preemptible )?(?:Commitment v1: )?'
+    r'(?:(?P<family>Compute optimized|Memory-optimized|[A-Z][A-Z0-9]*) )?'
+    r'(?:Predefined |AMD )?(?:Instance )?(?P<resource>Core|Cpu|Ram)\b'
+)
+FAMILY_ALIASES = {'Compute optimized': 'C2', 'Memory-optimized': 'M1'}
+
+# (family, resource, pricing model) -> hourly USD rate, per region
+Rates = Dict[str, Dict[Tuple[str, str, str], float]]
+
+
+def _catalog_path(region: Optional[str] = None) -> Path:
+    if region is None or region == DEFAULT_REGIONS['gcp']:
+        return CATALOG_PATH
+    return CATALOG_PATH.parent / catalog_file('gcp', region)
+
+
+def _cache_path(region: Optional[str] = None) -> Path:
+    if region is None or region == DEFAULT_REGIONS['gcp']:
+        return CACHE_PATH
+    return CACHE_PATH.with_name(f'{CACHE_PATH.stem}-{region}.json')
+
+
+def _history_path() -> Path:
+    return Path(os.environ.get('PRICE_HISTORY_DB') or CACHE_DIR / 'price_history.db')
+
+
+def _unit_price(sku: dict) -> Optional[float]:
+    """Hourly USD rate of the current pricing info's highest tier."""
+    infos = sku.get('pricingInfo') or []
+    if not infos:
+        return None
+    rates = infos[-1].get('pricingExpression', {}).get('tieredRates') or []
+    if not rates:
+        return None
+    money = rates[-1].get('unitPrice', {})
+    if money.get('currencyCode', 'USD') != 'USD':
+        return None
+    return int(money.get('units') or 0) + int(money.get('nanos') or 0) / 1e9
+
+
+def classify_sku(sku: dict) -> Optional[Tuple[str, str, str, float]]:
+    """`(family, resource, pricing_model, hourly_usd)` for a predefined core/RAM SKU, else None."""
+    category = sku.get('category', {})
+    model = USAGE_MODELS.get(category.get('usageType'))
+    if model is None or category.get('resourceFamily') != 'Compute':
+        return None
+    match = _DESCRIPTION.match(sku.get('description', ''))
+    if match is None:
+        return None
+    family = match.group('family') or 'N1'
+    family = FAMILY_ALIASES.get(family, family)
+    resource = 'ram' if match.group('resource') == 'Ram' else 'core'
+    price = _unit_price(sku)
+    if price is None:
+        return None
+    return family, resource, model, price
+
+
+def machine_prices(entry: dict, rates: Dict[Tuple[str, str, str], float]) -> Dict[str, float]:
+    """Hourly price per pricing model of a catalog machine type from per-vCPU and per-GB rates."""
+    family = entry.get('sku', '').split('-')[0].upper()
+    prices = {}
+    for model in USAGE_MODELS.values():
+        core, ram = rates.get((family, 'core', model)), rates.get((family, 'ram', model))
+        if core is not None and ram is not None:
+            prices[model] = entry['vcpu'] * core + entry['ram_gb'] * ram
+    return prices
+
+
+def fetch_rates(regions: Iterable[str], api_key: Optional[str] = None, base_url: str = SKUS_URL,
+                rate: float = DEFAULT_SYNC_RATE, session=None) -> Rates:
+    """Core and RAM rates for `regions` from one pass over the Compute Engine SKU listing."""
+    wanted = set(regions)
+    by_region: Dict[str, Dict[str, Dict[str, float]]] = {region: {} for region in wanted}
+
+    def on_item(sku):
+        classified = classify_sku(sku)
+        if classified is None:
+            return
+        family, resource, model, price = classified
+        for region in wanted.intersection(sku.get('serviceRegions') or ()):
+            # Keyed like a catalog price map so repeated SKUs keep the lowest rate.
+            min_price(by_region[region], f'{family}/{resource}', model, price)
+
+    own_session = session is None
+    session = session or make_session(1)
+    limiter = TokenBucket(rate)
+    params = {'pageSize': PAGE_SIZE, 'currencyCode': 'USD'}
+    if api_key:
+        params['key'] = api_key
+    pages = 0
+    try:
+        token = None
+        while True:
+            page_params = dict(params, pageToken=token) if token else params
+            token = fetch_page(session, base_url, page_params, 'skus', 'nextPageToken', on_item, limiter=limiter)
+            pages += 1
+            if not token:
+                break
+    finally:
+        if own_session:
+            session.close()
+    LOG.info('Read %d GCP SKU listing pages', pages)
+    return {
+        region: {(*key.split('/'), model): price for key, models in found.items() for model, price in models.items()}
+        for region, found in by_region.items()
+    }
+
+
+def sync_prices(write_back: bool = False, regions: Optional[List[str]] = None, api_key: Optional[str] = None,
+                base_url: str = SKUS_URL, rate: float = DEFAULT_SYNC_RATE) -> Dict[str, dict]:
+    """Price every catalog machine type of `regions` (default us-central1) from one listing pass.
+
+    Writes each region's price cache and optionally its catalog. Returns
+    `{ region: { sku: on_demand_price_per_hour_or_None } }`.
+    """
+    regions = list(dict.fromkeys(regions or [DEFAULT_REGIONS['gcp']]))
+    api_key = api_key or os.environ.get('GCP_API_KEY')
+    rates = fetch_rates(regions, api_key=api_key, base_url=base_url, rate=rate)
+    results = {}
+    for region in regions:
+        catalog, seeded = load_catalog(_catalog_path(region), CATALOG_PATH)
+        prices = {entry.get('sku'): machine_prices(entry, rates[region]) for entry in catalog}
+        prices = {sku: models for sku, models in prices.items() if models}
+        record_history('gcp', region, prices, _history_path())
+        updated = apply_prices(catalog, prices)
+        write_results(catalog, updated, write_back, _cache_path(region), _catalog_path(region), seeded=seeded)
+        results[region] = updated
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sync GCP prices into the local catalog')
+    parser.add_argument('--write-catalog', action='store_true', help='Overwrite catalogs with fetched prices')
+    parser.add_argument('--region', action='append',
+                        help="GCP region code, repeatable, e.g. 'europe-west1' (default: the main us-central1 catalog)")
+    parser.add_argument('--api-key', help='Cloud Billing API key (default: GCP_API_KEY)')
+    parser.add_argument('--rate', type=float, default=DEFAULT_SYNC_RATE, help='Max listing pages per second')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    LOG.info('Starting GCP price sync (regions=%s)', args.region or [DEFAULT_REGIONS['gcp']])
+    results = sync_prices(write_back=args.write_catalog, regions=args.region, api_key=args.api_key, rate=args.rate)
+    LOG.info('Sync complete; %s', ', '.join(f'{region}: {len(updated)} SKUs' for region, updated in results.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+"""Leader election for periodic jobs through lease files.
+
+Every web worker that starts the price sync scheduler fires the same jobs at
+the same time. `run_as_leader` lets exactly one of them run a given job: the
+job's lease lives in `<PRICE_SYNC_LOCK_DIR>/<job>.lease` (default
+`backend/cache/locks`), and is read and updated only while holding an
+exclusive `flock` on `<job>.lease.lock`. Point the directory at a volume shared
+by several hosts to elect one leader across all of them.
+
+The lease records its owner and expiry, renewed by a heartbeat while the job
+runs, so a crashed leader blocks the job for at most `PRICE_SYNC_LEASE_SECONDS`.
+It also records when the job was last attempted and when it last succeeded.
+Processes whose timer fires later in the same window (because of jitter) see
+the recent success and skip the run instead of repeating it. After a failed
+attempt they also skip until `PRICE_SYNC_RETRY_SECONDS` have passed, so an
+upstream outage is retried once per backoff window, not by every process.
+
+A job split into parts (a sync's regions) records each part's success, and a
+retry only runs the parts that have not succeeded within the minimum interval.
+Followers do no work: they pick up the new catalogs through the registry.
+"""
+import fcntl
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+from utils.catalog_writer import atomic_write_bytes
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCK_DIR = Path(__file__).parent.parent / "cache" / "locks"
+LEASE_SECONDS = float(os.environ.get("PRICE_SYNC_LEASE_SECONDS", "1800"))
+MIN_INTERVAL_SECONDS = float(os.environ.get("PRICE_SYNC_MIN_INTERVAL_SECONDS", str(12 * 3600)))
+RETRY_INTERVAL_SECONDS = float(os.environ.get("PRICE_SYNC_RETRY_SECONDS", "1800"))
+
+
+def lock_dir() -> Path:
+    return Path(os.environ.get("PRICE_SYNC_LOCK_DIR") or DEFAULT_LOCK_DIR)
+
+
+class Lease:
+    """One process's handle on the lease of job `name`."""
+
+    def __init__(self, name: str, directory: Optional[Union[str, Path]] = None, ttl: float = LEASE_SECONDS,
+                 clock: Callable[[], float] = time.time):
+        self.name = name
+        self.path = Path(directory or lock_dir()) / f"{name}.lease"
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._clock = clock
+
+    @contextmanager
+    def _state(self) -> Iterator[Dict]:
+        """Lease state, under the lock; changes made to it are written back on exit."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_name(self.path.name + ".lock"), "a") as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                try:
+                    state = json.loads(self.path.read_text())
+                except (FileNotFoundError, ValueError):
+                    state = {}
+                before = dict(state)
+                yield state
+                if state != before:
+                    atomic_write_bytes(self.path, json.dumps(state).encode())
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def acquire(self) -> bool:
+        """Take the lease if it is free, expired or already ours."""
+        with self._state() as state:
+            now = self._clock()
+            holder = state.get("owner")
+            if holder not in (None, self.owner) and state.get("expires", 0) > now:
+                return False
+            state.update(owner=self.owner, expires=now + self.ttl)
+            return True
+
+    def renew(self) -> bool:
+        """Extend the lease; False if it was lost (expired and taken over)."""
+        with self._state() as state:
+            if state.get("owner") != self.owner:
+                return False
+            state["expires"] = self._clock() + self.ttl
+            return True
+
+    def release(self, succeeded: bool = False, attempted: bool = False, parts: Iterable[str] = ()) -> None:
+        """Give the lease up, recording an attempt, its success and the parts that succeeded."""
+        with self._state() as state:
+            if state.get("owner") != self.owner:
+                return
+            state.update(owner=None, expires=0)
+            now = self._clock()
+            if attempted:
+                state["last_attempt"] = now
+            if succeeded:
+                state["last_success"] = now
+            parts = list(parts)
+            if parts:
+                state["parts"] = {**state.get("parts", {}), **{part: now for part in parts}}
+
+    def last_success(self) -> Optional[float]:
+        with self._state() as state:
+            return state.get("last_success")
+
+    def snapshot(self) -> Dict:
+        """A copy of the lease state: `last_attempt`, `last_success` and per-part `parts` times."""
+        with self._state() as state:
+            return dict(state)
+
+
+class _Heartbeat:
+    """Renews a lease every third of its TTL while a job runs."""
+
+    def __init__(self, lease: Lease):
+        self.lease = lease
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{lease.name}", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.lease.ttl / 3):
+            try:
+                if not self.lease.renew():
+                    logger.warning("Lost the %s lease while running; another process may take over", self.lease.name)
+                    return
+            except OSError:
+                logger.exception("Failed to renew the %s lease", self.lease.name)
+
+    def __enter__(self) -> "_Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def run_as_leader(name: str, job: Callable, directory: Optional[Union[str, Path]] = None,
+                  ttl: float = LEASE_SECONDS, min_interval: float = MIN_INTERVAL_SECONDS,
+                  clock: Callable[[], float] = time.time, retry_interval: Optional[float] = None,
+                  parts: Optional[Sequence[str]] = None) -> bool:
+    """Run `job` if this process wins job `name`'s lease and the job is due.
+
+    The job is due unless it succeeded within `min_interval`, or its last
+    attempt failed within `retry_interval` (default `PRICE_SYNC_RETRY_SECONDS`).
+    A job that raises, or returns False, records a failed attempt. Exceptions
+    from `job` propagate after the lease is released.
+
+    With `parts`, `job` is called with the parts that have not succeeded within
+    `min_interval` and returns the ones that succeeded; the job succeeded when
+    all of them did.
+
+    Returns whether `job` ran.
+    """
+    retry_interval = RETRY_INTERVAL_SECONDS if retry_interval is None else retry_interval
+    lease = Lease(name, directory, ttl, clock)
+    if not lease.acquire():
+        logger.info("%s is running in another process; skipping", name)
+        return False
+    succeeded = False
+    attempted = False
+    done: List[str] = []
+    try:
+        state = lease.snapshot()
+        now = clock()
+        last, tried = state.get("last_success"), state.get("last_attempt")
+        if tried is not None and (last is None or tried > last) and now - tried < retry_interval:
+            logger.info("%s failed %.0fs ago; retrying after %.0fs", name, now - tried, retry_interval)
+            return False
+        if parts is None:
+            if last is not None and now - last < min_interval:
+                logger.info("%s succeeded %.0fs ago in another process; skipping", name, now - last)
+                return False
+        else:
+            recent = state.get("parts", {})
+            pending = [part for part in parts if now - recent.get(part, float("-inf")) >= min_interval]
+            if not pending:
+                logger.info("%s succeeded for %s within %.0fs; skipping", name, ", ".join(parts), min_interval)
+                return False
+        attempted = True
+        with _Heartbeat(lease):
+            if parts is None:
+                succeeded = job() is not False
+            else:
+                done = [part for part in job(pending) or () if part in pending]
+                succeeded = len(done) == len(pending)
+        return True
+    finally:
+        lease.release(succeeded, attempted, done)
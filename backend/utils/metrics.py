@@ -0,0 +1,262 @@
+"""In-process metrics in the Prometheus text format, and per-request stage timings.
+
+Metrics are plain counters and fixed-bucket histograms guarded by one lock
+each, so recording a sample costs a bisect and an increment. Every worker
+process keeps its own values; `/api/metrics` reports the worker that answered.
+
+Stage timings (`stage("validate")`, `record_stage(...)`) are collected per
+request in a context variable and rendered as a `Server-Timing` header. They
+are no-ops outside a request, e.g. in the price sync or provider threads.
+"""
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SYNC_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+Labels = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *labels: str, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (last one is +Inf), sum, count].
+        self._series: Dict[Labels, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._series.items())
+        lines = self.header()
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics plus collectors that report values owned elsewhere (e.g. cache counters)."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]) -> None:
+        """`collector()` yields `(name, kind, help, [(suffix, labels, value), ...])` at render time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, kind, help, samples in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for suffix, labels, value in samples:
+                    lines.append(f"{name}{suffix}{_labels(tuple(labels), tuple(labels.values()))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "infracostiq_http_request_duration_seconds", "HTTP request latency by route.", ("route", "method", "status"))
+PROVIDER_COMPUTE_SECONDS = REGISTRY.histogram(
+    "infracostiq_provider_compute_seconds", "Time to price one workload per provider.", ("provider", "status"))
+CATALOG_LOADS = REGISTRY.counter(
+    "infracostiq_catalog_loads_total", "Catalog file loads and reloads.", ("file",))
+CATALOG_LOAD_SECONDS = REGISTRY.histogram(
+    "infracostiq_catalog_load_duration_seconds", "Time to load (parse or map) a catalog file.", ("file",))
+PRICE_SYNC_RUNS = REGISTRY.counter(
+    "infracostiq_price_sync_runs_total", "Price sync runs by outcome.", ("provider", "region", "outcome"))
+PRICE_SYNC_SECONDS = REGISTRY.histogram(
+    "infracostiq_price_sync_duration_seconds", "Price sync run duration.", ("provider", "region"), SYNC_BUCKETS)
+PRICE_SYNC_LAST_SUCCESS = REGISTRY.gauge(
+    "infracostiq_price_sync_last_success_timestamp_seconds", "Unix time of the last successful price sync.",
+    ("provider", "region"))
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+class Timings:
+    """Stage durations of one request, in insertion order."""
+
+    __slots__ = ("started", "stages")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: List[Tuple[str, float, Optional[str]]] = []
+
+    def add(self, name: str, seconds: float, description: Optional[str] = None) -> None:
+        self.stages.append((name, seconds, description))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def header(self, total: bool = True) -> str:
+        """`Server-Timing` header value, durations in milliseconds."""
+        parts = []
+        for name, seconds, description in self.stages:
+            desc = f';desc="{description}"' if description else ""
+            parts.append(f"{name}{desc};dur={seconds * 1000:.3f}")
+        if total:
+            parts.append(f"total;dur={self.elapsed() * 1000:.3f}")
+        return ", ".join(parts)
+
+
+_timings: contextvars.ContextVar[Optional[Timings]] = contextvars.ContextVar("request_timings", default=None)
+
+
+def start_request() -> Tuple[Timings, contextvars.Token]:
+    timings = Timings()
+    return timings, _timings.set(timings)
+
+
+def end_request(token: contextvars.Token) -> None:
+    _timings.reset(token)
+
+
+def current_timings() -> Optional[Timings]:
+    return _timings.get()
+
+
+def record_stage(name: str, seconds: float, description: Optional[str] = None) -> None:
+    timings = _timings.get()
+    if timings is not None:
+        timings.add(name, seconds, description)
+
+
+class stage:
+    """Context manager timing the enclosed block as stage `name` of the current request."""
+
+    __slots__ = ("name", "timings", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.timings = _timings.get()
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        if self.timings is not None:
+            self.timings.stages.append((self.name, time.perf_counter() - self.started, None))
+
+
+def _result_cache_samples():
+    from utils.result_cache import get_result_cache
+
+    stats = get_result_cache().stats()
+    lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+    prefix = "infracostiq_result_cache"
+    for field in ("hits", "misses", "coalesced", "evictions", "expirations", "shared_hits"):
+        yield f"{prefix}_{field}_total", "counter", f"Result cache {field}.", [("", {}, stats[field])]
+    yield f"{prefix}_entries", "gauge", "Entries in the result cache.", [("", {}, stats["entries"])]
+    yield f"{prefix}_bytes", "gauge", "Estimated size of cached results.", [("", {}, stats["bytes"])]
+    yield (f"{prefix}_hit_ratio", "gauge", "Share of lookups served without computing (hits and coalesced).",
+           [("", {}, (stats["hits"] + stats["coalesced"]) / lookups if lookups else 0.0)])
+
+
+REGISTRY.add_collector(_result_cache_samples)
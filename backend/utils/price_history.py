@@ -0,0 +1,184 @@
+"""Append-only price history in an embedded SQLite database.
+
+Every price sync records the price of each synced SKU and pricing model,
+stamped with the sync time, in one transaction. Layout:
+
+- `series`: one row per (provider, region, sku, model).
+- `prices`: `(series_id, ts, price)` in a WITHOUT ROWID table clustered on
+  `(series_id, ts)`, so the history of one SKU over a time range is a single
+  contiguous range scan however many rows the table holds. An index on `ts`
+  serves time-range queries across SKUs.
+
+`series()` downsamples to at most `points` buckets per pricing model
+(min/max/avg per bucket) in SQL, which keeps `/api/prices/history` responses
+small and fast at millions of rows.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = Path(__file__).parent.parent / "cache" / "price_history.db"
+DEFAULT_POINTS = 200
+MAX_POINTS = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    id INTEGER PRIMARY KEY,
+    provider TEXT NOT NULL,
+    region TEXT NOT NULL,
+    sku TEXT NOT NULL,
+    model TEXT NOT NULL,
+    UNIQUE (provider, region, sku, model)
+);
+CREATE TABLE IF NOT EXISTS prices (
+    series_id INTEGER NOT NULL REFERENCES series (id),
+    ts INTEGER NOT NULL,
+    price REAL NOT NULL,
+    PRIMARY KEY (series_id, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS prices_ts ON prices (ts);
+CREATE TABLE IF NOT EXISTS syncs (
+    id INTEGER PRIMARY KEY,
+    ts INTEGER NOT NULL,
+    provider TEXT NOT NULL,
+    region TEXT NOT NULL,
+    rows INTEGER NOT NULL
+);
+"""
+
+
+def bucket_width(start: int, end: int, points: int) -> int:
+    """Seconds per bucket so that `[start, end]` fits in `points` buckets."""
+    return max(1, -(-(end - start + 1) // max(1, points)))
+
+
+def history_path() -> Path:
+    return Path(os.environ.get("PRICE_HISTORY_DB") or DEFAULT_PATH)
+
+
+def enabled() -> bool:
+    return os.environ.get("PRICE_HISTORY", "1").lower() not in ("0", "false", "no")
+
+
+class PriceHistory:
+    """Price history store at `path`. Safe to share between threads (one connection per thread)."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _series_ids(self, conn: sqlite3.Connection, provider: str, region: str, keys: Iterable[Tuple[str, str]]) -> Dict:
+        keys = list(keys)
+        conn.executemany(
+            "INSERT OR IGNORE INTO series (provider, region, sku, model) VALUES (?, ?, ?, ?)",
+            [(provider, region, sku, model) for sku, model in keys],
+        )
+        rows = conn.execute("SELECT sku, model, id FROM series WHERE provider = ? AND region = ?", (provider, region))
+        return {(sku, model): series_id for sku, model, series_id in rows}
+
+    def record(self, provider: str, region: str, prices: Mapping[str, Mapping[str, Optional[float]]],
+               ts: Optional[int] = None) -> int:
+        """Record one sync's `{sku: {model: price}}` at `ts` (default now); returns rows written."""
+        ts = int(time.time() if ts is None else ts)
+        points = [(sku, model, float(price)) for sku, models in prices.items() for model, price in models.items()
+                  if price is not None]
+        if not points:
+            return 0
+        with self._write_lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                ids = self._series_ids(conn, provider, region, {(sku, model) for sku, model, _ in points})
+                conn.executemany(
+                    "INSERT OR REPLACE INTO prices (series_id, ts, price) VALUES (?, ?, ?)",
+                    [(ids[(sku, model)], ts, price) for sku, model, price in points],
+                )
+                conn.execute("INSERT INTO syncs (ts, provider, region, rows) VALUES (?, ?, ?, ?)",
+                             (ts, provider, region, len(points)))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return len(points)
+
+    def series(self, provider: str, region: str, sku: str, model: Optional[str] = None,
+               start: Optional[int] = None, end: Optional[int] = None,
+               points: int = DEFAULT_POINTS) -> Dict[str, List[Dict[str, float]]]:
+        """`{model: [{ts, min, max, avg, count}, ...]}` for `sku` over `[start, end]`, at most `points` buckets each.
+
+        `ts` is the first sample time in each bucket.
+        """
+        end = int(time.time() if end is None else end)
+        start = int(0 if start is None else start)
+        width = bucket_width(start, end, min(points, MAX_POINTS))
+        conn = self._connection()
+        query = "SELECT model, id FROM series WHERE provider = ? AND region = ? AND sku = ?"
+        params: list = [provider, region, sku]
+        if model is not None:
+            query += " AND model = ?"
+            params.append(model)
+        result = {}
+        for name, series_id in conn.execute(query + " ORDER BY model", params).fetchall():
+            rows = conn.execute(
+                "SELECT MIN(ts), MIN(price), MAX(price), AVG(price), COUNT(*) FROM prices"
+                " WHERE series_id = ? AND ts BETWEEN ? AND ? GROUP BY (ts - ?) / ? ORDER BY 1",
+                (series_id, start, end, start, width),
+            ).fetchall()
+            result[name] = [{"ts": ts, "min": low, "max": high, "avg": round(avg, 6), "count": count}
+                            for ts, low, high, avg, count in rows]
+        return result
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM prices").fetchone()[0]
+
+
+_stores: Dict[Path, PriceHistory] = {}
+_stores_lock = threading.Lock()
+
+
+def get_history(path: Optional[Union[str, Path]] = None) -> PriceHistory:
+    """Process-wide store for `path` (default `history_path()`)."""
+    path = Path(path) if path is not None else history_path()
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = PriceHistory(path)
+        return store
+
+
+def record_sync(provider: str, region: str, prices: Mapping[str, Mapping[str, Optional[float]]],
+                path: Optional[Union[str, Path]] = None, ts: Optional[int] = None) -> int:
+    """Record a sync's prices; failures are logged, never raised, so a sync is not failed by its history."""
+    if not enabled():
+        return 0
+    try:
+        rows = get_history(path).record(provider, region, prices, ts)
+    except sqlite3.Error:
+        logger.exception("Failed to record %s/%s prices in the price history", provider, region)
+        return 0
+    logger.info("Recorded %d %s/%s prices in the price history", rows, provider, region)
+    return rows
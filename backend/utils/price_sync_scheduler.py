@@ -1,7 +1,12 @@
 """Periodic price sync scheduler for maintaining current cloud pricing data.
 
 This module provides scheduling functionality to automatically sync cloud instance
-prices from AWS public offerings at regular intervals (default: daily at 2 AM UTC).
+prices at regular intervals (default: daily at 2 AM UTC): AWS from the public
+EC2 offerings, Azure from the Retail Prices API and, when GCP_API_KEY is set,
+GCP from the Cloud Billing Catalog API. The providers are separate jobs,
+staggered and jittered so they do not all start at once, and each scheduled
+run happens in a single process however many workers start the scheduler
+(see `utils.leader_lease`).
 
 Usage in Flask app:
     from utils.price_sync_scheduler import start_scheduler, stop_scheduler
@@ -15,37 +20,135 @@ Usage in Flask app:
 """
 
 import logging
+import os
+import time
 from datetime import datetime
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 
+from utils import metrics
+from utils.leader_lease import run_as_leader
+
 logger = logging.getLogger(__name__)
 scheduler = None
 
 
-def sync_aws_prices():
+REGION_ENV = {"aws": "PRICE_SYNC_REGIONS", "azure": "AZURE_PRICE_SYNC_REGIONS", "gcp": "GCP_PRICE_SYNC_REGIONS"}
+
+
+def sync_regions(provider="aws"):
+    """Regions to sync for `provider`, from its REGION_ENV variable (comma separated; default its default region)."""
+    from cloud_providers.regions import DEFAULT_REGIONS
+
+    regions = os.environ.get(REGION_ENV[provider], DEFAULT_REGIONS[provider])
+    return [region.strip() for region in regions.split(",") if region.strip()]
+
+
+def _run_sync(provider, regions, sync):
+    """Run `sync()` for `regions` of `provider`, logging and recording its outcome per region.
+
+    Returns whether the sync succeeded.
+    """
+    started = time.perf_counter()
+    label = ", ".join(regions)
+    try:
+        logger.info(f"[{datetime.now()}] Starting {provider} price sync job for {label}...")
+        sync()
+        logger.info(f"[{datetime.now()}] {provider} price sync for {label} completed successfully.")
+        outcome = "success"
+    except Exception as e:
+        logger.error(f"[{datetime.now()}] {provider} price sync for {label} failed: {e}", exc_info=True)
+        outcome = "error"
+    elapsed = time.perf_counter() - started
+    for region in regions:
+        metrics.PRICE_SYNC_RUNS.inc(provider, region, outcome)
+        if outcome == "success":
+            metrics.PRICE_SYNC_LAST_SUCCESS.set(provider, region, value=time.time())
+        metrics.PRICE_SYNC_SECONDS.observe(elapsed, provider, region)
+    return outcome == "success"
+
+
+def sync_aws_prices(regions=None):
     """Execute AWS price sync job.
     
-    Syncs public EC2 offerings without requiring AWS credentials.
-    Catches and logs any errors to avoid crashing the scheduler.
+    Syncs public EC2 offerings without requiring AWS credentials, once per
+    region in `regions` (default PRICE_SYNC_REGIONS). Catches and logs any
+    errors to avoid crashing the scheduler; a failing region does not stop the
+    others. Duration and outcome of each region's run are recorded in
+    `utils.metrics`. Returns the regions that synced successfully.
     """
+    regions = sync_regions("aws") if regions is None else regions
     try:
         from utils.aws_price_sync import sync_prices_public
-
-        logger.info(f"[{datetime.now()}] Starting AWS price sync job...")
-        sync_prices_public(write_back=True, location="us-east-1")
-        logger.info(f"[{datetime.now()}] AWS price sync completed successfully.")
     except Exception as e:
         logger.error(f"[{datetime.now()}] AWS price sync failed: {e}", exc_info=True)
+        metrics.PRICE_SYNC_RUNS.inc("aws", "all", "error")
+        return []
+
+    return [region for region in regions
+            if _run_sync("aws", [region], lambda: sync_prices_public(write_back=True, region=region))]
+
+
+def sync_azure_prices(regions=None):
+    """Execute Azure price sync job, once per region in `regions` (default AZURE_PRICE_SYNC_REGIONS, eastus).
+
+    Returns the regions that synced successfully.
+    """
+    from utils.azure_price_sync import sync_prices
+
+    regions = sync_regions("azure") if regions is None else regions
+    return [region for region in regions
+            if _run_sync("azure", [region], lambda: sync_prices(write_back=True, region=region))]
+
+
+def sync_gcp_prices(regions=None):
+    """Execute GCP price sync job for `regions` (default GCP_PRICE_SYNC_REGIONS, us-central1), in one listing pass.
+
+    Returns the regions that synced successfully: all of them or none.
+    """
+    from utils.gcp_price_sync import sync_prices
+
+    regions = sync_regions("gcp") if regions is None else regions
+    ok = _run_sync("gcp", regions, lambda: sync_prices(write_back=True, regions=regions))
+    return list(regions) if ok else []
+
+
+# (job id, name, provider, job function); providers are staggered in this order.
+JOBS = [
+    ("aws_price_sync", "AWS Price Sync", "aws", sync_aws_prices),
+    ("azure_price_sync", "Azure Price Sync", "azure", sync_azure_prices),
+    ("gcp_price_sync", "GCP Price Sync", "gcp", sync_gcp_prices),
+]
+STAGGER_MINUTES = int(os.environ.get("PRICE_SYNC_STAGGER_MINUTES", "15"))
+JITTER_SECONDS = int(os.environ.get("PRICE_SYNC_JITTER_SECONDS", "300"))
+
+
+def leader_job(job_id, provider, job):
+    """`job` wrapped to run only in the process holding `job_id`'s lease (see `utils.leader_lease`).
+
+    Regions are the lease's parts: after a partial failure, a retry syncs
+    only the regions that failed.
+    """
+    def run():
+        if not run_as_leader(job_id, job, parts=sync_regions(provider)):
+            metrics.PRICE_SYNC_RUNS.inc(provider, "all", "skipped")
+
+    run.__name__ = job.__name__
+    return run
 
 
 def start_scheduler(app=None, cron_hour=2, cron_minute=0):
     """Start the background scheduler for periodic price syncs.
-    
+
+    Every process may call this: each job runs in only one of them (per host,
+    or per shared PRICE_SYNC_LOCK_DIR volume), chosen by lease. Provider jobs
+    start PRICE_SYNC_STAGGER_MINUTES apart, each with up to
+    PRICE_SYNC_JITTER_SECONDS of random delay.
+
     Args:
         app: Flask app instance (optional; used for app context if needed).
-        cron_hour: Hour of day (0-23) to run sync (default: 2 = 2 AM UTC).
-        cron_minute: Minute of hour (0-59) to run sync (default: 0).
+        cron_hour: Hour of day (0-23) to run the first sync (default: 2 = 2 AM UTC).
+        cron_minute: Minute of hour (0-59) to run the first sync (default: 0).
     """
     global scheduler
 
@@ -55,20 +158,25 @@ def start_scheduler(app=None, cron_hour=2, cron_minute=0):
 
     scheduler = BackgroundScheduler()
 
-    # Schedule AWS price sync to run daily at specified time (UTC)
-    scheduler.add_job(
-        sync_aws_prices,
-        trigger=CronTrigger(hour=cron_hour, minute=cron_minute),
-        id="aws_price_sync",
-        name="AWS Price Sync",
-        replace_existing=True,
-        misfire_grace_time=60,  # Allow up to 60s grace for missed runs
-    )
+    scheduled = []
+    for job_id, name, provider, job in JOBS:
+        if provider == "gcp" and not os.environ.get("GCP_API_KEY"):
+            logger.info("GCP_API_KEY is not set; GCP price sync not scheduled.")
+            continue
+        start = cron_hour * 60 + cron_minute + STAGGER_MINUTES * len(scheduled)
+        hour, minute = divmod(start % (24 * 60), 60)
+        scheduler.add_job(
+            leader_job(job_id, provider, job),
+            trigger=CronTrigger(hour=hour, minute=minute, jitter=JITTER_SECONDS or None),
+            id=job_id,
+            name=name,
+            replace_existing=True,
+            misfire_grace_time=60 + JITTER_SECONDS,  # Allow grace for missed runs beyond the jitter
+        )
+        scheduled.append(f"{name} at {hour:02d}:{minute:02d}")
 
     scheduler.start()
-    logger.info(
-        f"Scheduler started. AWS price sync scheduled daily at {cron_hour:02d}:{cron_minute:02d} UTC."
-    )
+    logger.info(f"Scheduler started. Daily (UTC): {', '.join(scheduled)}.")
 
 
 def stop_scheduler():
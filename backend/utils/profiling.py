@@ -0,0 +1,341 @@
+"""Operator-only profiling of live requests.
+
+A request to `/api/calculate` or `/api/calculate/batch` carrying
+`X-Profile: deterministic|sampling` and a matching `X-Profile-Token` is run
+under a profiler; the profile is stored under `PROFILE_DIR` and its id is
+returned in the `X-Profile-Id` response header. Stored profiles are listed
+and fetched through `/api/admin/profiles` (same token).
+
+Two profilers are available:
+
+- `deterministic`: a `sys.setprofile` tracer recording the exact self time of
+  every call stack, including C functions. Slow (several times the normal
+  run time) but complete.
+- `sampling`: a background thread sampling the request thread's stack every
+  `PROFILE_SAMPLE_INTERVAL_MS`; low overhead, statistically accurate for
+  anything that runs for more than a few samples.
+
+While a request is profiled its providers run on the request thread and the
+result cache is bypassed (see `active()`), so the profile covers the whole
+computation. Profiles are kept as flamegraph-compatible collapsed stacks
+(`a;b;c <weight>`) and as a d3-flame-graph style call tree.
+
+With `PROFILE_CONTINUOUS=1` a low-rate sampler over all threads writes a
+collapsed-stack profile every `PROFILE_CONTINUOUS_SECONDS`.
+
+Profiling is disabled unless `PROFILING_TOKEN` is set.
+"""
+import contextvars
+import hmac
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.environ.get(
+    "PROFILE_DIR", os.path.join(os.path.dirname(__file__), "..", "cache", "profiles")
+)
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", "100"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.environ.get("PROFILE_SAMPLE_INTERVAL_MS", "1"))
+PROFILE_CONTINUOUS_HZ = float(os.environ.get("PROFILE_CONTINUOUS_HZ", "10"))
+PROFILE_CONTINUOUS_SECONDS = float(os.environ.get("PROFILE_CONTINUOUS_SECONDS", "300"))
+
+DETERMINISTIC = "deterministic"
+SAMPLING = "sampling"
+MODES = (DETERMINISTIC, SAMPLING)
+
+# Leaf frames of threads that are parked, skipped when sampling every thread.
+IDLE_LEAVES = frozenset({
+    "threading:wait",
+    "threading:_wait_for_tstate_lock",
+    "selectors:select",
+    "socketserver:serve_forever",
+    "concurrent.futures.thread:_worker",
+    "asyncio.base_events:_run_once",
+})
+
+_active: contextvars.ContextVar[bool] = contextvars.ContextVar("profiling_active", default=False)
+
+
+class Profile:
+    """Collapsed stacks with their weights (microseconds or sample counts)."""
+
+    def __init__(self, mode: str, unit: str, stacks: Mapping[str, float], duration: float,
+                 meta: Optional[Dict[str, Any]] = None):
+        self.mode = mode
+        self.unit = unit
+        self.stacks = dict(stacks)
+        self.duration = duration
+        self.meta = dict(meta or {})
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed format, as read by flamegraph.pl, speedscope and inferno."""
+        return "".join(f"{stack} {round(weight)}\n" for stack, weight in sorted(self.stacks.items()) if weight >= 0.5)
+
+    def tree(self) -> Dict[str, Any]:
+        """Call tree `{name, value, children}`, where `value` is the inclusive weight."""
+        root: Dict[str, Any] = {"name": "root", "value": 0.0, "children": {}}
+        for stack, weight in self.stacks.items():
+            node = root
+            node["value"] += weight
+            for frame in stack.split(";"):
+                node = node["children"].setdefault(frame, {"name": frame, "value": 0.0, "children": {}})
+                node["value"] += weight
+
+        def finish(node):
+            children = sorted(node["children"].values(), key=lambda child: -child["value"])
+            return {"name": node["name"], "value": round(node["value"], 3), "children": [finish(c) for c in children]}
+
+        return finish(root)
+
+    def top(self, limit: int = 25) -> List[Dict[str, Any]]:
+        """Functions by self weight."""
+        own: Counter = Counter()
+        for stack, weight in self.stacks.items():
+            own[stack.rsplit(";", 1)[-1]] += weight
+        return [{"frame": frame, "self": round(weight, 3)} for frame, weight in own.most_common(limit)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "unit": self.unit, "duration_s": round(self.duration, 6),
+                "meta": self.meta, "top": self.top(), "tree": self.tree()}
+
+
+def _frame_label(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+
+def _c_label(fn) -> str:
+    module = getattr(fn, "__module__", None) or type(getattr(fn, "__self__", None)).__name__
+    return f"{module}:{getattr(fn, '__qualname__', repr(fn))}"
+
+
+class _Tracer:
+    """`sys.setprofile` hook accumulating exact self time per call stack."""
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        # [path, start, time spent in children]
+        self.stack: List[list] = []
+        self.stacks: Counter = Counter()
+
+    def __call__(self, frame, event, arg):
+        now = self.clock()
+        if event == "call" or event == "c_call":
+            label = _frame_label(frame) if event == "call" else _c_label(arg)
+            parent = self.stack[-1][0] + ";" if self.stack else ""
+            self.stack.append([parent + label, now, 0.0])
+        elif self.stack:
+            # Returns of frames entered before tracing started find an empty stack.
+            path, start, children = self.stack.pop()
+            total = now - start
+            self.stacks[path] += (total - children) * 1e6
+            if self.stack:
+                self.stack[-1][2] += total
+
+    def finish(self) -> None:
+        while self.stack:
+            self("", "return", None)
+
+
+class SamplingProfiler:
+    """Samples the stacks of the given threads (all but itself when `thread_ids` is None)."""
+
+    def __init__(self, interval: float, thread_ids: Optional[List[int]] = None, max_depth: int = 128):
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _sample(self) -> None:
+        me = threading.get_ident()
+        frames = sys._current_frames()
+        for ident in self.thread_ids if self.thread_ids is not None else list(frames):
+            frame = frames.get(ident)
+            if frame is None or ident == me:
+                continue
+            labels = []
+            while frame is not None and len(labels) < self.max_depth:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            if self.thread_ids is None and labels[0] in IDLE_LEAVES:
+                continue
+            self.stacks[";".join(reversed(labels))] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> "SamplingProfiler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def drain(self) -> Counter:
+        """Stacks collected since the last drain (continuous mode)."""
+        stacks, self.stacks = self.stacks, Counter()
+        return stacks
+
+
+def active() -> bool:
+    """Whether the current request is being profiled (providers run inline, cache bypassed)."""
+    return _active.get()
+
+
+def profile_call(mode: str, fn: Callable[..., Any], *args, **kwargs) -> Tuple[Any, Profile]:
+    """Run `fn` on the calling thread under the `mode` profiler; returns `(result, profile)`."""
+    if mode not in MODES:
+        raise ValueError(f"unknown profiling mode {mode!r}")
+    token = _active.set(True)
+    started = time.perf_counter()
+    try:
+        if mode == DETERMINISTIC:
+            tracer = _Tracer()
+            sys.setprofile(tracer)
+            try:
+                result = fn(*args, **kwargs)
+            finally:
+                sys.setprofile(None)
+            tracer.finish()
+            # The tracer's own setprofile(None) call is not part of the workload.
+            stacks = {k: v for k, v in tracer.stacks.items() if not k.endswith("sys:setprofile")}
+            return result, Profile(mode, "microseconds", stacks, time.perf_counter() - started)
+
+        sampler = SamplingProfiler(PROFILE_SAMPLE_INTERVAL_MS / 1000.0, [threading.get_ident()]).start()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            stacks = sampler.stop()
+        return result, Profile(mode, "samples", stacks, time.perf_counter() - started,
+                               {"interval_ms": PROFILE_SAMPLE_INTERVAL_MS})
+    finally:
+        _active.reset(token)
+
+
+def enabled() -> bool:
+    return bool(os.environ.get("PROFILING_TOKEN"))
+
+
+def authorized(token: Optional[str]) -> bool:
+    expected = os.environ.get("PROFILING_TOKEN")
+    return bool(expected) and token is not None and hmac.compare_digest(token.encode(), expected.encode())
+
+
+def requested_mode(headers: Mapping[str, str]) -> Optional[str]:
+    """Profiling mode asked for by an authorized request, or None."""
+    mode = headers.get("X-Profile") or headers.get("x-profile")
+    if not mode or not enabled():
+        return None
+    if not authorized(headers.get("X-Profile-Token") or headers.get("x-profile-token")):
+        logger.warning("Ignoring X-Profile header with a missing or wrong token")
+        return None
+    mode = mode.strip().lower()
+    return mode if mode in MODES else None
+
+
+def _safe_id(profile_id: str) -> bool:
+    return bool(profile_id) and all(c.isalnum() or c in "-_" for c in profile_id)
+
+
+def _prune(directory: str, keep: int) -> None:
+    metas = sorted(name for name in os.listdir(directory) if name.endswith(".json"))
+    for name in metas[:max(0, len(metas) - keep)]:
+        for suffix in (".json", ".collapsed"):
+            try:
+                os.unlink(os.path.join(directory, name[:-5] + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def save(profile: Profile, label: str, directory: Optional[str] = None) -> str:
+    """Store `profile` as `<id>.collapsed` and `<id>.json`; returns the id."""
+    directory = directory or PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    profile_id = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{profile.mode}-{uuid.uuid4().hex[:8]}"
+    profile.meta.setdefault("label", label)
+    profile.meta.setdefault("created", time.time())
+    with open(os.path.join(directory, profile_id + ".collapsed"), "w", encoding="utf-8") as f:
+        f.write(profile.collapsed())
+    with open(os.path.join(directory, profile_id + ".json"), "w", encoding="utf-8") as f:
+        json.dump(profile.to_dict(), f)
+    _prune(directory, PROFILE_KEEP)
+    return profile_id
+
+
+def list_profiles(directory: Optional[str] = None) -> List[Dict[str, Any]]:
+    directory = directory or PROFILE_DIR
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        profiles.append({"id": name[:-5], "mode": data["mode"], "unit": data["unit"],
+                         "duration_s": data["duration_s"], **data["meta"]})
+    return profiles
+
+
+def load(profile_id: str, fmt: str = "json", directory: Optional[str] = None) -> Optional[str]:
+    """Stored profile `profile_id` as JSON (`fmt="json"`) or collapsed stacks, or None."""
+    if not _safe_id(profile_id):
+        return None
+    path = os.path.join(directory or PROFILE_DIR, profile_id + (".collapsed" if fmt == "collapsed" else ".json"))
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+_continuous: Optional[SamplingProfiler] = None
+_continuous_lock = threading.Lock()
+
+
+def start_continuous(hz: float = PROFILE_CONTINUOUS_HZ, period: float = PROFILE_CONTINUOUS_SECONDS,
+                     directory: Optional[str] = None) -> None:
+    """Sample every thread at `hz` and store a profile every `period` seconds (idempotent)."""
+    global _continuous
+    with _continuous_lock:
+        if _continuous is not None:
+            return
+        sampler = _continuous = SamplingProfiler(1.0 / hz).start()
+
+    def flush():
+        last = time.perf_counter()
+        while not sampler._stop.wait(period):
+            stacks = sampler.drain()
+            now = time.perf_counter()
+            if stacks:
+                try:
+                    save(Profile(SAMPLING, "samples", stacks, now - last, {"interval_ms": 1000.0 / hz}),
+                         "continuous", directory)
+                except OSError:
+                    logger.exception("Failed to write continuous profile")
+            last = now
+
+    threading.Thread(target=flush, name="profile-flush", daemon=True).start()
+    logger.info("Continuous profiling at %g Hz, writing every %gs", hz, period)
+
+
+def stop_continuous() -> None:
+    global _continuous
+    with _continuous_lock:
+        if _continuous is not None:
+            _continuous.stop()
+            _continuous = None
@@ -0,0 +1,80 @@
+"""Rate limiting and retry helpers shared by the price sync modules."""
+import logging
+import random
+import threading
+import time
+from typing import Callable, Optional, TypeVar
+
+LOG = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+THROTTLING_CODES = {
+    'Throttling',
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'RequestLimitExceeded',
+    'RateExceeded',
+}
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` calls per second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1.0))
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> None:
+        """Block until a token is available and take it."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+def is_throttling_error(exc: BaseException) -> bool:
+    """True for botocore throttling errors and HTTP 429-style responses."""
+    response = getattr(exc, 'response', None)
+    if isinstance(response, dict):
+        code = response.get('Error', {}).get('Code')
+        if code in THROTTLING_CODES:
+            return True
+    status = getattr(response, 'status_code', None)
+    if status == 429:
+        return True
+    return 'throttl' in type(exc).__name__.lower()
+
+
+def call_with_retries(fn: Callable[[], T], retries: int = 5, base_delay: float = 0.5, max_delay: float = 20.0,
+                      retry_on: Callable[[BaseException], bool] = is_throttling_error,
+                      sleep: Callable[[float], None] = time.sleep) -> T:
+    """Call `fn`, retrying with full-jitter exponential backoff while `retry_on(exc)` holds."""
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as exc:
+            if attempt >= retries or not retry_on(exc):
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            LOG.info('Retrying after %s (attempt %d/%d, sleeping %.2fs)', type(exc).__name__, attempt + 1, retries, delay)
+            sleep(delay)
+            attempt += 1
@@ -0,0 +1,262 @@
+"""Bounded LRU/TTL cache for calculation results, with single-flight coalescing.
+
+Keys are built by the caller (see `payload_key`) and should include the
+catalog version, so a price sync makes old entries unreachable; they then age
+out through the LRU/TTL bounds. While a key is being computed, concurrent
+callers for the same key wait for that computation instead of starting their
+own.
+
+With a `shared` tier (see `utils.shared_cache`), a local miss is looked up in
+the cross-worker daemon before computing, and computed values are published
+to it as JSON, so a result computed by any worker is a hit for all of them.
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Mapping, Optional, Tuple
+
+if TYPE_CHECKING:
+    from utils.shared_cache import SharedCache
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", "2048"))
+RESULT_CACHE_TTL_SECONDS = float(os.environ.get("RESULT_CACHE_TTL_SECONDS", "900"))
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("RESULT_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+
+def _canonical(value: Any) -> Hashable:
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        value = float(value)
+        if math.isnan(value):
+            return "nan"
+        # Collapses -0.0 and ints that arrive as floats (or vice versa).
+        return value + 0.0
+    if isinstance(value, Mapping):
+        return tuple(sorted((k, _canonical(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_canonical(v) for v in value)
+    return repr(value)
+
+
+def payload_key(payload: Mapping[str, Any]) -> Hashable:
+    """Order-independent, hashable key for a validated payload dict (defaults already filled in)."""
+    return _canonical(payload)
+
+
+def shared_key(key: Hashable) -> bytes:
+    """Stable cross-process name for a key built from `payload_key` parts (strings, floats, tuples)."""
+    return hashlib.sha256(repr(key).encode()).digest()
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate in-memory cost of a JSON-like value, from its serialized length."""
+    try:
+        return len(json.dumps(value, separators=(",", ":"), default=str))
+    except (TypeError, ValueError):
+        return 1024
+
+
+class _Flight:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ResultCache:
+    """Thread-safe LRU cache bounded by entry count, total estimated size and age."""
+
+    def __init__(
+        self,
+        max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+        ttl: float = RESULT_CACHE_TTL_SECONDS,
+        max_bytes: int = RESULT_CACHE_MAX_BYTES,
+        sizeof: Callable[[Any], int] = estimate_size,
+        clock: Callable[[], float] = time.monotonic,
+        shared: Optional["SharedCache"] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._clock = clock
+        self.shared = shared
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, Any]]" = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.shared_hits = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _drop(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def _lookup(self, key: Hashable, now: float) -> Tuple[bool, Any]:
+        item = self._entries.get(key)
+        if item is None:
+            return False, None
+        expires, _, value = item
+        if expires <= now:
+            self._drop(key)
+            self.expirations += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            found, value = self._lookup(key, self._clock())
+        return value if found else default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (self._clock() + self.ttl, size, value)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Any],
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """Return the cached value for `key`, computing it at most once concurrently.
+
+        Callers that arrive while another thread computes the same key wait for
+        it and share its value (or its exception). Values failing `cacheable`
+        are returned to the waiting callers but not stored.
+        """
+        if not self.enabled:
+            return compute()
+
+        with self._lock:
+            found, value = self._lookup(key, self._clock())
+            if found:
+                self.hits += 1
+                return value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            epoch, found = self._shared_get(key)
+            if found is not None:
+                flight.value = found
+                self.put(key, found)
+                return found
+            flight.value = compute()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        else:
+            if cacheable(flight.value):
+                self.put(key, flight.value)
+                self._shared_put(epoch, key, flight.value)
+            return flight.value
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _shared_get(self, key: Hashable) -> Tuple[Optional[int], Any]:
+        if self.shared is None:
+            return None, None
+        epoch, raw = self.shared.get(shared_key(key))
+        if raw is None:
+            return epoch, None
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return epoch, None
+        with self._lock:
+            self.shared_hits += 1
+        return epoch, value
+
+    def _shared_put(self, epoch: Optional[int], key: Hashable, value: Any) -> None:
+        if self.shared is None or epoch is None:
+            return
+        try:
+            raw = json.dumps(value, separators=(",", ":")).encode()
+        except (TypeError, ValueError):
+            return
+        self.shared.put(epoch, shared_key(key), raw)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "shared_hits": self.shared_hits,
+                "shared": self.shared.path if self.shared is not None else None,
+            }
+
+
+_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Get or create the process-wide result cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from utils.shared_cache import get_shared_cache
+
+                _cache = ResultCache(shared=get_shared_cache())
+    return _cache
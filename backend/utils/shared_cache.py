@@ -0,0 +1,247 @@
+"""Cross-worker cache tier: a small cache daemon on a local Unix socket.
+
+Each gunicorn/uvicorn worker keeps its own `ResultCache`; with several workers
+every one of them would otherwise compute and warm the same results. When
+`SHARED_CACHE_SOCKET` is set, the result cache also looks results up in, and
+publishes them to, a daemon on that socket (a local stand-in for Redis):
+
+    python -m utils.shared_cache --socket /run/infracostiq/cache.sock
+
+The daemon holds opaque byte values in a bounded LRU/TTL store and an integer
+`epoch`. `bump()` (called by catalog writes, see `catalog_writer`) increments
+the epoch and drops every entry in one step, so a price sync invalidates the
+shared results of all workers at once. Every reply carries the current epoch
+and a write is stored only if it was computed under that epoch, so a worker
+that started computing before a bump cannot publish a stale result after it.
+
+Wire format, both directions big endian:
+
+    request   op (B), epoch (Q), key length (H), value length (I), key, value
+    reply     status (B), epoch (Q), value length (I), value
+
+The client never fails a request: if the daemon is unreachable it reports
+misses and retries the connection after `SHARED_CACHE_RETRY_SECONDS`.
+"""
+import argparse
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from utils.result_cache import ResultCache
+
+logger = logging.getLogger(__name__)
+
+SHARED_CACHE_TIMEOUT = float(os.environ.get("SHARED_CACHE_TIMEOUT", "0.25"))
+SHARED_CACHE_RETRY_SECONDS = float(os.environ.get("SHARED_CACHE_RETRY_SECONDS", "5"))
+DEFAULT_MAX_ENTRIES = 65536
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 900.0
+
+OP_GET, OP_PUT, OP_BUMP, OP_STATS = 1, 2, 3, 4
+MISS, HIT, OK, STALE = 0, 1, 2, 3
+
+_REQUEST = struct.Struct("!BQHI")
+_REPLY = struct.Struct("!BQI")
+
+
+def _read_exact(sock: socket.socket, n: int) -> bytes:
+    chunks = []
+    while n:
+        chunk = sock.recv(n)
+        if not chunk:
+            raise ConnectionError("shared cache connection closed")
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b"".join(chunks)
+
+
+class CacheServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Cache daemon on a Unix socket. One thread per connection; connections are persistent."""
+
+    daemon_threads = True
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl: float = DEFAULT_TTL_SECONDS):
+        self.store = ResultCache(max_entries=max_entries, ttl=ttl, max_bytes=max_bytes, sizeof=len)
+        self.epoch = 0
+        self.stale_writes = 0
+        self._epoch_lock = threading.Lock()
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, _Handler)
+        os.chmod(path, 0o600)
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+    def handle_op(self, op: int, epoch: int, key: bytes, value: bytes) -> Tuple[int, int, bytes]:
+        if op == OP_GET:
+            found = self.store.get(key)
+            return (MISS, self.epoch, b"") if found is None else (HIT, self.epoch, found)
+        if op == OP_PUT:
+            with self._epoch_lock:
+                if epoch != self.epoch:
+                    self.stale_writes += 1
+                    return STALE, self.epoch, b""
+                self.store.put(key, value)
+            return OK, self.epoch, b""
+        if op == OP_BUMP:
+            with self._epoch_lock:
+                self.epoch += 1
+                self.store.clear()
+            return OK, self.epoch, b""
+        if op == OP_STATS:
+            stats = {**self.store.stats(), "epoch": self.epoch, "stale_writes": self.stale_writes}
+            return OK, self.epoch, json.dumps(stats).encode()
+        raise ValueError(f"unknown shared cache op {op}")
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        sock = self.request
+        while True:
+            try:
+                header = sock.recv(_REQUEST.size, socket.MSG_WAITALL)
+                if len(header) < _REQUEST.size:
+                    return
+                op, epoch, key_len, value_len = _REQUEST.unpack(header)
+                key = _read_exact(sock, key_len)
+                value = _read_exact(sock, value_len)
+                status, epoch, reply = self.server.handle_op(op, epoch, key, value)
+                sock.sendall(_REPLY.pack(status, epoch, len(reply)) + reply)
+            except (OSError, ValueError) as e:
+                logger.debug("Dropping shared cache connection: %s", e)
+                return
+
+
+class SharedCache:
+    """Client of a `CacheServer`. Safe to share between threads (one connection per thread)."""
+
+    def __init__(self, path: str, timeout: float = SHARED_CACHE_TIMEOUT, retry: float = SHARED_CACHE_RETRY_SECONDS):
+        self.path = path
+        self.timeout = timeout
+        self.retry = retry
+        self._local = threading.local()
+        self._down_until = 0.0
+        self.errors = 0
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def _close(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def _call(self, op: int, key: bytes = b"", value: bytes = b"", epoch: int = 0) -> Optional[Tuple[int, int, bytes]]:
+        if time.monotonic() < self._down_until:
+            return None
+        try:
+            sock = self._connection()
+            sock.sendall(_REQUEST.pack(op, epoch, len(key), len(value)) + key + value)
+            status, epoch, length = _REPLY.unpack(_read_exact(sock, _REPLY.size))
+            return status, epoch, _read_exact(sock, length)
+        except OSError as e:
+            self._close()
+            self.errors += 1
+            if self._down_until == 0.0 or time.monotonic() >= self._down_until:
+                logger.warning("Shared cache at %s unavailable (%s); using local caches only", self.path, e)
+            self._down_until = time.monotonic() + self.retry
+            return None
+
+    def get(self, key: bytes) -> Tuple[Optional[int], Optional[bytes]]:
+        """`(epoch, value)`; value is None on a miss, and both are None when the daemon is unreachable."""
+        reply = self._call(OP_GET, key)
+        if reply is None:
+            return None, None
+        status, epoch, value = reply
+        return epoch, (value if status == HIT else None)
+
+    def put(self, epoch: int, key: bytes, value: bytes) -> bool:
+        """Store `value` if the daemon is still at `epoch` (the one the value was computed under)."""
+        reply = self._call(OP_PUT, key, value, epoch)
+        return reply is not None and reply[0] == OK
+
+    def bump(self) -> Optional[int]:
+        """Invalidate every shared entry; returns the new epoch, or None if the daemon is unreachable."""
+        reply = self._call(OP_BUMP)
+        return None if reply is None else reply[1]
+
+    def stats(self) -> Optional[Dict]:
+        reply = self._call(OP_STATS)
+        return None if reply is None else json.loads(reply[2])
+
+    def close(self) -> None:
+        self._close()
+
+
+_clients: Dict[str, SharedCache] = {}
+_clients_lock = threading.Lock()
+
+
+def get_shared_cache(path: Optional[str] = None) -> Optional[SharedCache]:
+    """Process-wide client for `path` (default `SHARED_CACHE_SOCKET`), or None when no daemon is configured."""
+    path = path or os.environ.get("SHARED_CACHE_SOCKET")
+    if not path:
+        return None
+    with _clients_lock:
+        client = _clients.get(path)
+        if client is None:
+            client = _clients[path] = SharedCache(path)
+        return client
+
+
+def bump() -> Optional[int]:
+    """Invalidate the shared results of every worker, if a daemon is configured."""
+    client = get_shared_cache()
+    if client is None:
+        return None
+    epoch = client.bump()
+    if epoch is not None:
+        logger.info("Shared cache invalidated (epoch %d)", epoch)
+    return epoch
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the shared result cache daemon")
+    parser.add_argument("--socket", default=os.environ.get("SHARED_CACHE_SOCKET"))
+    parser.add_argument("--max-entries", type=int, default=DEFAULT_MAX_ENTRIES)
+    parser.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES)
+    parser.add_argument("--ttl", type=float, default=DEFAULT_TTL_SECONDS)
+    args = parser.parse_args()
+    if not args.socket:
+        parser.error("--socket (or SHARED_CACHE_SOCKET) is required")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    server = CacheServer(args.socket, args.max_entries, args.max_bytes, args.ttl)
+    logger.info("Shared cache listening on %s", args.socket)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,12 @@ lsof -ti:3000 | xargs kill -9 2>/dev/null || true
 
 # Start backend
 cd /Users/myaccnt/Documents/infra-cost-app-complete/backend
-python3 app.py > /tmp/backend.log 2>&1 &
+# SERVER_MODE=asgi serves the calculation API with uvicorn (see backend/asgi.py).
+if [ "${SERVER_MODE:-flask}" = "asgi" ]; then
+  python3 -m uvicorn asgi:app --host 127.0.0.1 --port 5000 --workers "${WEB_CONCURRENCY:-2}" > /tmp/backend.log 2>&1 &
+else
+  python3 app.py > /tmp/backend.log 2>&1 &
+fi
 BACKEND_PID=$!
 echo "Backend started with PID: $BACKEND_PID"
 
@@ -1,3 +1,7 @@
 #!/bin/bash
 cd "$(dirname "$0")/backend"
+# SERVER_MODE=asgi serves the calculation API with uvicorn (see backend/asgi.py).
+if [ "${SERVER_MODE:-flask}" = "asgi" ]; then
+  exec python3 -m uvicorn asgi:app --host "${HOST:-127.0.0.1}" --port "${PORT:-5000}" --workers "${WEB_CONCURRENCY:-2}"
+fi
 python3 app.py